@@ -2,14 +2,14 @@ from fastapi import Depends, Cookie, HTTPException, status, APIRouter
 from typing import Optional
 
 from app.services.auth_service import AuthService
-from app.schemas.user import UserResponse
+from app.schemas.user import UserPrincipal
 
 auth_service = AuthService()
 router = APIRouter()
 
 async def get_current_user(
     session_cookie: Optional[str] = Cookie(None, alias="session_id")
-) -> Optional[UserResponse]:
+) -> Optional[UserPrincipal]:
     """
     현재 로그인한 사용자 정보를 가져오는 의존성 함수
     
@@ -17,7 +17,7 @@ async def get_current_user(
         session_cookie: 쿠키에서 가져온 세션 ID
         
     Returns:
-        UserResponse: 로그인한 사용자 정보
+        UserPrincipal: 로그인한 사용자 식별 정보 (세션 검증 결과는 캐시됨)
         
     Raises:
         HTTPException: 인증되지 않은 사용자인 경우
@@ -25,12 +25,12 @@ async def get_current_user(
     if not session_cookie:
         return None
         
-    user = await auth_service.validate_session(session_cookie)
+    user = await auth_service.get_session_principal(session_cookie)
     return user
 
 async def get_current_user_or_403(
-    current_user: Optional[UserResponse] = Depends(get_current_user)
-) -> UserResponse:
+    current_user: Optional[UserPrincipal] = Depends(get_current_user)
+) -> UserPrincipal:
     """
     현재 로그인한 사용자 정보를 가져오거나 403 에러를 반환하는 의존성 함수
     
@@ -38,7 +38,7 @@ async def get_current_user_or_403(
         current_user: get_current_user 의존성에서 가져온 사용자 정보
         
     Returns:
-        UserResponse: 로그인한 사용자 정보
+        UserPrincipal: 로그인한 사용자 정보
         
     Raises:
         HTTPException: 인증되지 않은 사용자인 경우
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Response, Cookie, HTTPException
+from fastapi import APIRouter, Request, Response, Cookie, HTTPException
 from typing import Optional
 
 from app.services.auth_service import AuthService
+from app.services.hashing_service import PasswordHasher
 from app.schemas.auth import LoginCredentials, AuthResponse
 from app.schemas.user import UserCreate, UserResponse
 from app.core.config import settings
@@ -9,26 +10,33 @@ from app.core.config import settings
 router = APIRouter()
 auth_service = AuthService()
 
+def _client_ip(request: Request) -> Optional[str]:
+    """IP별 동시 인증 요청 제한에 사용할 클라이언트 IP"""
+    return request.client.host if request.client else None
+
 @router.post("/register", response_model=UserResponse)
 async def register(
     user_data: UserCreate,
+    request: Request,
     response: Response,
     session_cookie: Optional[str] = Cookie(None, alias="session_id")
 ):
     """회원가입 API - 기존 세션 데이터가 있다면 자동으로 연동됨"""
     try:
-        user = await auth_service.register(
-            user_data.email,
-            user_data.password,
-            user_data.name,
-            session_cookie
-        )
-        
-        # 회원가입 성공 시 자동 로그인
-        _, new_session_id = await auth_service.login(
-            user_data.email,
-            user_data.password
-        )
+        # 비밀번호 해싱/검증은 IP별 동시 요청 수 제한 후 전용 실행기에서 처리
+        async with PasswordHasher.limit_client(_client_ip(request)):
+            user = await auth_service.register(
+                user_data.email,
+                user_data.password,
+                user_data.name,
+                session_cookie
+            )
+            
+            # 회원가입 성공 시 자동 로그인
+            _, new_session_id = await auth_service.login(
+                user_data.email,
+                user_data.password
+            )
         
         # 새로운 세션 ID를 쿠키에 설정
         response.set_cookie(
@@ -41,22 +49,29 @@ async def register(
         )
         
         return user
+    except HTTPException as e:
+        # 과부하(429/503)는 그대로 전달
+        if e.status_code in (429, 503):
+            raise
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login", response_model=AuthResponse)
 async def login(
     credentials: LoginCredentials,
+    request: Request,
     response: Response,
     session_cookie: Optional[str] = Cookie(None, alias="session_id")
 ):
     """로그인 API - 기존 세션이 있다면 연동"""
     try:
-        user, new_session_id = await auth_service.login(
-            credentials.email,
-            credentials.password,
-            session_cookie
-        )
+        async with PasswordHasher.limit_client(_client_ip(request)):
+            user, new_session_id = await auth_service.login(
+                credentials.email,
+                credentials.password,
+                session_cookie
+            )
         
         response.set_cookie(
             key="session_id",
@@ -48,7 +48,7 @@ async def compare_embeddings(
         # 실제 코드에서는 다른 방식으로 구현해야 할 수 있습니다
         # 이 예제는 데모용입니다
         temp_model = EmbeddingService._model
-        temp_embeddings = EmbeddingService._embeddings
+        temp_embeddings = EmbeddingService._embedding_matrix
         
         # LaBSE 임베딩 로드 (실제 구현 필요)
         # 여기서는 임시로 EmbeddingService의 내부 상태를 조작하지만,
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, status
 from typing import List, Optional
-from app.schemas.user import UserResponse
+from app.schemas.user import UserPrincipal
 from app.schemas.body_condition import (
     BodyConditionResponse, 
     BodyConditionCreate, 
@@ -16,7 +16,7 @@ body_condition_service = BodyConditionService()
 @router.post("/body-conditions", response_model=BodyConditionResponse, status_code=status.HTTP_201_CREATED)
 async def create_body_condition(
     condition: BodyConditionCreate,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """신체 상태 생성 API"""
     # 본인의 신체 상태만 생성 가능
@@ -32,7 +32,7 @@ async def create_body_condition(
 @router.post("/body-conditions/batch", response_model=List[BodyConditionResponse], status_code=status.HTTP_201_CREATED)
 async def create_body_conditions_batch(
     batch: BodyConditionBatch,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """여러 신체 상태 일괄 생성 API"""
     # 본인의 신체 상태만 생성 가능
@@ -56,7 +56,7 @@ async def create_body_conditions_batch(
 @router.get("/body-conditions/{condition_id}", response_model=BodyConditionResponse)
 async def get_body_condition(
     condition_id: str,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """신체 상태 조회 API"""
     condition = await body_condition_service.get_body_condition(condition_id)
@@ -77,7 +77,7 @@ async def get_user_body_conditions(
     user_id: str,
     limit: int = Query(50, ge=1, le=100),
     skip: int = Query(0, ge=0),
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """사용자의 신체 상태 목록 조회 API"""
     # 본인 또는 관리자만 조회 가능 (관리자 권한 체크 로직 필요)
@@ -94,7 +94,7 @@ async def get_user_body_conditions(
 async def get_my_body_conditions(
     limit: int = Query(50, ge=1, le=100),
     skip: int = Query(0, ge=0),
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """내 신체 상태 목록 조회 API"""
     conditions = await body_condition_service.get_body_conditions_by_user(current_user.id, limit, skip)
@@ -102,7 +102,7 @@ async def get_my_body_conditions(
 
 @router.get("/me/body-conditions/latest", response_model=List[BodyConditionResponse])
 async def get_my_latest_body_conditions(
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """내 최신 신체 상태 조회 API (각 부위별 최신 1개)"""
     conditions = await body_condition_service.get_latest_body_conditions_by_user(current_user.id)
@@ -112,7 +112,7 @@ async def get_my_latest_body_conditions(
 async def update_body_condition(
     condition_id: str,
     condition_update: BodyConditionUpdate,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """신체 상태 업데이트 API"""
     # 신체 상태 존재 확인 및 소유권 검증
@@ -133,7 +133,7 @@ async def update_body_condition(
 @router.delete("/body-conditions/{condition_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_body_condition(
     condition_id: str,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """신체 상태 삭제 API"""
     # 신체 상태 존재 확인 및 소유권 검증
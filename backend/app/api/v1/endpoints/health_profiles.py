@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import Optional
-from app.schemas.user import UserResponse
+from app.schemas.user import UserPrincipal
 from app.schemas.health_profile import (
     HealthProfileResponse, 
     HealthProfileCreate, 
@@ -15,7 +15,7 @@ health_profile_service = HealthProfileService()
 @router.post("/health-profiles", response_model=HealthProfileResponse, status_code=status.HTTP_201_CREATED)
 async def create_health_profile(
     profile: HealthProfileCreate,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """건강 프로필 생성 API"""
     # 본인의 프로필만 생성 가능
@@ -39,7 +39,7 @@ async def create_health_profile(
 @router.get("/health-profiles/{profile_id}", response_model=HealthProfileResponse)
 async def get_health_profile(
     profile_id: str,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """건강 프로필 조회 API"""
     profile = await health_profile_service.get_health_profile(profile_id)
@@ -57,7 +57,7 @@ async def get_health_profile(
 
 @router.get("/me/health-profile", response_model=HealthProfileResponse)
 async def get_my_health_profile(
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """내 건강 프로필 조회 API"""
     profile = await health_profile_service.get_health_profile_by_user(current_user.id)
@@ -69,7 +69,7 @@ async def get_my_health_profile(
 async def update_health_profile(
     profile_id: str,
     profile_update: HealthProfileUpdate,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """건강 프로필 업데이트 API"""
     # 프로필 존재 확인 및 소유권 검증
@@ -90,7 +90,7 @@ async def update_health_profile(
 @router.patch("/me/health-profile", response_model=HealthProfileResponse)
 async def update_my_health_profile(
     profile_update: HealthProfileUpdate,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """내 건강 프로필 업데이트 API (없으면 생성)"""
     updated_profile = await health_profile_service.update_health_profile_by_user(
@@ -101,7 +101,7 @@ async def update_my_health_profile(
 @router.delete("/health-profiles/{profile_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_health_profile(
     profile_id: str,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """건강 프로필 삭제 API"""
     # 프로필 존재 확인 및 소유권 검증
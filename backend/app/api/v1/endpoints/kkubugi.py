@@ -11,6 +11,9 @@ import openai
 from openai import AsyncOpenAI
 import os
 
+from app.core.config import settings
+from app.core.sse import coalesce_chunks, encode_chunk
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -69,12 +72,20 @@ async def stream_openai_response(message: str) -> AsyncGenerator[bytes, None]:
             temperature=0.7,  # 적절한 창의성과 일관성 밸런스
         )
 
-        # 스트리밍 응답 처리
-        async for chunk in stream:
-            content = chunk.choices[0].delta.content
-            if content:
-                # 스트리밍 포맷으로 변환하여 전송
-                yield f"data: {content}\n\n".encode('utf-8')
+        async def iter_contents():
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+
+        # 스트리밍 응답 처리 (토큰 조각을 묶어 프레임 수 감소)
+        async for content, _ in coalesce_chunks(
+            iter_contents(),
+            max_bytes=settings.KKUBUGI_SSE_MAX_BYTES,
+            max_delay_ms=settings.KKUBUGI_SSE_MAX_DELAY_MS
+        ):
+            # {"content": ...} JSON 프레임으로 전송 (묶인 조각에 빈 줄이 있어도 프레임이 나뉘지 않음)
+            yield encode_chunk(content, done=None)
 
         # 종료 신호 전송
         yield b"data: [DONE]\n\n"
@@ -88,7 +99,7 @@ async def stream_openai_response(message: str) -> AsyncGenerator[bytes, None]:
         logger.error(f"꾸부기 API 오류: {str(e)}")
         # 오류 메시지 전송
         error_msg = "죄송합니다, 응답 처리 중 오류가 발생했습니다부기!"
-        yield f"data: {error_msg}\n\n".encode('utf-8')
+        yield encode_chunk(error_msg, done=None)
         yield b"data: [DONE]\n\n"
 
 
@@ -5,14 +5,17 @@ from fastapi.responses import StreamingResponse
 from app.services.temp_session_service import TempSessionService
 from app.services.helpy_pro_service import HelpyProService
 from app.services.openai_streaming_service import OpenAIStreamingService
+from app.services.provider_router import ProviderRouter
 from app.services.user_service import UserService
 from app.schemas.user_input import UserInput
 from app.schemas.ai_response import AIResponse, StreamingAIResponse
 from app.schemas.session import StretchingSession
-from app.schemas.user import UserResponse
+from app.schemas.user import UserPrincipal
 from app.services.embedding_service import EmbeddingService
 from app.api.v1.dependencies import get_current_user
 from app.core.database import MongoManager
+from app.core.config import settings
+from app.core.sse import coalesce_chunks, encode_chunk, encode_event
 import json
 import re
 from typing import Optional
@@ -138,7 +141,7 @@ async def get_current_session(session_cookie: Optional[str] = Cookie(None, alias
 async def create_stretching_session(
     session_id: str,
     user_input: UserInput,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """새로운 스트레칭 세션 생성 및 AI 가이드 생성"""
     try:
@@ -246,7 +249,7 @@ async def update_stretching_feedback(
 async def create_stretching_session_stream(
     session_id: str,
     user_input: UserInput,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """새로운 스트레칭 세션 생성 및 AI 가이드 생성 (스트리밍 방식)"""
     try:
@@ -291,7 +294,7 @@ async def create_stretching_session_stream(
         async def format_as_sse():
             try:
                 logger.info("Starting SSE stream for stretching guide")
-                async for chunk in HelpyProService.generate_stretching_guide_stream(
+                stream = HelpyProService.generate_stretching_guide_stream(
                     session_id=session_id,
                     stretching_id=stretching_id,
                     user_input=user_input,
@@ -299,19 +302,19 @@ async def create_stretching_session_stream(
                     temp_session_service=TempSessionService,
                     user_service=user_service,
                     current_user=current_user
+                )
+                # 토큰 조각을 묶어 미리 인코딩된 SSE 프레임(bytes)으로 변환
+                async for content, done in coalesce_chunks(
+                    stream,
+                    max_bytes=settings.STRETCHING_SSE_MAX_BYTES,
+                    max_delay_ms=settings.STRETCHING_SSE_MAX_DELAY_MS
                 ):
-                    # StreamingAIResponse를 SSE 형식으로 변환
-                    data = json.dumps({"content": chunk.content, "done": chunk.done})
-                    sse_message = f"data: {data}\n\n"
-                    logger.debug(f"Sending SSE chunk: content_length={len(chunk.content)}, done={chunk.done}")
-                    logger.debug(f"SSE message format: {sse_message[:50]}...")
-                    yield sse_message
+                    yield encode_chunk(content, done)
                 
                 logger.info("SSE stream completed successfully")
             except Exception as e:
                 logger.error(f"Error in SSE stream: {str(e)}", exc_info=True)
-                error_data = json.dumps({"content": "오류가 발생했습니다. 다시 시도해주세요.", "done": True})
-                yield f"data: {error_data}\n\n"
+                yield encode_chunk("오류가 발생했습니다. 다시 시도해주세요.", True)
         
         # 스트리밍 응답 반환
         logger.info("Returning StreamingResponse with SSE media type")
@@ -333,7 +336,7 @@ async def create_stretching_session_stream(
 async def create_stretching_session_stream_openai(
     session_id: str,
     user_input: UserInput,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """새로운 스트레칭 세션 생성 및 OpenAI를 사용한 AI 가이드 생성 (스트리밍 방식)"""
     try:
@@ -378,7 +381,7 @@ async def create_stretching_session_stream_openai(
         async def format_as_sse():
             try:
                 logger.info("Starting OpenAI SSE stream for stretching guide")
-                async for chunk in OpenAIStreamingService.generate_stretching_guide_stream(
+                stream = OpenAIStreamingService.generate_stretching_guide_stream(
                     session_id=session_id,
                     stretching_id=stretching_id,
                     user_input=user_input,
@@ -386,19 +389,19 @@ async def create_stretching_session_stream_openai(
                     temp_session_service=TempSessionService,
                     user_service=user_service,
                     current_user=current_user
+                )
+                # 토큰 조각을 묶어 미리 인코딩된 SSE 프레임(bytes)으로 변환
+                async for content, done in coalesce_chunks(
+                    stream,
+                    max_bytes=settings.STRETCHING_SSE_MAX_BYTES,
+                    max_delay_ms=settings.STRETCHING_SSE_MAX_DELAY_MS
                 ):
-                    # StreamingAIResponse를 SSE 형식으로 변환
-                    data = json.dumps({"content": chunk.content, "done": chunk.done})
-                    sse_message = f"data: {data}\n\n"
-                    logger.debug(f"Sending OpenAI SSE chunk: content_length={len(chunk.content)}, done={chunk.done}")
-                    logger.debug(f"SSE message format: {sse_message[:50]}...")
-                    yield sse_message
+                    yield encode_chunk(content, done)
                 
                 logger.info("OpenAI SSE stream completed successfully")
             except Exception as e:
                 logger.error(f"Error in OpenAI SSE stream: {str(e)}", exc_info=True)
-                error_data = json.dumps({"content": "OpenAI 스트리밍 중 오류가 발생했습니다. 다시 시도해주세요.", "done": True})
-                yield f"data: {error_data}\n\n"
+                yield encode_chunk("OpenAI 스트리밍 중 오류가 발생했습니다. 다시 시도해주세요.", True)
         
         # 스트리밍 응답 반환
         logger.info("Returning OpenAI StreamingResponse with SSE media type")
@@ -416,6 +419,92 @@ async def create_stretching_session_stream_openai(
         logger.error(f"Error in create_stretching_session_stream_openai: {str(e)}", exc_info=True)
         raise
 
+@router.post("/sessions/{session_id}/stretching/stream-auto")
+async def create_stretching_session_stream_auto(
+    session_id: str,
+    user_input: UserInput,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """새로운 스트레칭 세션 생성 및 제공자 라우팅(상태/지연 시간 기반 선택 + 헤지 요청)을 거친 AI 가이드 생성 (스트리밍 방식)"""
+    try:
+        logger.info(f"Creating routed streaming stretching session for session_id: {session_id}")
+        logger.debug(f"User input: {user_input.model_dump()}")
+        
+        # 0. 임베딩 서비스 초기화 확인
+        await EmbeddingService.initialize()
+        
+        # 1. 임베딩 검색으로 관련 스트레칭 찾기
+        logger.info("Searching for relevant stretching exercises")
+        body_parts = [part.strip() for part in user_input.selected_body_parts.split(',')]
+        relevant_exercises = await EmbeddingService.search(
+            query=user_input.pain_description,
+            body_parts=body_parts,
+            occupation=user_input.occupation,
+            top_k=3
+        )
+        
+        logger.info(f"Found {len(relevant_exercises)} relevant exercises")
+        
+        # 2. 세션에 스트레칭 기록 추가
+        logger.info("Adding stretching session to database")
+        updated_session = await TempSessionService.add_stretching_session(
+            session_id=session_id,
+            user_input=user_input
+        )
+        
+        if not updated_session:
+            logger.error(f"Session not found: {session_id}")
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        # 3. 생성된 스트레칭 세션의 ID 찾기
+        latest_stretching = updated_session.stretching_sessions[-1]
+        stretching_id = latest_stretching.id
+        logger.info(f"Created stretching session with ID: {stretching_id}")
+        
+        # 4. 제공자 라우터를 거친 AI 가이드 스트리밍 생성
+        logger.info("Generating AI guide via provider router (streaming)")
+        
+        # SSE 형식으로 변환하는 내부 함수 정의
+        async def format_as_sse():
+            try:
+                logger.info("Starting routed SSE stream for stretching guide")
+                stream = ProviderRouter.generate_stretching_guide_stream(
+                    session_id=session_id,
+                    stretching_id=stretching_id,
+                    user_input=user_input,
+                    relevant_exercises=relevant_exercises,
+                    temp_session_service=TempSessionService,
+                    user_service=user_service,
+                    current_user=current_user
+                )
+                # 토큰 조각을 묶어 미리 인코딩된 SSE 프레임(bytes)으로 변환
+                async for content, done in coalesce_chunks(
+                    stream,
+                    max_bytes=settings.STRETCHING_SSE_MAX_BYTES,
+                    max_delay_ms=settings.STRETCHING_SSE_MAX_DELAY_MS
+                ):
+                    yield encode_chunk(content, done)
+                
+                logger.info("Routed SSE stream completed successfully")
+            except Exception as e:
+                logger.error(f"Error in routed SSE stream: {str(e)}", exc_info=True)
+                yield encode_chunk("오류가 발생했습니다. 다시 시도해주세요.", True)
+        
+        # 스트리밍 응답 반환
+        return StreamingResponse(
+            format_as_sse(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no"  # Nginx 버퍼링 비활성화
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in create_stretching_session_stream_auto: {str(e)}", exc_info=True)
+        raise
+
 @router.get("/muscles")
 async def get_all_muscles():
     """모든 근육 목록 조회"""
@@ -1000,7 +1089,7 @@ async def get_recent_activities(
 async def stream_conversation(
     session_id: str,
     request: ConversationRequest,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """대화 컨텍스트 기반 스트리밍 응답 생성"""
     try:
@@ -1060,17 +1149,21 @@ async def stream_conversation(
                 }
                 
                 # OpenAI 스트리밍 서비스 호출
-                async for chunk in OpenAIStreamingService.generate_conversation_response_stream(
+                stream = OpenAIStreamingService.generate_conversation_response_stream(
                     session_id=session_id,
                     conversation_context=conversation_context,
                     relevant_exercises=relevant_exercises
+                )
+                # 토큰 조각을 묶어 미리 인코딩된 SSE 프레임(bytes)으로 변환
+                async for content, _ in coalesce_chunks(
+                    stream,
+                    max_bytes=settings.CONVERSATION_SSE_MAX_BYTES,
+                    max_delay_ms=settings.CONVERSATION_SSE_MAX_DELAY_MS
                 ):
-                    # 응답 데이터를 SSE 형식으로 변환
-                    data = json.dumps({"content": chunk.content})
-                    yield f"data: {data}\n\n"
+                    yield encode_chunk(content, done=None)
                     
                 # 완료 신호 전송
-                yield f"data: {json.dumps({'done': True})}\n\n"
+                yield encode_event({"done": True})
                 
                 # 대화 기록 저장 (비동기로 처리)
                 asyncio.create_task(
@@ -1083,8 +1176,7 @@ async def stream_conversation(
                 
             except Exception as e:
                 logger.error(f"Error in conversation streaming: {e}")
-                error_data = json.dumps({"error": str(e)})
-                yield f"data: {error_data}\n\n"
+                yield encode_event({"error": str(e)})
         
         # 스트리밍 응답 반환
         return StreamingResponse(
@@ -1154,7 +1246,7 @@ async def recover_session(
 async def migrate_session(
     request: Request,
     session_data: dict,
-    current_user: UserResponse = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """비회원 세션 데이터를 회원 계정으로 마이그레이션"""
     try:
@@ -1177,22 +1269,23 @@ async def migrate_session(
         # 1. 스트레칭 세션 데이터 획득
         stretching_sessions = temp_session.stretching_sessions if hasattr(temp_session, 'stretching_sessions') else []
         
-        # 2. 사용자 DB의 stretching_history에 데이터 추가
+        # 2. 사용자 스트레칭 히스토리에 데이터 추가
         user_collection = MongoManager.get_collection("users")
         
         # 스트레칭 기록이 있는 경우에만 진행
         if stretching_sessions:
             # 각 스트레칭 세션에 사용자 ID 추가
+            stretching_sessions = [
+                session.model_dump() if hasattr(session, 'model_dump') else session
+                for session in stretching_sessions
+            ]
             for session in stretching_sessions:
                 session['user_id'] = current_user.id
                 session['migrated_at'] = datetime.utcnow()
                 session['original_session_id'] = session_id
                 
-            # 사용자 문서에 스트레칭 기록 추가
-            await user_collection.update_one(
-                {"_id": ObjectId(current_user.id)},
-                {"$push": {"stretching_history": {"$each": stretching_sessions}}}
-            )
+            # 히스토리 컬렉션에 스트레칭 기록 추가
+            await user_service.add_stretching_sessions(current_user.id, stretching_sessions)
             
             logger.info(f"세션 마이그레이션 성공: {len(stretching_sessions)}개 스트레칭 기록이 이동됨")
             
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, status, Response, Cookie
+from fastapi import APIRouter, HTTPException, Query, Depends, status, Request, Response, Cookie
 from typing import Optional, List
-from app.schemas.user import UserResponse, UserProfileUpdate, UserDelete
-from app.schemas.session import StretchingSession
+from app.schemas.user import UserResponse, UserPrincipal, UserProfileUpdate, UserDelete
+from app.schemas.session import StretchingSession, StretchingHistoryPage
 from app.services.user_service import UserService
 from app.services.health_profile_service import HealthProfileService
 from app.services.body_condition_service import BodyConditionService
 from app.services.auth_service import AuthService
+from app.services.hashing_service import PasswordHasher
+from app.services.stretching_history_service import StretchingHistoryService
 from app.api.v1.dependencies import get_current_user, get_current_user_or_403
 
 router = APIRouter()
@@ -26,7 +28,7 @@ async def get_user(user_id: str):
 async def update_user_profile(
     user_id: str, 
     profile: UserProfileUpdate,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """회원 기본 정보 업데이트 API (이름, 이메일)"""
     # 본인 계정만 수정 가능
@@ -39,14 +41,18 @@ async def update_user_profile(
     updated_user = await user_service.update_user_profile(user_id, profile)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
+    
+    # 캐시된 세션 검증 결과(이메일/이름) 무효화
+    AuthService.invalidate_user(user_id)
     return updated_user
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: str,
     delete_data: UserDelete,
+    request: Request,
     response: Response,
-    current_user: UserResponse = Depends(get_current_user_or_403),
+    current_user: UserPrincipal = Depends(get_current_user_or_403),
     session_cookie: Optional[str] = Cookie(None, alias="session_id")
 ):
     """회원 탈퇴 API"""
@@ -63,8 +69,9 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     
-    from app.core.security import verify_password
-    if not verify_password(delete_data.password, user["password"]):
+    async with PasswordHasher.limit_client(request.client.host if request.client else None):
+        password_ok = await PasswordHasher.verify(delete_data.password, user["password"])
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
@@ -84,47 +91,81 @@ async def delete_user(
     if not deleted:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # 스트레칭 히스토리 삭제 (별도 컬렉션)
+    await StretchingHistoryService.delete_by_user(user_id)
+    
+    # 다른 세션의 캐시된 검증 결과도 무효화
+    AuthService.invalidate_user(user_id)
+    
     return None
 
+async def _stretching_history_list(
+    user_id: str,
+    limit: int,
+    skip: int,
+    cursor: Optional[str],
+    response: Response
+) -> List[dict]:
+    """스트레칭 히스토리 목록 조회 (skip이 없으면 키셋 페이지네이션 - 다음 페이지 커서는 X-Next-Cursor 헤더)"""
+    if skip and not cursor:
+        return await user_service.get_stretching_history(user_id, limit, skip)
+    
+    history, next_cursor = await StretchingHistoryService.get_history_page(
+        user_id, limit, cursor, ascending=True
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return history
+
 @router.get("/users/{user_id}/stretching-history", response_model=List[StretchingSession])
 async def get_stretching_history(
     user_id: str,
+    response: Response,
     limit: int = Query(10, ge=1, le=50),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값 (skip 대신 사용)")
 ):
     """회원의 스트레칭 히스토리 조회"""
-    history = await user_service.get_stretching_history(user_id, limit, skip)
+    history = await _stretching_history_list(user_id, limit, skip, cursor, response)
     return history
 
 @router.get("/me/stretching-history", response_model=List[StretchingSession])
 async def get_my_stretching_history(
+    response: Response,
     limit: int = Query(10, ge=1, le=50),
     skip: int = Query(0, ge=0),
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값 (skip 대신 사용)"),
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """현재 로그인한 사용자의 스트레칭 히스토리 조회"""
     try:
-        history = await user_service.get_stretching_history(current_user.id, limit, skip)
+        history = await _stretching_history_list(current_user.id, limit, skip, cursor, response)
         return history
+    except HTTPException:
+        raise
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Error retrieving stretching history: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"스트레칭 히스토리 조회 중 오류가 발생했습니다: {str(e)}")
 
+@router.get("/me/stretching-history/page", response_model=StretchingHistoryPage)
+async def get_my_stretching_history_page(
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
+):
+    """현재 로그인한 사용자의 스트레칭 히스토리 커서 페이지 조회 (최신순)"""
+    items, next_cursor = await StretchingHistoryService.get_history_page(current_user.id, limit, cursor)
+    return StretchingHistoryPage(items=items, next_cursor=next_cursor)
+
 @router.get("/me/stretching/{stretching_id}", response_model=StretchingSession)
 async def get_my_stretching_session(
     stretching_id: str,
-    current_user: UserResponse = Depends(get_current_user_or_403)
+    current_user: UserPrincipal = Depends(get_current_user_or_403)
 ):
     """현재 로그인한 사용자의 특정 스트레칭 세션 조회"""
-    history = await user_service.get_stretching_history(current_user.id, limit=100)
-    
-    # 특정 ID의 스트레칭 세션 찾기
-    stretching_session = next(
-        (session for session in history if session.id == stretching_id),
-        None
-    )
+    stretching_session = await StretchingHistoryService.get_session(current_user.id, stretching_id)
     
     if not stretching_session:
         raise HTTPException(status_code=404, detail="Stretching session not found")
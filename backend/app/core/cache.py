@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    크기 제한과 TTL을 가진 LRU 캐시
+
+    가장 오래 사용되지 않은 항목부터 제거하며, 만료된 항목은 조회 시 제거합니다.
+    스레드 풀에서 접근할 수 있도록 내부 잠금을 사용합니다.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """캐시 저장 (크기 초과 시 가장 오래된 항목 제거)"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """캐시 항목 무효화"""
+        with self._lock:
+            item = self._items.pop(key, None)
+            return item[0] if item else None
+
+    def pop_where(self, predicate: Callable[[Any], bool]) -> int:
+        """값이 조건에 맞는 항목을 모두 무효화 (제거한 항목 수 반환)"""
+        with self._lock:
+            keys = [key for key, (value, _) in self._items.items() if predicate(value)]
+            for key in keys:
+                del self._items[key]
+            return len(keys)
+
+    def clear(self):
+        """모든 캐시 항목 제거"""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
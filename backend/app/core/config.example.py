@@ -0,0 +1,141 @@
+"""
+애플리케이션 설정 템플릿
+- app/core/config.py로 복사해서 사용 (config.py는 .gitignore 대상이므로 저장소에 포함하지 않음)
+- 값은 환경 변수 / backend/.env에서 읽음
+"""
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
+import os
+
+# ✅ .env 파일을 명확하게 로드
+load_dotenv()
+
+class Settings(BaseSettings):
+    APP_ENV: str = os.getenv("APP_ENV", "development")
+    DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
+    API_V1_PREFIX: str = os.getenv("API_V1_PREFIX", "/api/v1")
+    PROJECT_NAME: str = os.getenv("PROJECT_NAME", "꾸부기 코치 API")
+
+    HOST: str = os.getenv("HOST", "127.0.0.1")
+    PORT: int = int(os.getenv("PORT", 8000))
+    # 현재 사용하는 코드는 없음 - 필요하면 환경 변수(.env)로 설정 (코드에 기본 키를 두지 않음)
+    SECRET_KEY: Optional[str] = os.getenv("SECRET_KEY")
+
+    # MongoDB Configuration
+    MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    MONGODB_DB_NAME: str = os.getenv("MONGODB_DB_NAME", "kkubugi")
+    MONGODB_INIT_MODE: str = os.getenv("MONGODB_INIT_MODE", "none")
+
+    # Helpy Pro API Configuration
+    HELPY_PRO_API_URL: str = os.getenv("HELPY_PRO_API_URL", "https://helpy.pro/api/v1/predict")
+    HELPY_PRO_API_KEY: str = os.getenv("HELPY_PRO_API_KEY", "")
+    
+    # OpenAI API Configuration
+    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    
+    # OpenAI HTTP 클라이언트 풀 설정 (프로세스 전역 keep-alive / HTTP/2 연결 재사용)
+    OPENAI_HTTP2: bool = os.getenv("OPENAI_HTTP2", "True").lower() == "true"
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+    OPENAI_READ_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_READ_TIMEOUT_SECONDS", "60"))
+
+    # Session Configuration
+    SESSION_EXPIRY_HOURS: int = int(os.getenv("SESSION_EXPIRY_HOURS", "24"))
+    
+    # 기존 users.stretching_history 배열을 옮길 때 한 번에 읽는 세션 수 ($slice 크기)
+    STRETCHING_HISTORY_MIGRATION_CHUNK: int = int(os.getenv("STRETCHING_HISTORY_MIGRATION_CHUNK", "200"))
+    
+    # 로그인 세션 검증 캐시 (세션 ID → 사용자 식별 정보, 최대 항목 수 / TTL(초) - 다른 워커 프로세스의 로그아웃은 TTL 이내에 반영)
+    AUTH_SESSION_CACHE_SIZE: int = int(os.getenv("AUTH_SESSION_CACHE_SIZE", "10000"))
+    AUTH_SESSION_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_SESSION_CACHE_TTL_SECONDS", "60"))
+    
+    # 새로 추가: 세션 디버깅 모드
+    SESSION_DEBUG: bool = os.getenv("SESSION_DEBUG", "True").lower() == "true"
+    
+    # 추가: 임베딩 모델 설정
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    
+    # 쿼리 인코더 백엔드 설정 (torch / torch-int8 / onnx)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_ONNX_FILE: str = os.getenv("EMBEDDING_ONNX_FILE", "")
+    
+    # 쿼리 임베딩 캐시 설정
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: int = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+    
+    # 임베딩 추론 실행기 설정 (동시 추론 스레드 수 / 최대 대기열 깊이)
+    EMBEDDING_INFERENCE_WORKERS: int = int(os.getenv("EMBEDDING_INFERENCE_WORKERS", "2"))
+    EMBEDDING_INFERENCE_MAX_QUEUE: int = int(os.getenv("EMBEDDING_INFERENCE_MAX_QUEUE", "64"))
+    
+    # 비밀번호 해싱 실행기 설정 (bcrypt 스레드 수 / 최대 대기열 깊이 / IP별 동시 인증 요청 수 - 0이면 제한 없음)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+    PASSWORD_HASH_PER_IP_MAX_CONCURRENT: int = int(os.getenv("PASSWORD_HASH_PER_IP_MAX_CONCURRENT", "2"))
+    
+    # 쿼리 인코딩 마이크로 배칭 설정 (배치 크기 1이면 배칭 비활성화)
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "16"))
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+    
+    # LLM 업스트림 적응형 동시성 제한 (제공자별 초기/최소/최대 동시 요청 수)
+    HELPY_PRO_CONCURRENCY_INITIAL: int = int(os.getenv("HELPY_PRO_CONCURRENCY_INITIAL", "50"))
+    HELPY_PRO_CONCURRENCY_MIN: int = int(os.getenv("HELPY_PRO_CONCURRENCY_MIN", "4"))
+    HELPY_PRO_CONCURRENCY_MAX: int = int(os.getenv("HELPY_PRO_CONCURRENCY_MAX", "100"))
+    OPENAI_CONCURRENCY_INITIAL: int = int(os.getenv("OPENAI_CONCURRENCY_INITIAL", "50"))
+    OPENAI_CONCURRENCY_MIN: int = int(os.getenv("OPENAI_CONCURRENCY_MIN", "4"))
+    OPENAI_CONCURRENCY_MAX: int = int(os.getenv("OPENAI_CONCURRENCY_MAX", "100"))
+    # 제한 초과 시 최대 대기 시간(초) / 최대 대기열 깊이 / 지연 시간 허용 배수(기준 대비)
+    LLM_CONCURRENCY_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_CONCURRENCY_MAX_WAIT_SECONDS", "5"))
+    LLM_CONCURRENCY_MAX_QUEUE: int = int(os.getenv("LLM_CONCURRENCY_MAX_QUEUE", "100"))
+    LLM_CONCURRENCY_LATENCY_TOLERANCE: float = float(os.getenv("LLM_CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+    
+    # LLM 업스트림 서킷 브레이커 (연속 실패 횟수 / 열림 유지 시간(초) / 반열림 시 동시 탐색 요청 수)
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RECOVERY_SECONDS: float = float(os.getenv("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+    LLM_BREAKER_HALF_OPEN_MAX_CALLS: int = int(os.getenv("LLM_BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+    
+    # 제공자 라우팅: 첫 토큰이 이 시간(ms) 안에 오지 않으면 다른 제공자에 헤지 요청 (0이면 헤지 비활성화, 실패 시 전환만 수행)
+    LLM_HEDGE_DELAY_MS: float = float(os.getenv("LLM_HEDGE_DELAY_MS", "2500"))
+    
+    # 프롬프트 생성 (관련 운동 조각의 추정 토큰 예산 - 0이면 제한 없음 / 운동별 조각 캐시 크기, TTL)
+    PROMPT_EXERCISE_TOKEN_BUDGET: int = int(os.getenv("PROMPT_EXERCISE_TOKEN_BUDGET", "1500"))
+    PROMPT_FRAGMENT_CACHE_SIZE: int = int(os.getenv("PROMPT_FRAGMENT_CACHE_SIZE", "2048"))
+    PROMPT_FRAGMENT_CACHE_TTL_SECONDS: int = int(os.getenv("PROMPT_FRAGMENT_CACHE_TTL_SECONDS", "86400"))
+    
+    # MongoDB 쓰기 지연 큐 (최대 대기 작업 수 / 큐가 가득 찼을 때 제출 측 최대 대기(초) / 배치 크기, 배치 수집 대기(ms) / 재시도 횟수, 재시도 기본 지연(ms) / 종료 시 남은 작업 저장 대기(초))
+    PERSISTENCE_QUEUE_MAX_SIZE: int = int(os.getenv("PERSISTENCE_QUEUE_MAX_SIZE", "1000"))
+    PERSISTENCE_QUEUE_PUT_TIMEOUT_SECONDS: float = float(os.getenv("PERSISTENCE_QUEUE_PUT_TIMEOUT_SECONDS", "2"))
+    PERSISTENCE_BATCH_SIZE: int = int(os.getenv("PERSISTENCE_BATCH_SIZE", "50"))
+    PERSISTENCE_BATCH_MAX_WAIT_MS: float = float(os.getenv("PERSISTENCE_BATCH_MAX_WAIT_MS", "20"))
+    PERSISTENCE_MAX_RETRIES: int = int(os.getenv("PERSISTENCE_MAX_RETRIES", "3"))
+    PERSISTENCE_RETRY_BASE_DELAY_MS: float = float(os.getenv("PERSISTENCE_RETRY_BASE_DELAY_MS", "200"))
+    PERSISTENCE_SHUTDOWN_TIMEOUT_SECONDS: float = float(os.getenv("PERSISTENCE_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+    
+    # 스트레칭 가이드 응답 캐시 (선택 사용 - 정확 일치 + 유사 질의)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "False").lower() == "true"
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "1800"))
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.97"))
+    
+    # SSE 토큰 묶음 전송 설정 (바이트 임계값 / 최대 지연 ms, 0이면 조각마다 바로 전송)
+    # 엔드포인트별 값이 없으면 SSE_COALESCE_* 기본값 사용
+    SSE_COALESCE_MAX_BYTES: int = int(os.getenv("SSE_COALESCE_MAX_BYTES", "128"))
+    SSE_COALESCE_MAX_DELAY_MS: float = float(os.getenv("SSE_COALESCE_MAX_DELAY_MS", "40"))
+    STRETCHING_SSE_MAX_BYTES: int = int(os.getenv("STRETCHING_SSE_MAX_BYTES", os.getenv("SSE_COALESCE_MAX_BYTES", "128")))
+    STRETCHING_SSE_MAX_DELAY_MS: float = float(os.getenv("STRETCHING_SSE_MAX_DELAY_MS", os.getenv("SSE_COALESCE_MAX_DELAY_MS", "40")))
+    CONVERSATION_SSE_MAX_BYTES: int = int(os.getenv("CONVERSATION_SSE_MAX_BYTES", os.getenv("SSE_COALESCE_MAX_BYTES", "128")))
+    CONVERSATION_SSE_MAX_DELAY_MS: float = float(os.getenv("CONVERSATION_SSE_MAX_DELAY_MS", os.getenv("SSE_COALESCE_MAX_DELAY_MS", "40")))
+    KKUBUGI_SSE_MAX_BYTES: int = int(os.getenv("KKUBUGI_SSE_MAX_BYTES", os.getenv("SSE_COALESCE_MAX_BYTES", "128")))
+    KKUBUGI_SSE_MAX_DELAY_MS: float = float(os.getenv("KKUBUGI_SSE_MAX_DELAY_MS", os.getenv("SSE_COALESCE_MAX_DELAY_MS", "40")))
+    
+    class Config:
+        case_sensitive = True
+
+@lru_cache()
+def get_settings():
+    return Settings()
+
+settings = get_settings()
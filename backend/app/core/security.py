@@ -2,7 +2,7 @@ from passlib.hash import bcrypt
 
 def hash_password(password: str) -> str:
     """
-    비밀번호를 해싱합니다.
+    비밀번호를 해싱합니다. (동기 호출 - 비동기 핸들러에서는 PasswordHasher.hash 사용)
     
     Args:
         password: 해싱할 원본 비밀번호
@@ -14,7 +14,7 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    비밀번호가 해시와 일치하는지 검증합니다.
+    비밀번호가 해시와 일치하는지 검증합니다. (동기 호출 - 비동기 핸들러에서는 PasswordHasher.verify 사용)
     
     Args:
         plain_password: 검증할 원본 비밀번호
@@ -0,0 +1,204 @@
+"""
+SSE 스트리밍 유틸리티
+- 업스트림(OpenAI 호환) 스트림의 delta 콘텐츠 파싱
+- 클라이언트로 보낼 SSE 프레임을 바이트로 바로 인코딩 (모델 직렬화 / 문자열 포맷팅 생략)
+- 토큰 단위 조각을 바이트 임계값 / 지연 시간 기준으로 묶어 프레임 수 감소
+
+orjson이 설치되어 있으면 사용하고, 없으면 표준 json 모듈로 동작합니다.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+else:
+    json_loads = json.loads
+
+    def json_dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+_DATA_PREFIX = b"data: "
+_FRAME_END = b"\n\n"
+_CHUNK_PREFIX = b'data: {"content":'
+_CHUNK_SUFFIX = {
+    None: b"}\n\n",
+    False: b',"done":false}\n\n',
+    True: b',"done":true}\n\n',
+}
+
+DONE_FRAME = b'data: {"content":"","done":true}\n\n'
+
+
+def encode_event(payload: Dict[str, Any]) -> bytes:
+    """임의의 JSON 페이로드를 SSE 프레임(bytes)으로 인코딩"""
+    return _DATA_PREFIX + json_dumps_bytes(payload) + _FRAME_END
+
+
+def encode_chunk(content: str, done: Optional[bool] = False) -> bytes:
+    """
+    스트리밍 청크를 SSE 프레임(bytes)으로 인코딩
+
+    {"content": ..., "done": ...} 형식이며 done이 None이면 done 필드를 생략합니다.
+    """
+    return _CHUNK_PREFIX + json_dumps_bytes(content) + _CHUNK_SUFFIX[done]
+
+
+def _parse_line(line: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """업스트림 SSE 한 줄에서 (delta 콘텐츠, usage) 추출 (파싱 실패 시 콘텐츠 None)"""
+    try:
+        data = json_loads(line)
+    except ValueError:
+        return None, None
+
+    if not isinstance(data, dict):
+        return "", None
+    usage = data.get("usage")
+    choices = data.get("choices")
+    if not choices:
+        return "", usage
+    return (choices[0].get("delta") or {}).get("content") or "", usage
+
+
+def parse_delta_content(line: str) -> Optional[str]:
+    """
+    업스트림 SSE 한 줄에서 delta 콘텐츠 추출
+
+    Returns:
+        콘텐츠 문자열 (콘텐츠가 없는 줄이면 빈 문자열, 파싱 실패 시 None)
+    """
+    return _parse_line(line)[0]
+
+
+async def iter_delta_contents(
+    lines: AsyncIterator[str],
+    usage: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """
+    업스트림 SSE 줄 스트림(response.aiter_lines())에서 비어있지 않은 delta 콘텐츠만 순서대로 반환
+
+    httpx의 aiter_lines는 점진적 UTF-8 디코딩을 하므로 멀티바이트 문자가 청크 경계에서 잘리지 않습니다.
+    [DONE] 신호를 받으면 종료합니다.
+    usage dict가 주어지면 스트림에 포함된 usage 페이로드(보통 마지막 청크)를 채워 넣습니다.
+    """
+    async for line in lines:
+        if not line:
+            continue
+        if line.startswith("data:"):
+            line = line[5:].lstrip()
+        if line == "[DONE]":
+            return
+
+        content, line_usage = _parse_line(line)
+        if line_usage and usage is not None:
+            usage.update(line_usage)
+        if content is None:
+            logger.warning(f"Failed to parse JSON: {line[:200]}")
+        elif content:
+            yield content
+
+
+async def coalesce_chunks(
+    chunks: AsyncIterator[Any],
+    max_bytes: int,
+    max_delay_ms: float
+) -> AsyncIterator[Tuple[str, bool]]:
+    """
+    스트리밍 조각을 모아 (content, done) 단위로 반환
+
+    버퍼가 max_bytes(UTF-8 기준) 이상이 되거나, 첫 조각을 버퍼에 넣은 뒤 max_delay_ms가 지나면 내보냅니다.
+    업스트림이 잠시 멈춰도 지연 시간이 지나면 모인 내용을 바로 보냅니다.
+    done=True 조각을 받으면 남은 버퍼와 합쳐 즉시 내보냅니다.
+    두 임계값 중 하나라도 0 이하이면 묶지 않고 그대로 전달합니다.
+
+    Args:
+        chunks: 문자열 또는 content/done 속성을 가진 객체(StreamingAIResponse 등)의 비동기 스트림
+        max_bytes: 프레임당 목표 최대 바이트 수
+        max_delay_ms: 첫 조각 이후 최대 대기 시간 (ms)
+    """
+    def _split(item) -> Tuple[str, bool]:
+        if isinstance(item, str):
+            return item, False
+        return item.content, bool(item.done)
+
+    if max_bytes <= 0 or max_delay_ms <= 0:
+        async for item in chunks:
+            yield _split(item)
+        return
+
+    # 업스트림은 별도 태스크 하나에서 끝까지 읽음 (httpx 스트림 컨텍스트를 같은 태스크에서 열고 닫도록)
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def _produce():
+        try:
+            async for item in chunks:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(finished)
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(_produce())
+    buffer = []
+    buffered_bytes = 0
+    deadline = None
+    max_delay = max_delay_ms / 1000.0
+
+    get_task = None
+
+    try:
+        while True:
+            # 대기 중인 get 태스크는 시간 초과 시에도 유지하여 조각이 유실되지 않도록 함
+            if get_task is None:
+                get_task = asyncio.ensure_future(queue.get())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done_tasks, _ = await asyncio.wait({get_task}, timeout=timeout)
+            if not done_tasks:
+                yield "".join(buffer), False
+                buffer, buffered_bytes, deadline = [], 0, None
+                continue
+            item = get_task.result()
+            get_task = None
+
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            content, done = _split(item)
+            if done:
+                buffer.append(content)
+                yield "".join(buffer), True
+                buffer, buffered_bytes, deadline = [], 0, None
+                continue
+            if not content:
+                continue
+
+            buffer.append(content)
+            buffered_bytes += len(content.encode("utf-8"))
+            if deadline is None:
+                deadline = loop.time() + max_delay
+            if buffered_bytes >= max_bytes:
+                yield "".join(buffer), False
+                buffer, buffered_bytes, deadline = [], 0, None
+
+        if buffer:
+            yield "".join(buffer), False
+    finally:
+        if get_task is not None:
+            get_task.cancel()
+        producer.cancel()
@@ -1,4 +1,6 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 import logging
 from app.core.config import settings
 from app.core.database import MongoManager
@@ -12,6 +14,15 @@ from app.api.v1.endpoints.kkubugi import router as kkubugi_router
 from app.services.temp_session_service import TempSessionService
 from app.services.auth_service import AuthService
 from app.services.embedding_service import EmbeddingService
+from app.services.openai_streaming_service import OpenAIStreamingService
+from app.services.helpy_pro_service import HelpyProService
+from app.services.llm_usage import LLMUsageMetrics
+from app.services.hashing_service import PasswordHasher
+from app.services.persistence_queue import PersistenceQueue
+from app.services.provider_router import ProviderRouter
+from app.services.stretching_history_service import StretchingHistoryService
+from app.services.response_cache import ResponseCache
+from app.services import prompt_builder
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -41,6 +52,10 @@ logger.info(f" - MONGODB_URL: {settings.MONGODB_URL}")
 logger.info(f" - MONGODB_DB_NAME: {settings.MONGODB_DB_NAME}")
 logger.info(f" - HELPY_PRO_API_URL: {settings.HELPY_PRO_API_URL}")
 logger.info(f" - SESSION_EXPIRY_HOURS: {settings.SESSION_EXPIRY_HOURS}")
+logger.info(f" - OPENAI_HTTP2: {settings.OPENAI_HTTP2}")
+logger.info(f" - EMBEDDING_BACKEND: {settings.EMBEDDING_BACKEND}")
+logger.info(f" - LLM_HEDGE_DELAY_MS: {settings.LLM_HEDGE_DELAY_MS}")
+logger.info(f" - RESPONSE_CACHE_ENABLED: {settings.RESPONSE_CACHE_ENABLED}")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -56,6 +71,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ✅ API 라우터 포함
@@ -106,6 +122,56 @@ app.include_router(
     tags=["kkubugi"]
 )
 
+@app.get("/live", tags=["health"])
+async def liveness():
+    """프로세스 생존 여부 확인 (liveness probe)"""
+    return {"status": "alive"}
+
+@app.get("/ready", tags=["health"])
+async def readiness():
+    """요청 처리 준비 여부 확인 (readiness probe) - 검색 가능해야 ready"""
+    embedding_status = EmbeddingService.get_status()
+    try:
+        await asyncio.wait_for(MongoManager.get_db().command("ping"), timeout=2.0)
+        mongo_ready = True
+    except Exception as e:
+        logger.warning(f"Readiness check: MongoDB ping failed: {str(e)}")
+        mongo_ready = False
+    ready = embedding_status["ready"] and mongo_ready
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "mongodb": mongo_ready,
+            "embedding": embedding_status
+        }
+    )
+
+@app.get("/metrics/llm", tags=["health"])
+async def llm_metrics():
+    """LLM 업스트림 지표 (토큰 사용량 / 프롬프트 캐시 적중, 동시성 제한기, 서킷 브레이커, 라우터, 캐시, 쓰기 지연 큐, 비밀번호 해싱 실행기, 임베딩 쿼리 캐시/추론 실행기)"""
+    return {
+        "usage": LLMUsageMetrics.stats(),
+        "limiters": {
+            "helpy_pro": HelpyProService.get_limiter_stats(),
+            "openai": OpenAIStreamingService.get_limiter_stats(),
+        },
+        "breakers": {
+            "helpy_pro": HelpyProService.get_breaker_stats(),
+            "openai": OpenAIStreamingService.get_breaker_stats(),
+        },
+        "router": ProviderRouter.stats(),
+        "response_cache": ResponseCache.stats(),
+        "prompt_fragment_cache": prompt_builder.fragment_cache_stats(),
+        "persistence_queue": PersistenceQueue.stats(),
+        "password_hasher": PasswordHasher.stats(),
+        "embedding": {
+            "query_cache": EmbeddingService.get_query_cache_stats(),
+            "inference": EmbeddingService.get_inference_stats(),
+        },
+    }
+
 @app.on_event("startup")
 async def startup_event():
     """애플리케이션 시작 시 실행되는 이벤트 핸들러"""
@@ -120,12 +186,15 @@ async def startup_event():
     logger.info("🔍 Initializing indexes...")
     await TempSessionService.initialize_indexes()
     await AuthService().initialize_indexes()
+    await StretchingHistoryService.initialize_indexes()
     logger.info("✅ Indexes initialized successfully")
     
-    # 임베딩 서비스 초기화
-    logger.info("🧠 Initializing embedding service...")
-    await EmbeddingService.initialize()
-    logger.info("✅ Embedding service initialized successfully")
+    # MongoDB 쓰기 지연 큐 워커 시작
+    PersistenceQueue.start()
+    
+    # 임베딩 서비스 초기화 (백그라운드 - 완료 전에도 검색 외 요청은 처리)
+    logger.info("🧠 Initializing embedding service in background...")
+    EmbeddingService.start_background_initialize()
     
     logger.info("✨ Application startup complete")
 
@@ -134,6 +203,18 @@ async def shutdown_event():
     """애플리케이션 종료 시 실행되는 이벤트 핸들러"""
     logger.info("🛑 Shutting down application...")
     
+    # 임베딩 추론 / 비밀번호 해싱 실행기 종료
+    EmbeddingService.shutdown()
+    PasswordHasher.shutdown()
+    
+    # 외부 API HTTP 클라이언트 풀 종료
+    await OpenAIStreamingService.close_client()
+    await HelpyProService.close_client()
+    
+    # 쓰기 지연 큐에 남은 저장 작업 처리 (MongoDB 연결 종료 전)
+    logger.info("💾 Flushing persistence queue...")
+    await PersistenceQueue.stop()
+    
     # MongoDB 연결 종료
     logger.info("📊 Closing MongoDB connection...")
     await MongoManager.close()
@@ -48,4 +48,7 @@ class StreamingAIResponse(BaseModel):
                 "content": "[분석]\n- 상태: 사무직으로 인한 목, 어깨 부위의 통증",
                 "done": False
             }
-        }
\ No newline at end of file
+        }
+
+class FallbackAIResponse(StreamingAIResponse):
+    """업스트림 호출 실패 시 보내는 기본 응답 청크 (제공자 라우터가 장애 전환 여부를 판단하는 데 사용)"""
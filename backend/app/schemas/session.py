@@ -29,6 +29,11 @@ class StretchingSession(BaseModel):
             }
         }
 
+class StretchingHistoryPage(BaseModel):
+    """스트레칭 히스토리 커서 페이지 (최신순)"""
+    items: List[StretchingSession] = Field(default_factory=list, description="스트레칭 세션 목록")
+    next_cursor: Optional[str] = Field(None, description="다음 페이지 커서 (마지막 페이지면 없음)")
+
 # 멀티톤 방식으로 세션 구조 변경
 class SessionBase(BaseModel):
     """임시 세션 기본 모델"""
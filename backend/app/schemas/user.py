@@ -22,6 +22,12 @@ class UserResponse(UserBase):
     id: str
     created_at: datetime
 
+class UserPrincipal(BaseModel):
+    """인증된 사용자 식별 정보 (세션 검증 결과 - 스트레칭 히스토리 등 전체 사용자 문서는 포함하지 않음)"""
+    id: str
+    email: str
+    name: Optional[str] = None
+
 class UserProfileUpdate(BaseModel):
     """회원 기본 정보 업데이트"""
     name: Optional[str] = None
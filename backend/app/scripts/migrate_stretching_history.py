@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+스트레칭 히스토리 마이그레이션 스크립트 (온라인 - 서비스 운영 중 실행 가능)
+- users 문서의 stretching_history 배열을 stretching_history 컬렉션으로 옮기고 배열 제거
+- 세션 ID 기준 upsert이므로 중단 후 다시 실행해도 안전 (아직 옮기지 않은 사용자는 API가 처음 조회할 때 옮김)
+- 실행 방법: python backend/app/scripts/migrate_stretching_history.py [--batch-size 100] [--pause-ms 50] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import os
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, project_root)
+
+from app.core.database import MongoManager
+from app.services.stretching_history_service import StretchingHistoryService
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+)
+logger = logging.getLogger(__name__)
+
+async def migrate_stretching_history(batch_size: int = 100, pause_ms: float = 50, dry_run: bool = False):
+    """스트레칭 히스토리 마이그레이션"""
+    logger.info("🚀 Starting stretching history migration...")
+
+    # MongoDB 연결
+    await MongoManager.connect()
+    db = MongoManager.get_db()
+
+    # 인덱스 생성 (이미 있으면 무시됨)
+    await StretchingHistoryService.initialize_indexes()
+
+    # 배열이 남아 있는 사용자만 _id로 조회 (배열 자체는 사용자별로 옮길 때 읽음)
+    legacy_filter = {StretchingHistoryService.legacy_field: {"$exists": True}}
+    remaining = await db.users.count_documents(legacy_filter)
+    logger.info(f"📊 Found {remaining} users with embedded stretching history")
+
+    if dry_run:
+        await MongoManager.close()
+        return
+
+    migrated_users = 0
+    migrated_sessions = 0
+
+    cursor = db.users.find(legacy_filter, {"_id": 1}).batch_size(batch_size)
+    async for user in cursor:
+        user_id = str(user["_id"])
+        try:
+            migrated_sessions += await StretchingHistoryService.migrate_legacy_history(user_id)
+            migrated_users += 1
+        except Exception as e:
+            logger.error(f"❌ Error migrating stretching history for user {user_id}: {e}")
+
+        # 운영 중인 DB 부하를 줄이기 위해 사용자 사이에 잠시 대기
+        if pause_ms > 0:
+            await asyncio.sleep(pause_ms / 1000.0)
+
+        if migrated_users % batch_size == 0:
+            logger.info(f"🔄 Progress: {migrated_users} users, {migrated_sessions} sessions")
+
+    remaining = await db.users.count_documents(legacy_filter)
+    logger.info(f"🎉 Migration completed: {migrated_users} users, {migrated_sessions} sessions ({remaining} users left - re-run to retry)")
+
+    # MongoDB 연결 종료
+    await MongoManager.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="users.stretching_history → stretching_history 컬렉션 마이그레이션")
+    parser.add_argument("--batch-size", type=int, default=100, help="사용자 조회 배치 크기 / 진행 로그 간격")
+    parser.add_argument("--pause-ms", type=float, default=50, help="사용자 사이 대기 시간(ms)")
+    parser.add_argument("--dry-run", action="store_true", help="대상 사용자 수만 출력")
+    args = parser.parse_args()
+
+    asyncio.run(migrate_stretching_history(args.batch_size, args.pause_ms, args.dry_run))
@@ -2,13 +2,21 @@ from datetime import datetime, timedelta
 from typing import Optional, Tuple
 from uuid import uuid4
 from fastapi import HTTPException
-from passlib.hash import bcrypt
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import MongoManager
 from app.services.user_service import UserService
-from app.schemas.user import UserResponse, UserCreate
+from app.services.hashing_service import PasswordHasher
+from app.schemas.user import UserResponse, UserPrincipal, UserCreate
 
 class AuthService:
+    # 세션 ID → (사용자 식별 정보, 세션 만료 시각) - 인스턴스 간 공유
+    _principal_cache = TTLCache(
+        max_size=settings.AUTH_SESSION_CACHE_SIZE,
+        ttl_seconds=settings.AUTH_SESSION_CACHE_TTL_SECONDS
+    )
+
     def __init__(self):
         self.user_service = UserService()
         self.sessions = MongoManager.get_db().sessions
@@ -39,7 +47,7 @@ class AuthService:
     async def login(self, email: str, password: str, old_session_id: Optional[str] = None) -> Tuple[UserResponse, str]:
         # 1. 사용자 조회
         user = await self.user_service.get_user_by_email(email, include_password=True)
-        if not user or not bcrypt.verify(password, user["password"]):
+        if not user or not await PasswordHasher.verify(password, user["password"]):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         # 2. 새 세션 생성
@@ -74,5 +82,38 @@ class AuthService:
             
         return await self.user_service.get_user(session["user_id"])
 
+    async def get_session_principal(self, session_id: str) -> Optional[UserPrincipal]:
+        """세션 검증 후 사용자 식별 정보 반환 (캐시 적중 시 MongoDB 조회 없음)"""
+        if not session_id:
+            return None
+
+        cached = self._principal_cache.get(session_id)
+        if cached is not None:
+            principal, expires_at = cached
+            if expires_at > datetime.utcnow():
+                return principal
+            self._principal_cache.pop(session_id)
+
+        session = await self.sessions.find_one(
+            {
+                "session_id": session_id,
+                "expires_at": {"$gt": datetime.utcnow()}
+            },
+            {"user_id": 1, "expires_at": 1}
+        )
+        if not session:
+            return None
+
+        principal = await self.user_service.get_user_principal(session["user_id"])
+        if principal:
+            self._principal_cache.set(session_id, (principal, session["expires_at"]))
+        return principal
+
+    @classmethod
+    def invalidate_user(cls, user_id: str) -> int:
+        """사용자의 캐시된 세션 검증 결과 무효화 (프로필 변경, 탈퇴 시)"""
+        return cls._principal_cache.pop_where(lambda item: item[0].id == user_id)
+
     async def logout(self, session_id: str):
+        self._principal_cache.pop(session_id)
         await self.sessions.delete_one({"session_id": session_id}) 
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+외부 LLM API 호출용 서킷 브레이커 (제공자별)
+- CLOSED: 정상 호출, 타임아웃/연결 오류/5xx가 연속 FAILURE_THRESHOLD회 발생하면 OPEN
+- OPEN: 업스트림을 호출하지 않고 즉시 CircuitOpenError (호출 측은 기본 응답 제공) - 타임아웃 대기로 워커와 동시성 슬롯이 묶이지 않음
+- HALF_OPEN: OPEN 후 recovery_seconds가 지나면 소수의 탐색 요청만 허용, 성공하면 CLOSED / 실패하면 다시 OPEN
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(HTTPException):
+    """서킷이 열려 있어 업스트림 호출을 건너뛴 경우 (503)"""
+
+    def __init__(self, breaker_name: str):
+        super().__init__(
+            status_code=503,
+            detail="AI 서비스 연결이 일시적으로 원활하지 않습니다. 잠시 후 다시 시도해주세요."
+        )
+        self.breaker_name = breaker_name
+
+
+class BreakerCall:
+    """허용된 호출 하나 - 업스트림 결과를 기록하여 서킷 상태 전환에 사용"""
+
+    def __init__(self, probe: bool):
+        self.probe = probe
+        self.started_at = time.monotonic()
+        self.failed: Optional[bool] = None  # None이면 판정 없음 (취소 등)
+
+    def record_status(self, status_code: int):
+        """업스트림 HTTP 상태 코드 기록 (5xx면 실패)"""
+        if status_code >= 500:
+            self.record_failure()
+        elif self.failed is None:
+            self.failed = False
+
+    def record_success(self):
+        if self.failed is None:
+            self.failed = False
+
+    def record_failure(self):
+        """실패 기록 (타임아웃, 연결 오류 등)"""
+        self.failed = True
+
+
+class CircuitBreaker:
+    """연속 실패 기반 서킷 브레이커 (반열림 탐색 포함)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_inflight = 0
+
+        # 지표
+        self.rejected = 0
+        self.opened = 0
+        self.probes = 0
+        self.last_opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """현재 상태 (OPEN이어도 복구 대기 시간이 지났으면 HALF_OPEN으로 간주)"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+            return self.HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        """호출이 즉시 거절되는 상태인지 여부"""
+        state = self.state
+        return state == self.OPEN or (
+            state == self.HALF_OPEN and self._probes_inflight >= self.half_open_max_calls
+        )
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        업스트림 호출 허용 여부 확인 (열려 있으면 CircuitOpenError)
+
+        사용 예:
+            async with breaker.guard() as call:
+                response = await client.post(...)
+                call.record_status(response.status_code)
+        """
+        call = self._before_call()
+        try:
+            yield call
+        except (asyncio.TimeoutError, httpx.TransportError):
+            call.record_failure()
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            # 클라이언트 연결 종료 등은 판정하지 않음
+            call.failed = None
+            raise
+        finally:
+            self._after_call(call)
+
+    def _before_call(self) -> BreakerCall:
+        state = self.state
+        if state == self.CLOSED:
+            return BreakerCall(probe=False)
+
+        if state == self.HALF_OPEN and self._probes_inflight < self.half_open_max_calls:
+            if self._state == self.OPEN:
+                self._state = self.HALF_OPEN
+                logger.info(f"[{self.name}] 서킷 반열림 - 탐색 요청 허용")
+            self._probes_inflight += 1
+            self.probes += 1
+            return BreakerCall(probe=True)
+
+        self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def _after_call(self, call: BreakerCall):
+        if call.probe:
+            self._probes_inflight -= 1
+            if call.failed is None:
+                return
+            if call.failed:
+                self._open("탐색 요청 실패")
+            else:
+                self._state = self.CLOSED
+                self._consecutive_failures = 0
+                logger.info(f"[{self.name}] 서킷 닫힘 - 탐색 요청 성공")
+            return
+
+        if call.failed is None or self._state != self.CLOSED:
+            # 서킷이 열리기 전에 시작된 요청의 결과는 상태 전환에 반영하지 않음
+            return
+        if call.failed:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._open(f"연속 실패 {self._consecutive_failures}회")
+        else:
+            self._consecutive_failures = 0
+
+    def _open(self, reason: str):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._consecutive_failures = 0
+        self.opened += 1
+        self.last_opened_at = time.time()
+        logger.warning(f"[{self.name}] 서킷 열림 ({self.recovery_seconds}s 동안 기본 응답 제공): {reason}")
+
+    def stats(self) -> Dict[str, Any]:
+        """서킷 브레이커 지표 반환"""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_seconds": self.recovery_seconds,
+            "probes_inflight": self._probes_inflight,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "probes": self.probes,
+            "last_opened_at": self.last_opened_at,
+        }
@@ -0,0 +1,243 @@
+"""
+외부 LLM API 호출용 적응형 동시성 제한기 (AIMD)
+- 정상 응답이고 지연 시간이 기준 이내이면 제한을 천천히 늘림 (요청당 +1/limit, 제한 1회분 요청마다 약 +1)
+- 429/5xx/타임아웃 등 과부하 신호는 크게 줄이고(x BACKOFF_RATIO), 지연 시간이 기준의 LATENCY_TOLERANCE배를 넘으면 조금 줄임
+- 감소 이후 시작된 요청의 결과만 다시 감소에 반영하여 같은 과부하로 연쇄 감소하지 않도록 함
+- 대기열 깊이와 대기 시간 상한을 두어 초과 시 즉시 503 (60초 타임아웃이 쌓이지 않도록)
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimitExceeded(HTTPException):
+    """동시성 제한 대기열이 가득 찼거나 대기 시간이 초과된 경우 (503)"""
+
+    def __init__(self, limiter_name: str, reason: str):
+        super().__init__(
+            status_code=503,
+            detail="서버가 너무 많은 요청을 처리중입니다. 잠시 후 다시 시도해주세요."
+        )
+        self.limiter_name = limiter_name
+        self.reason = reason
+
+
+class LimiterSlot:
+    """획득한 실행 슬롯 - 업스트림 응답 결과를 기록하여 제한 조정에 사용"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.latency: Optional[float] = None
+        self.overloaded = False
+        self.cancelled = False
+
+    def record_latency(self, seconds: Optional[float] = None):
+        """
+        지연 시간 기록 (스트리밍은 응답 헤더 수신 시점에 호출하여 첫 바이트까지의 시간을 사용)
+
+        기록하지 않으면 슬롯 반환 시점까지의 시간을 사용합니다.
+        """
+        if self.latency is None:
+            self.latency = seconds if seconds is not None else time.monotonic() - self.started_at
+
+    def record_status(self, status_code: int):
+        """업스트림 HTTP 상태 코드 기록 (과부하 상태 코드면 과부하 신호)"""
+        if status_code in AdaptiveConcurrencyLimiter.OVERLOAD_STATUS_CODES:
+            self.overloaded = True
+        else:
+            self.record_latency()
+
+    def record_overload(self):
+        """과부하 신호 기록 (타임아웃 등)"""
+        self.overloaded = True
+
+
+class AdaptiveConcurrencyLimiter:
+    """업스트림 지연 시간과 오류 신호로 동시 실행 수를 조정하는 제한기"""
+
+    OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+    BACKOFF_RATIO = 0.7  # 과부하 신호 시 감소 비율
+    LATENCY_BACKOFF_RATIO = 0.9  # 지연 시간 증가 시 감소 비율
+    BASELINE_DECAY = 0.01  # 기준 지연 시간이 느려진 업스트림에 맞춰 올라가는 속도
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        max_wait_seconds: float = 5.0,
+        max_queue_size: int = 100,
+        latency_tolerance: float = 2.0
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.max_wait_seconds = max_wait_seconds
+        self.max_queue_size = max_queue_size
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._inflight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease_at = 0.0
+
+        # 지표
+        self.acquired = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.overload_signals = 0
+        self.latency_signals = 0
+        self.max_waiting_seen = 0
+        self._total_wait_time = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        실행 슬롯 획득 (제한 초과 시 대기, 대기열 초과 또는 대기 시간 초과 시 ConcurrencyLimitExceeded)
+
+        사용 예:
+            async with limiter.acquire() as slot:
+                response = await client.post(...)
+                slot.record_status(response.status_code)
+        """
+        await self._acquire()
+        slot = LimiterSlot()
+        try:
+            yield slot
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            slot.record_overload()
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            # 클라이언트 연결 종료 등은 제한 조정에 반영하지 않음
+            slot.cancelled = True
+            raise
+        finally:
+            self._release(slot)
+
+    async def _acquire(self):
+        if self._inflight < self.limit and not self._waiters:
+            self._inflight += 1
+            self.acquired += 1
+            return
+
+        if self.max_queue_size >= 0 and len(self._waiters) >= self.max_queue_size:
+            self.rejected_queue_full += 1
+            logger.warning(f"[{self.name}] 동시성 대기열 초과: inflight={self._inflight}, limit={self.limit}, waiting={len(self._waiters)}")
+            raise ConcurrencyLimitExceeded(self.name, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        self.max_waiting_seen = max(self.max_waiting_seen, len(self._waiters))
+        queued_at = time.monotonic()
+
+        try:
+            await asyncio.wait({future}, timeout=self.max_wait_seconds)
+        except asyncio.CancelledError:
+            # 대기 중 취소되었는데 이미 슬롯을 넘겨받았다면 반환
+            if future.done() and not future.cancelled():
+                self._inflight -= 1
+                self._wake_waiters()
+            else:
+                future.cancel()
+                self._remove_waiter(future)
+            raise
+
+        self._total_wait_time += time.monotonic() - queued_at
+        if not future.done():
+            future.cancel()
+            self._remove_waiter(future)
+            self.rejected_timeout += 1
+            logger.warning(f"[{self.name}] 동시성 대기 시간 초과 ({self.max_wait_seconds}s): inflight={self._inflight}, limit={self.limit}")
+            raise ConcurrencyLimitExceeded(self.name, "wait_timeout")
+
+        self.acquired += 1
+
+    def _remove_waiter(self, future: asyncio.Future):
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _wake_waiters(self):
+        """제한 여유만큼 대기 중인 요청에 슬롯 전달 (FIFO)"""
+        while self._waiters and self._inflight < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self._inflight += 1
+                future.set_result(True)
+
+    def _release(self, slot: LimiterSlot):
+        self._inflight -= 1
+        if not slot.cancelled:
+            self._adjust(slot)
+        self._wake_waiters()
+
+    def _adjust(self, slot: LimiterSlot):
+        """요청 결과로 제한 조정 (AIMD)"""
+        now = time.monotonic()
+        # 마지막 감소 이전에 시작된 요청은 이미 반영된 과부하일 수 있으므로 감소에 사용하지 않음
+        can_decrease = slot.started_at >= self._last_decrease_at
+
+        if slot.overloaded:
+            self.overload_signals += 1
+            if can_decrease:
+                self._decrease(self.BACKOFF_RATIO, now, "과부하 신호")
+            return
+
+        latency = slot.latency if slot.latency is not None else now - slot.started_at
+        if self._baseline_latency is None or latency < self._baseline_latency:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency += (latency - self._baseline_latency) * self.BASELINE_DECAY
+
+        if latency > self._baseline_latency * self.latency_tolerance:
+            self.latency_signals += 1
+            if can_decrease:
+                self._decrease(self.LATENCY_BACKOFF_RATIO, now, f"지연 시간 증가 ({latency:.2f}s)")
+            return
+
+        self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    def _decrease(self, ratio: float, now: float, reason: str):
+        previous = self.limit
+        self._limit = max(float(self.min_limit), self._limit * ratio)
+        self._last_decrease_at = now
+        if self.limit != previous:
+            logger.warning(f"[{self.name}] 동시성 제한 감소 {previous} -> {self.limit}: {reason}")
+
+    def stats(self) -> Dict[str, Any]:
+        """제한기 지표 반환"""
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "inflight": self._inflight,
+            "waiting": len(self._waiters),
+            "max_waiting_seen": self.max_waiting_seen,
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "overload_signals": self.overload_signals,
+            "latency_signals": self.latency_signals,
+            "baseline_latency_ms": self._baseline_latency * 1000 if self._baseline_latency is not None else None,
+            "avg_queue_wait_ms": (self._total_wait_time / self.queued * 1000) if self.queued else 0.0,
+        }
@@ -2,12 +2,19 @@
 임베딩 관리 및 검색 서비스
 BGE 모델 사용 버전
 """
+import asyncio
 import json
 import os
 import logging
+import unicodedata
 import numpy as np
 from typing import List, Dict, Any, Tuple
-from sentence_transformers import SentenceTransformer
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services import embedding_store
+from app.services.encoder_backend import load_encoder
+from app.services.inference_executor import InferenceExecutor
+from app.services.micro_batcher import MicroBatcher
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -15,15 +22,88 @@ logger = logging.getLogger(__name__)
 class EmbeddingService:
     """임베딩 관리 및 검색 서비스"""
     
+    MODEL_NAME = "BAAI/bge-large-zh-v1.5"
+    
     _model = None
-    _embeddings = None
     _data = None
     _is_initialized = False
     _all_muscles = None  # 메타데이터에 정의된 모든 근육 목록
+    _embedding_matrix = None  # L2 정규화된 float32 임베딩 행렬 (저장소 행 = 운동)
+    _row_index = None  # 검색 행 번호 -> (근육 이름, 운동 데이터)
+    _matrix_rows = None  # 검색 행 번호 -> 임베딩 행렬 행 번호 (여러 근육에 속한 운동은 같은 행 공유)
+    _muscle_masks = None  # 근육 이름(소문자) -> 행 마스크
+    _occupation_masks = None  # 직업(소문자) -> 행 마스크
+    _no_info_mask = None  # 직업 정보(info)가 없는 근육의 행 마스크
+    _body_part_masks = None  # 신체 부위 토큰(소문자) -> 행 마스크
+    _MAX_BODY_PART_MASKS = 1024  # 신체 부위 마스크 캐시 최대 크기
+    
+    # 정규화된 쿼리 텍스트 -> 쿼리 임베딩 캐시
+    _query_cache = TTLCache(
+        max_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+        ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS
+    )
+    
+    # 모델 인코딩 전용 실행기 (이벤트 루프 블로킹 방지)
+    _inference_executor = InferenceExecutor(
+        name="embedding",
+        max_workers=settings.EMBEDDING_INFERENCE_WORKERS,
+        max_queue_size=settings.EMBEDDING_INFERENCE_MAX_QUEUE
+    )
+    _batcher = None  # 쿼리 인코딩 마이크로 배처
+    _init_task = None  # 진행 중인 초기화 태스크
+    _init_error = None  # 마지막 초기화 실패 메시지
     
     @classmethod
     async def initialize(cls):
-        """임베딩 및 데이터 초기화"""
+        """임베딩 및 데이터 초기화 (진행 중인 초기화가 있으면 완료될 때까지 대기)"""
+        if cls._is_initialized:
+            return
+        
+        # 진행 중인 초기화가 없거나 이전 초기화가 실패한 경우 새로 시작
+        if cls._init_task is None or cls._init_task.done():
+            cls._start_init_task()
+        await asyncio.shield(cls._init_task)
+    
+    @classmethod
+    def start_background_initialize(cls):
+        """백그라운드에서 임베딩 서비스 초기화 시작 (검색 외 요청은 즉시 처리 가능)"""
+        if cls._is_initialized or (cls._init_task is not None and not cls._init_task.done()):
+            return
+        cls._start_init_task()
+    
+    @classmethod
+    def _start_init_task(cls):
+        cls._init_error = None
+        cls._init_task = asyncio.get_running_loop().create_task(cls._initialize_in_thread())
+        # 백그라운드 실패 시에도 예외가 회수되도록 콜백 등록
+        cls._init_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
+    @classmethod
+    async def _initialize_in_thread(cls):
+        """데이터/임베딩/모델 로드를 이벤트 루프 밖의 스레드에서 실행"""
+        try:
+            await asyncio.to_thread(cls._load_sync)
+        except Exception as e:
+            cls._init_error = str(e)
+            raise
+    
+    @classmethod
+    def is_ready(cls) -> bool:
+        """검색 가능 여부"""
+        return cls._is_initialized
+    
+    @classmethod
+    def get_status(cls) -> Dict[str, Any]:
+        """초기화 상태 반환 (readiness 확인용)"""
+        return {
+            "ready": cls._is_initialized,
+            "loading": cls._init_task is not None and not cls._init_task.done(),
+            "error": cls._init_error
+        }
+    
+    @classmethod
+    def _load_sync(cls):
+        """데이터, 임베딩, 모델을 로드하고 검색 색인 구성 (동기)"""
         if cls._is_initialized:
             return
             
@@ -33,14 +113,6 @@ class EmbeddingService:
             # 1. 데이터 파일 경로 설정
             base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
             data_path = os.path.join(base_dir, "data", "data.json")
-            embeddings_path = os.path.join(base_dir, "data", "embeddings_bge.json")  # BGE 임베딩 파일 경로 변경
-            
-            # 기존 임베딩 파일 경로를 폴백으로 설정 (BGE 임베딩 파일이 없을 경우 기존 파일 사용)
-            if not os.path.exists(embeddings_path):
-                fallback_path = os.path.join(base_dir, "data", "embeddings.json")
-                if os.path.exists(fallback_path):
-                    logger.warning(f"BGE 임베딩 파일을 찾을 수 없어 기존 LaBSE 임베딩 파일을 사용합니다: {fallback_path}")
-                    embeddings_path = fallback_path
             
             # 2. 데이터 로드
             logger.info(f"데이터 로드 중: {data_path}")
@@ -48,16 +120,22 @@ class EmbeddingService:
                 cls._data = json.load(f)
             
             # 3. 임베딩 로드
-            logger.info(f"임베딩 로드 중: {embeddings_path}")
-            with open(embeddings_path, "r", encoding="utf-8") as f:
-                cls._embeddings = json.load(f)
+            embedding_ids, stored_matrix = cls._load_embeddings(base_dir)
             
             # 4. 모델 로드
-            logger.info("BGE 모델 로드 중...")
+            logger.info(f"BGE 모델 로드 중... (backend={settings.EMBEDDING_BACKEND})")
             # 다국어(영어+중국어) 지원 모델 사용
-            cls._model = SentenceTransformer('BAAI/bge-large-zh-v1.5')
+            cls._model = load_encoder(
+                cls.MODEL_NAME,
+                backend=settings.EMBEDDING_BACKEND,
+                onnx_file=settings.EMBEDDING_ONNX_FILE or None
+            )
+            
+            # 5. 검색용 임베딩 행렬 구성
+            cls._build_embedding_matrix(embedding_ids, stored_matrix)
+            cls._build_filter_index()
             
-            # 5. 메타데이터에서 모든 근육 목록 가져오기
+            # 6. 메타데이터에서 모든 근육 목록 가져오기
             front_muscles = cls._data['metadata'].get('front_muscles', [])
             back_muscles = cls._data['metadata'].get('back_muscles', [])
             cls._all_muscles = list(set(front_muscles + back_muscles))  # 중복 제거
@@ -71,12 +149,222 @@ class EmbeddingService:
                 logger.warning(f"다음 {len(missing_muscles)}개 근육에 대한 데이터가 없습니다: {', '.join(missing_muscles)}")
             
             cls._is_initialized = True
-            logger.info(f"임베딩 서비스 초기화 완료! 총 {len(cls._embeddings)} 개의 임베딩 로드됨")
+            logger.info(f"임베딩 서비스 초기화 완료! 총 {len(embedding_ids)} 개의 임베딩 로드됨")
             
         except Exception as e:
             logger.error(f"임베딩 서비스 초기화 실패: {str(e)}", exc_info=True)
             raise
     
+    @classmethod
+    def _load_embeddings(cls, base_dir: str) -> Tuple[List[str], np.ndarray]:
+        """
+        임베딩 저장소 로드
+        
+        바이너리 저장소(embeddings_bge.ids.json + 사이드카가 가리키는 .npy 행렬)를 읽기 전용
+        메모리 매핑으로 우선 사용하고, 없으면 JSON 파일을 파싱합니다.
+        
+        Returns:
+            (운동 ID 목록, L2 정규화된 float32 임베딩 행렬)
+        """
+        binary_base = os.path.join(base_dir, "data", "embeddings_bge")
+        if embedding_store.binary_exists(binary_base):
+            logger.info(f"바이너리 임베딩 로드 중 (mmap): {binary_base}{embedding_store.IDS_SUFFIX}")
+            return embedding_store.load_binary(binary_base, mmap=True)
+        
+        embeddings_path = os.path.join(base_dir, "data", "embeddings_bge.json")  # BGE 임베딩 파일 경로 변경
+        
+        # 기존 임베딩 파일 경로를 폴백으로 설정 (BGE 임베딩 파일이 없을 경우 기존 파일 사용)
+        if not os.path.exists(embeddings_path):
+            fallback_path = os.path.join(base_dir, "data", "embeddings.json")
+            if os.path.exists(fallback_path):
+                logger.warning(f"BGE 임베딩 파일을 찾을 수 없어 기존 LaBSE 임베딩 파일을 사용합니다: {fallback_path}")
+                embeddings_path = fallback_path
+        
+        logger.warning(f"바이너리 임베딩 저장소가 없어 JSON 임베딩을 로드합니다: {embeddings_path}")
+        return embedding_store.load_json(embeddings_path)
+    
+    @classmethod
+    def _build_embedding_matrix(cls, embedding_ids: List[str], stored_matrix: np.ndarray):
+        """
+        저장된 임베딩 행렬과 (근육, 운동) 쌍 단위 행 인덱스 구성
+
+        같은 운동이 여러 근육에 있으면 쌍마다 행을 만들고 모두 같은 저장 행을 가리킴 (행렬은 복사하지 않음)
+        """
+        stored_rows = {}
+        for row, exercise_id in enumerate(embedding_ids):
+            stored_rows.setdefault(exercise_id, row)
+        
+        row_index = []
+        matrix_rows = []
+        for muscle_name, muscle_data in cls._data.get("muscles", {}).items():
+            for i, exercise in enumerate(muscle_data.get("exercises", [])):
+                exercise_id = exercise.get("id", f"{muscle_name}_{i}")
+                if exercise_id in stored_rows:
+                    row_index.append((muscle_name, exercise))
+                    matrix_rows.append(stored_rows[exercise_id])
+        
+        unused = len(stored_rows) - len(set(matrix_rows))
+        if unused:
+            logger.warning(f"데이터에 없는 임베딩 {unused}개는 검색에서 제외됩니다")
+        
+        # 저장소 행렬은 그대로 두고(mmap 페이지 공유 유지) 검색 시 matrix_rows로 필요한 행만 모음
+        cls._embedding_matrix = stored_matrix
+        cls._matrix_rows = np.asarray(matrix_rows, dtype=np.intp)
+        cls._row_index = row_index
+        logger.info(f"임베딩 행렬 구성 완료: {stored_matrix.shape}, 검색 행 {len(row_index)}개")
+    
+    @classmethod
+    def _build_filter_index(cls):
+        """신체 부위 / 직업 필터용 역색인(행 마스크) 구성"""
+        n_rows = len(cls._row_index)
+        muscle_masks = {}
+        occupation_masks = {}
+        no_info_mask = np.zeros(n_rows, dtype=bool)
+        
+        for row, (muscle_name, _) in enumerate(cls._row_index):
+            key = muscle_name.lower()
+            if key not in muscle_masks:
+                muscle_masks[key] = np.zeros(n_rows, dtype=bool)
+            muscle_masks[key][row] = True
+            
+            # 직업 정보가 없는 근육은 직업 필터를 항상 통과
+            muscle_data = cls._data["muscles"][muscle_name]
+            if "info" not in muscle_data:
+                no_info_mask[row] = True
+                continue
+            
+            for occ in set(o.lower() for o in muscle_data["info"].get("occupations", [])):
+                if occ not in occupation_masks:
+                    occupation_masks[occ] = np.zeros(n_rows, dtype=bool)
+                occupation_masks[occ][row] = True
+        
+        cls._muscle_masks = muscle_masks
+        cls._occupation_masks = occupation_masks
+        cls._no_info_mask = no_info_mask
+        
+        # 근육 이름 자체를 신체 부위 토큰으로 미리 색인
+        cls._body_part_masks = {}
+        for muscle_key in muscle_masks:
+            cls._get_body_part_mask(muscle_key)
+        logger.info(f"필터 색인 구성 완료: 근육 {len(muscle_masks)}개, 직업 {len(occupation_masks)}개")
+    
+    @classmethod
+    def _get_body_part_mask(cls, part: str) -> np.ndarray:
+        """신체 부위 토큰의 행 마스크 조회 (색인에 없으면 계산 후 캐싱)"""
+        key = part.lower()
+        part_mask = cls._body_part_masks.get(key)
+        if part_mask is not None:
+            return part_mask
+        
+        # 부위가 이름에 포함된 근육들의 마스크 합집합
+        part_mask = np.zeros(len(cls._row_index), dtype=bool)
+        for muscle_key, muscle_mask in cls._muscle_masks.items():
+            if key in muscle_key:
+                part_mask |= muscle_mask
+        
+        if len(cls._body_part_masks) < cls._MAX_BODY_PART_MASKS:
+            cls._body_part_masks[key] = part_mask
+        return part_mask
+    
+    @classmethod
+    def get_filter_mask(cls, body_parts: List[str] = None, occupation: str = None) -> np.ndarray:
+        """
+        신체 부위 / 직업 필터에 해당하는 임베딩 행렬의 행 마스크 반환
+        
+        Args:
+            body_parts: 근육 이름에 포함되어야 하는 신체 부위 목록 (OR 조건)
+            occupation: 근육의 대상 직업 중 하나를 포함해야 하는 직업 문자열
+            
+        Returns:
+            임베딩 행렬 행 수 길이의 bool 배열
+        """
+        mask = np.ones(len(cls._row_index), dtype=bool)
+        
+        # 신체 부위 필터링 - 부위별 마스크의 합집합
+        if body_parts:
+            part_mask = np.zeros_like(mask)
+            for part in body_parts:
+                part_mask |= cls._get_body_part_mask(part)
+            mask &= part_mask
+        
+        # 직업 필터링 - 근육의 대상 직업이 입력 직업에 포함되는 경우
+        if occupation:
+            occupation = occupation.lower()
+            occ_mask = cls._no_info_mask.copy()
+            for occ, occ_rows in cls._occupation_masks.items():
+                if occ in occupation:
+                    occ_mask |= occ_rows
+            mask &= occ_mask
+        
+        return mask
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """캐시 키용 쿼리 정규화 (유니코드 NFC + 공백 정리)"""
+        return " ".join(unicodedata.normalize("NFC", query).split())
+    
+    @classmethod
+    def _encode_batch_sync(cls, texts: List[str]) -> List[np.ndarray]:
+        """모델 배치 인코딩 (동기, 추론 실행기 스레드에서 실행)"""
+        matrix = np.asarray(
+            cls._model.encode(texts, batch_size=len(texts)),
+            dtype=np.float32
+        ).reshape(len(texts), -1)
+        matrix = embedding_store.normalize_rows(matrix)
+        matrix.flags.writeable = False
+        return list(matrix)
+    
+    @classmethod
+    def _get_batcher(cls) -> MicroBatcher:
+        """쿼리 인코딩 마이크로 배처 반환 (최초 호출 시 생성)"""
+        if cls._batcher is None:
+            cls._batcher = MicroBatcher(
+                name="embedding",
+                batch_fn=cls._encode_batch_sync,
+                executor=cls._inference_executor,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+            )
+        return cls._batcher
+    
+    @classmethod
+    async def _encode_query(cls, query: str) -> np.ndarray:
+        """쿼리 임베딩 생성 (캐시 우선 조회, L2 정규화된 float32 벡터)"""
+        key = cls._normalize_query(query)
+        cached = cls._query_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # 동시 요청을 배치로 묶어 추론 실행기에서 인코딩 (다른 요청(SSE 스트림 등)을 막지 않음)
+        query_embedding = await cls._get_batcher().submit(key)
+        
+        cls._query_cache.set(key, query_embedding)
+        return query_embedding
+    
+    @classmethod
+    async def encode_query(cls, query: str) -> np.ndarray:
+        """쿼리 임베딩 조회 (search와 같은 캐시를 사용하므로 검색 직후 호출 시 추론 없음)"""
+        if not cls._is_initialized:
+            await cls.initialize()
+        return await cls._encode_query(query)
+    
+    @classmethod
+    def get_query_cache_stats(cls) -> Dict[str, Any]:
+        """쿼리 임베딩 캐시 통계 (hit/miss/eviction) 반환"""
+        return cls._query_cache.stats()
+    
+    @classmethod
+    def get_inference_stats(cls) -> Dict[str, Any]:
+        """추론 실행기 / 배처 지표 (대기열 깊이, 대기/실행 시간, 배치 크기) 반환"""
+        stats = cls._inference_executor.stats()
+        stats["batching"] = cls._get_batcher().stats()
+        return stats
+    
+    @classmethod
+    def shutdown(cls):
+        """추론 실행기 종료"""
+        cls._inference_executor.shutdown(wait=False)
+    
     @classmethod
     async def search(cls, 
                     query: str, 
@@ -98,47 +386,30 @@ class EmbeddingService:
         if not cls._is_initialized:
             await cls.initialize()
         
-        # 1. 쿼리 임베딩 생성
-        query_embedding = cls._model.encode(query)
+        # 1. 쿼리 임베딩 생성 (정규화된 float32 벡터)
+        query_embedding = await cls._encode_query(query)
         
-        # 2. 결과 저장 리스트
-        results = []
+        # 2. 필터 조건에 맞는 행 선택
+        mask = cls.get_filter_mask(body_parts, occupation)
+        candidate_rows = np.flatnonzero(mask)
         
-        # 3. 각 근육별 운동 데이터 처리
-        for muscle_name, muscle_data in cls._data.get("muscles", {}).items():
-            # 신체 부위 필터링
-            if body_parts and not any(part.lower() in muscle_name.lower() for part in body_parts):
-                continue
-            
-            # 직업 필터링
-            if occupation and "info" in muscle_data:
-                occupations = muscle_data["info"].get("occupations", [])
-                if not occupations or not any(occ.lower() in occupation.lower() for occ in occupations):
-                    continue
+        # 3. 행렬-벡터 곱으로 코사인 유사도 계산 후 상위 k개 선택
+        results = []
+        if len(candidate_rows) > 0 and top_k > 0:
+            similarities = cls._embedding_matrix[cls._matrix_rows[candidate_rows]] @ query_embedding
+            k = min(top_k, len(candidate_rows))
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top], kind="stable")]
             
-            # 운동 데이터 처리
-            for i, exercise in enumerate(muscle_data.get("exercises", [])):
-                # 고유 ID 생성
-                exercise_id = exercise.get("id", f"{muscle_name}_{i}")
-                
-                # 임베딩이 있는지 확인
-                if exercise_id in cls._embeddings:
-                    # 유사도 계산
-                    embedding = np.array(cls._embeddings[exercise_id])
-                    similarity = float(np.dot(query_embedding, embedding) / 
-                                    (np.linalg.norm(query_embedding) * np.linalg.norm(embedding)))
-                    
-                    # 결과 추가
-                    results.append({
-                        "similarity": similarity,
-                        "muscle": muscle_name,
-                        "exercise": exercise
-                    })
-        
-        # 4. 유사도 기준 정렬
-        results.sort(key=lambda x: x["similarity"], reverse=True)
+            for idx in top:
+                muscle_name, exercise = cls._row_index[candidate_rows[idx]]
+                results.append({
+                    "similarity": float(similarities[idx]),
+                    "muscle": muscle_name,
+                    "exercise": exercise
+                })
         
-        # 5. 결과가 없거나 부족한 경우 처리
+        # 4. 결과가 없거나 부족한 경우 처리
         if len(results) < top_k:
             logger.warning(f"검색 결과가 부족합니다: {len(results)}개 (요청: {top_k}개)")
             
@@ -158,7 +429,7 @@ class EmbeddingService:
                     if len(results) >= top_k:
                         break
         
-        # 6. 상위 k개 결과 반환
+        # 5. 상위 k개 결과 반환
         return results[:top_k]
     
     @classmethod
@@ -0,0 +1,222 @@
+"""
+임베딩 저장소 입출력 유틸리티
+- 바이너리 형식: float32 .npy 행렬 (읽기 전용 메모리 매핑) + 운동 ID 목록 사이드카(.ids.json)
+- 행렬은 저장할 때마다 새 세대 파일(.<세대>.npy)로 쓰고 사이드카가 그 파일을 가리킴 - 사이드카 교체가 유일한 확정 지점
+- JSON 형식: {exercise_id: [float, ...]} (가져오기/내보내기용 폴백)
+"""
+import json
+import os
+import logging
+import uuid
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+MATRIX_SUFFIX = ".npy"
+IDS_SUFFIX = ".ids.json"
+# 사이드카를 읽은 직후 이전 세대 행렬이 정리되면 다시 읽는 횟수
+LOAD_ATTEMPTS = 3
+
+
+def binary_paths(base_path: str) -> Tuple[str, str]:
+    """확장자를 제외한 기본 경로로부터 (이전 형식의 고정 .npy 경로, ID 사이드카 경로) 반환"""
+    return base_path + MATRIX_SUFFIX, base_path + IDS_SUFFIX
+
+
+def binary_exists(base_path: str) -> bool:
+    """바이너리 임베딩 저장소 존재 여부 (사이드카가 가리키는 행렬까지 확인)"""
+    matrix_path = _sidecar_matrix_path(base_path)
+    return matrix_path is not None and os.path.exists(matrix_path)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (float32, 제자리 연산)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def save_binary(base_path: str, ids: List[str], matrix: np.ndarray) -> str:
+    """
+    임베딩을 바이너리 형식으로 저장
+
+    코사인 유사도만 사용하므로 벡터는 L2 정규화된 float32로 저장합니다.
+
+    Args:
+        base_path: 확장자를 제외한 저장 경로 (예: data/embeddings_bge)
+        ids: 행 순서와 일치하는 운동 ID 목록
+        matrix: (len(ids), dim) 형태의 임베딩 행렬
+
+    Returns:
+        저장된 행렬 파일 경로
+    """
+    matrix = normalize_rows(np.array(matrix, dtype=np.float32))
+    if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+        raise ValueError(f"임베딩 행렬 크기 {matrix.shape}와 ID 수 {len(ids)}가 일치하지 않습니다")
+
+    with open(pending_matrix_path(base_path), "wb") as f:
+        np.save(f, matrix)
+    matrix_path = _publish_binary(base_path, ids, matrix.shape)
+
+    logger.info(f"바이너리 임베딩 저장 완료: {matrix_path} {matrix.shape}")
+    return matrix_path
+
+
+def _publish_binary(base_path: str, ids: List[str], shape: Tuple[int, ...]) -> str:
+    """
+    작성된 임시 행렬을 새 세대 파일로 옮기고 ID 사이드카를 교체하여 확정
+
+    행렬은 세대마다 새 파일(embeddings_bge.<세대>.npy)에 두고 사이드카가 그 파일 이름을 가리키므로,
+    사이드카 교체(os.replace 한 번)가 유일한 확정 지점입니다. 읽는 쪽은 항상 같은 세대의 ID와 행렬을 봅니다.
+    """
+    ids_path = binary_paths(base_path)[1]
+    matrix_name = f"{os.path.basename(base_path)}.{uuid.uuid4().hex[:16]}{MATRIX_SUFFIX}"
+    matrix_path = os.path.join(os.path.dirname(base_path), matrix_name)
+    previous_matrix_path = _sidecar_matrix_path(base_path)
+
+    os.replace(pending_matrix_path(base_path), matrix_path)
+    tmp_ids_path = ids_path + ".tmp"
+    with open(tmp_ids_path, "w", encoding="utf-8") as f:
+        json.dump({"matrix": matrix_name, "rows": shape[0], "dim": shape[1], "ids": list(ids)}, f, ensure_ascii=False)
+    os.replace(tmp_ids_path, ids_path)
+
+    # 이전 세대 행렬 정리 (이미 메모리 매핑한 프로세스는 열린 파일을 계속 사용)
+    if previous_matrix_path and previous_matrix_path != matrix_path:
+        try:
+            os.remove(previous_matrix_path)
+        except FileNotFoundError:
+            pass
+    return matrix_path
+
+
+def _sidecar_matrix_path(base_path: str) -> Optional[str]:
+    """현재 사이드카가 가리키는 행렬 경로 (사이드카가 없으면 None)"""
+    try:
+        sidecar = _read_sidecar(base_path)
+    except FileNotFoundError:
+        return None
+    return sidecar["matrix_path"]
+
+
+def _read_sidecar(base_path: str) -> Dict[str, Any]:
+    """ID 사이드카를 읽어 {matrix_path, ids, shape} 반환 (이전 형식은 고정 경로 행렬, 크기 정보 없음)"""
+    matrix_path, ids_path = binary_paths(base_path)
+    with open(ids_path, "r", encoding="utf-8") as f:
+        sidecar = json.load(f)
+
+    # 이전 형식: ID 목록만 저장하고 행렬은 embeddings_bge.npy
+    if isinstance(sidecar, list):
+        return {"matrix_path": matrix_path, "ids": sidecar, "shape": None}
+    return {
+        "matrix_path": os.path.join(os.path.dirname(base_path), sidecar["matrix"]),
+        "ids": sidecar["ids"],
+        "shape": (sidecar["rows"], sidecar["dim"]),
+    }
+
+
+def pending_matrix_path(base_path: str) -> str:
+    """create_binary_writer가 작성 중인 임시 행렬 경로 (다른 프로세스에서 r+ 모드로 열어 행 단위 기록)"""
+    return binary_paths(base_path)[0] + ".tmp"
+
+
+def create_binary_writer(base_path: str, rows: int, dim: int) -> np.memmap:
+    """
+    디스크에 미리 할당한 float32 행렬을 쓰기용 메모리 매핑으로 생성
+
+    전체 행렬을 메모리에 올리지 않고 행 단위로 기록할 때 사용합니다.
+    기록한 행은 L2 정규화된 상태여야 하며, 완료 후 commit_binary()로 확정합니다.
+    """
+    if rows <= 0 or dim <= 0:
+        raise ValueError(f"잘못된 임베딩 행렬 크기입니다: ({rows}, {dim})")
+    return np.lib.format.open_memmap(pending_matrix_path(base_path), mode="w+", dtype=np.float32, shape=(rows, dim))
+
+
+def commit_binary(base_path: str, ids: List[str]) -> str:
+    """create_binary_writer로 작성한 행렬을 확정하고 ID 사이드카 교체 (save_binary와 같은 방식, 행렬 파일 경로 반환)"""
+    matrix = np.load(pending_matrix_path(base_path), mmap_mode="r")
+    if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+        raise ValueError(f"임베딩 행렬 크기 {matrix.shape}와 ID 수 {len(ids)}가 일치하지 않습니다")
+    shape = matrix.shape
+    del matrix
+
+    matrix_path = _publish_binary(base_path, ids, shape)
+
+    logger.info(f"바이너리 임베딩 저장 완료: {matrix_path} {shape}")
+    return matrix_path
+
+
+def load_binary(base_path: str, mmap: bool = True) -> Tuple[List[str], np.ndarray]:
+    """
+    바이너리 임베딩 로드 (사이드카가 가리키는 세대의 행렬을 엶)
+
+    Args:
+        base_path: 확장자를 제외한 저장 경로
+        mmap: True이면 읽기 전용 메모리 매핑 (워커 간 OS 페이지 캐시 공유)
+
+    Returns:
+        (운동 ID 목록, L2 정규화된 float32 임베딩 행렬)
+
+    Raises:
+        ValueError: 행렬과 ID 사이드카가 맞지 않는 경우 (손상)
+    """
+    for attempt in range(LOAD_ATTEMPTS):
+        sidecar = _read_sidecar(base_path)
+        matrix_path, ids = sidecar["matrix_path"], sidecar["ids"]
+        try:
+            matrix = np.load(matrix_path, mmap_mode="r" if mmap else None)
+            break
+        except FileNotFoundError:
+            # 사이드카를 읽은 직후 새 세대가 확정되어 이전 행렬이 정리된 경우 - 사이드카를 다시 읽음
+            if attempt == LOAD_ATTEMPTS - 1:
+                raise
+
+    if (
+        matrix.dtype != np.float32
+        or matrix.ndim != 2
+        or matrix.shape[0] != len(ids)
+        or (sidecar["shape"] is not None and matrix.shape != sidecar["shape"])
+    ):
+        raise ValueError(f"손상된 임베딩 저장소입니다: {matrix_path} {matrix.dtype} {matrix.shape}, ID {len(ids)}개")
+
+    return ids, matrix
+
+
+def load_json(json_path: str) -> Tuple[List[str], np.ndarray]:
+    """
+    JSON 임베딩 파일 로드
+
+    Returns:
+        (운동 ID 목록, L2 정규화된 float32 임베딩 행렬)
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        embeddings: Dict[str, List[float]] = json.load(f)
+
+    ids = list(embeddings.keys())
+    if not ids:
+        return ids, np.zeros((0, 0), dtype=np.float32)
+    matrix = normalize_rows(np.array([embeddings[i] for i in ids], dtype=np.float32))
+    return ids, matrix
+
+
+def export_json(base_path: str, json_path: str):
+    """바이너리 임베딩 저장소를 JSON 형식으로 내보내기"""
+    ids, matrix = load_binary(base_path, mmap=True)
+    embeddings = {exercise_id: matrix[i].tolist() for i, exercise_id in enumerate(ids)}
+
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(embeddings, f)
+    os.replace(tmp_path, json_path)
+    logger.info(f"JSON 임베딩 내보내기 완료: {json_path} ({len(ids)}개)")
+
+
+def import_json(json_path: str, base_path: str):
+    """JSON 임베딩 파일을 바이너리 저장소로 가져오기"""
+    ids, matrix = load_json(json_path)
+    save_binary(base_path, ids, matrix)
+    return len(ids)
+
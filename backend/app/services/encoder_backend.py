@@ -0,0 +1,56 @@
+"""
+쿼리 인코더 백엔드 선택
+- torch: 기본 PyTorch 추론
+- torch-int8: PyTorch 동적 int8 양자화 (nn.Linear 레이어, CPU 전용)
+- onnx: ONNX Runtime 추론 (sentence-transformers onnx 백엔드, optimum/onnxruntime 필요)
+
+모든 백엔드는 SentenceTransformer 인스턴스를 반환하므로 encode() 호출 방식은 동일합니다.
+"""
+import logging
+from typing import Optional
+
+from sentence_transformers import SentenceTransformer
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+SUPPORTED_BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def load_encoder(model_name: str, backend: str = "torch", onnx_file: Optional[str] = None) -> SentenceTransformer:
+    """
+    지정한 백엔드로 인코더 모델 로드
+
+    Args:
+        model_name: 모델 이름 또는 경로 (예: BAAI/bge-large-zh-v1.5)
+        backend: torch / torch-int8 / onnx
+        onnx_file: onnx 백엔드에서 사용할 모델 파일 (예: onnx/model_qint8_avx512_vnni.onnx)
+
+    Returns:
+        SentenceTransformer 인스턴스
+    """
+    backend = (backend or "torch").lower()
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"지원하지 않는 인코더 백엔드입니다: {backend} (지원: {', '.join(SUPPORTED_BACKENDS)})")
+
+    logger.info(f"인코더 로드 중: {model_name} (backend={backend})")
+
+    if backend == "onnx":
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        try:
+            return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+        except ImportError as e:
+            raise RuntimeError(
+                "ONNX 백엔드를 사용하려면 'sentence-transformers[onnx]' (optimum, onnxruntime) 설치가 필요합니다"
+            ) from e
+
+    model = SentenceTransformer(model_name, device="cpu" if backend == "torch-int8" else None)
+
+    if backend == "torch-int8":
+        import torch
+
+        # Transformer의 Linear 레이어를 동적 int8 양자화 (CPU 추론 지연 시간 및 메모리 감소)
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        logger.info("동적 int8 양자화 적용 완료")
+
+    return model
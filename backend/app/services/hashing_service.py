@@ -0,0 +1,88 @@
+"""
+비밀번호 해싱/검증 실행기
+- bcrypt 해싱/검증(요청당 100~300ms CPU)을 이벤트 루프 밖의 제한된 스레드 풀에서 실행 (SSE 스트림 등 다른 요청을 막지 않음)
+- 대기열이 가득 차면 503, 같은 IP의 동시 인증 요청이 상한을 넘으면 429
+"""
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+
+from app.core.config import settings
+from app.services.inference_executor import InferenceExecutor
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """bcrypt 작업 전용 실행기와 IP별 동시 인증 요청 제한"""
+
+    _executor = InferenceExecutor(
+        name="password",
+        max_workers=settings.PASSWORD_HASH_WORKERS,
+        max_queue_size=settings.PASSWORD_HASH_MAX_QUEUE
+    )
+    _client_inflight: Dict[str, int] = {}
+    _client_rejected = 0
+
+    @classmethod
+    async def hash(cls, password: str) -> str:
+        """비밀번호 해싱"""
+        return await cls._executor.run(bcrypt.hash, password)
+
+    @classmethod
+    async def verify(cls, password: str, hashed_password: str) -> bool:
+        """비밀번호가 해시와 일치하는지 검증"""
+        return await cls._executor.run(bcrypt.verify, password, hashed_password)
+
+    @classmethod
+    @asynccontextmanager
+    async def limit_client(cls, client_ip: Optional[str]):
+        """
+        같은 IP에서 동시에 진행 중인 인증 요청 수 제한
+
+        Raises:
+            HTTPException: 상한을 넘은 경우 (429)
+        """
+        limit = settings.PASSWORD_HASH_PER_IP_MAX_CONCURRENT
+        if not client_ip or limit <= 0:
+            yield
+            return
+
+        inflight = cls._client_inflight.get(client_ip, 0)
+        if inflight >= limit:
+            cls._client_rejected += 1
+            logger.warning(f"Too many concurrent auth requests from {client_ip}: {inflight}")
+            raise HTTPException(
+                status_code=429,
+                detail="인증 요청이 너무 많습니다. 잠시 후 다시 시도해주세요."
+            )
+
+        cls._client_inflight[client_ip] = inflight + 1
+        try:
+            yield
+        finally:
+            remaining = cls._client_inflight[client_ip] - 1
+            if remaining:
+                cls._client_inflight[client_ip] = remaining
+            else:
+                del cls._client_inflight[client_ip]
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """실행기 지표 (대기열 깊이, 대기/실행 시간) 및 IP별 제한 지표 반환"""
+        stats = cls._executor.stats()
+        stats.update(
+            per_ip_max_concurrent=settings.PASSWORD_HASH_PER_IP_MAX_CONCURRENT,
+            active_clients=len(cls._client_inflight),
+            client_rejected=cls._client_rejected,
+        )
+        return stats
+
+    @classmethod
+    def shutdown(cls):
+        """스레드 풀 종료"""
+        cls._executor.shutdown(wait=False)
@@ -4,14 +4,21 @@ import logging
 from fastapi import HTTPException
 import json
 import time
-import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.sse import iter_delta_contents
 from app.schemas.user_input import UserInput
-from app.schemas.ai_response import AIResponse, StreamingAIResponse
+from app.schemas.ai_response import AIResponse, FallbackAIResponse, StreamingAIResponse
+from app.services import prompt_builder
+from app.services.circuit_breaker import BreakerCall, CircuitBreaker, CircuitOpenError
+from app.services.concurrency_limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimitExceeded, LimiterSlot
 from app.services.embedding_service import EmbeddingService
+from app.services.llm_usage import LLMUsageMetrics
+from app.services.persistence_queue import PersistenceQueue
+from app.services.response_cache import ResponseCache
+from app.services.stretching_history_service import StretchingHistoryService
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -24,8 +31,24 @@ class HelpyProService:
     API_KEY = settings.HELPY_PRO_API_KEY
     MAX_TOKENS = 2048
     
-    # 동시 요청 제어를 위한 세마포어
-    _semaphore = asyncio.Semaphore(50)  # 최대 50개의 동시 요청 허용
+    # 동시 요청 제어를 위한 적응형 동시성 제한기 (업스트림 지연 시간 / 429·5xx에 따라 제한 조정)
+    _limiter = AdaptiveConcurrencyLimiter(
+        name="helpy_pro",
+        initial_limit=settings.HELPY_PRO_CONCURRENCY_INITIAL,
+        min_limit=settings.HELPY_PRO_CONCURRENCY_MIN,
+        max_limit=settings.HELPY_PRO_CONCURRENCY_MAX,
+        max_wait_seconds=settings.LLM_CONCURRENCY_MAX_WAIT_SECONDS,
+        max_queue_size=settings.LLM_CONCURRENCY_MAX_QUEUE,
+        latency_tolerance=settings.LLM_CONCURRENCY_LATENCY_TOLERANCE
+    )
+    
+    # 장애 시 타임아웃 대기 없이 기본 응답을 제공하기 위한 서킷 브레이커
+    _breaker = CircuitBreaker(
+        name="helpy_pro",
+        failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+        recovery_seconds=settings.LLM_BREAKER_RECOVERY_SECONDS,
+        half_open_max_calls=settings.LLM_BREAKER_HALF_OPEN_MAX_CALLS
+    )
     
     # HTTP 클라이언트 풀
     _client_pool = None
@@ -48,124 +71,27 @@ class HelpyProService:
             logger.error(f"Error with HTTP client: {e}")
             raise
 
+    @classmethod
+    async def close_client(cls):
+        """공유 HTTP 클라이언트 종료 (애플리케이션 종료 시 호출)"""
+        if cls._client_pool is not None:
+            await cls._client_pool.aclose()
+            cls._client_pool = None
+
+    @classmethod
+    def get_limiter_stats(cls) -> Dict[str, Any]:
+        """동시성 제한기 지표 (현재 제한, 실행/대기 수, 거절 수) 반환"""
+        return cls._limiter.stats()
+
+    @classmethod
+    def get_breaker_stats(cls) -> Dict[str, Any]:
+        """서킷 브레이커 지표 (상태, 연속 실패 수, 거절 수) 반환"""
+        return cls._breaker.stats()
+
     @classmethod
     def _create_prompt(cls, user_input: UserInput, relevant_exercises: List[Dict[str, Any]] = None) -> str:
-        """최적화된 스트레칭 가이드 생성을 위한 프롬프트"""
-        
-        # 사용자 기본 정보 포함
-        user_data = {
-            "pain_description": user_input.pain_description,
-            "body_parts": user_input.selected_body_parts,
-            "occupation": user_input.occupation,
-            "age": getattr(user_input, "age", ""),
-            "gender": getattr(user_input, "gender", "")
-        }
-        
-        # 생활 습관 정보 추가
-        lifestyle = getattr(user_input, "lifestyle", None)
-        if lifestyle:
-            # Convert LifestylePattern object to dictionary
-            if hasattr(lifestyle, "model_dump"):
-                user_data["lifestyle"] = lifestyle.model_dump()
-            elif hasattr(lifestyle, "__dict__"):
-                user_data["lifestyle"] = lifestyle.__dict__
-            else:
-                # Manually extract attributes if needed
-                user_data["lifestyle"] = {
-                    "work_hours": getattr(lifestyle, "work_hours", 0),
-                    "sitting_hours": getattr(lifestyle, "sitting_hours", 0),
-                    "exercise_frequency": getattr(lifestyle, "exercise_frequency", 0),
-                    "sleep_hours": getattr(lifestyle, "sleep_hours", 0)
-                }
-        
-        # 관련 스트레칭 정보 및 메타데이터 추출
-        exercises_data = []
-        if relevant_exercises and len(relevant_exercises) > 0:
-            for item in relevant_exercises:
-                exercise = item["exercise"]
-                muscle = item["muscle"]
-                similarity = item.get("similarity", 0)
-                
-                # URL 정보 추출
-                source_url = ""
-                if exercise.get("evidence") and exercise["evidence"].get("url"):
-                    source_url = exercise["evidence"]["url"]
-                
-                # 기본 정보
-                exercise_info = {
-                    "title": exercise.get("title", "정보 없음"),
-                    "muscle": muscle,
-                    "similarity": f"{similarity:.2f}",
-                    "source_url": source_url,
-                    "steps": []
-                }
-                
-                # 메타데이터 최대한 활용
-                enhanced = exercise.get("enhanced_metadata", {})
-                
-                # 스트레칭 상세 정보
-                stretching_details = enhanced.get("스트레칭_상세화", {})
-                if stretching_details:
-                    # 동작 단계
-                    steps = stretching_details.get("동작_단계", [])
-                    if steps:
-                        exercise_info["steps"] = steps
-                    
-                    # 호흡 패턴
-                    breathing = stretching_details.get("호흡_패턴", [])
-                    if breathing:
-                        exercise_info["breathing"] = breathing
-                    
-                    # 느껴야 할 감각
-                    feeling = stretching_details.get("느껴야_할_감각", "")
-                    if feeling:
-                        exercise_info["feeling"] = feeling
-                    
-                    # 반복 횟수 및 시간
-                    repetition = stretching_details.get("반복_횟수_및_시간", "")
-                    if repetition:
-                        exercise_info["repetition"] = repetition
-                
-                # 효과 정보
-                effects = enhanced.get("효과_및_이점", {})
-                if effects:
-                    exercise_info["effects"] = effects
-                
-                # 안전 및 주의사항
-                safety = enhanced.get("안전_및_주의사항", {})
-                if safety:
-                    exercise_info["safety"] = safety
-                
-                # 학술적 근거
-                scientific_basis = enhanced.get("학술적_근거", {})
-                if scientific_basis:
-                    exercise_info["scientific_basis"] = scientific_basis
-                
-                exercises_data.append(exercise_info)
-        
-        # 최종 프롬프트 구성 (JSON 형식)
-        prompt_data = {
-            "user": user_data,
-            "exercises": exercises_data,
-            "instructions": {
-                "format": {
-                    "analysis": ["상태", "위험", "개선점"],
-                    "guide": ["스트레칭", "생활수칙", "주의사항"],
-                    "references": "참고 자료 및 출처"
-                },
-                "requirements": [
-                    "제공된 메타데이터를 최대한 활용하여 상세한 스트레칭 가이드를 작성하세요.",
-                    "학술적 근거가 있는 경우 포함하고 출처를 명시하세요.",
-                    "필요한 경우 Google 검색 기능을 사용하여 추가 정보를 찾으세요.",
-                    "사용자의 상태, 직업, 생활 습관을 고려한 맞춤형 가이드를 제공하세요.",
-                    "각 스트레칭 동작에 대해 단계별 지침, 호흡법, 반복 횟수를 명확히 설명하세요.",
-                    "참고 자료 섹션에는 실제 URL이 있는 경우에만 포함하세요. URL이 없는 경우 출처 링크 필요와 같은 텍스트를 사용하지 말고, 해당 참고 자료는 생략하세요."
-                ]
-            }
-        }
-        
-        # JSON 문자열로 변환
-        return json.dumps(prompt_data, ensure_ascii=False)
+        """최적화된 스트레칭 가이드 생성을 위한 프롬프트 (정적 부분 사전 직렬화 + 운동별 조각 캐시 + 토큰 예산)"""
+        return prompt_builder.build_stretching_prompt(user_input, relevant_exercises)
 
     @classmethod
     async def generate_stretching_guide(
@@ -193,8 +119,8 @@ class HelpyProService:
                 for i, exercise in enumerate(relevant_exercises):
                     logger.debug(f"검색 결과 {i+1}: {exercise.get('exercise', {}).get('title', '제목 없음')} - 유사도: {exercise.get('similarity', 0)}")
             
-            # 세마포어를 사용하여 동시 요청 제어
-            async with cls._semaphore:
+            # 서킷이 열려 있으면 즉시 기본 응답, 아니면 동시성 제한기로 동시 요청 제어
+            async with cls._breaker.guard() as call, cls._limiter.acquire() as slot:
                 logger.info(f"Generating stretching guide for session_id: {session_id}")
                 
                 # 프롬프트 생성 - 최적화된 프롬프트 메서드 사용
@@ -212,7 +138,9 @@ class HelpyProService:
                 response = await cls._get_api_response(
                     session_id=session_id,
                     prompt=prompt,
-                    headers=headers
+                    headers=headers,
+                    slot=slot,
+                    breaker_call=call
                 )
                 
                 # 상세 로깅 추가
@@ -262,12 +190,12 @@ class HelpyProService:
                 logger.info("API 응답이 성공적으로 생성되었습니다.")
                 return AIResponse(text=response)
                 
-        except asyncio.TimeoutError:
-            logger.error("Request timed out due to semaphore limit")
-            raise HTTPException(
-                status_code=503,
-                detail="서버가 너무 많은 요청을 처리중입니다. 잠시 후 다시 시도해주세요."
-            )
+        except CircuitOpenError:
+            logger.warning(f"Circuit open, returning default response for session: {session_id}")
+            return AIResponse(text=cls._generate_default_response(user_input))
+        except ConcurrencyLimitExceeded as e:
+            logger.error(f"Request rejected by concurrency limiter: {e.reason}")
+            raise
         except Exception as e:
             logger.error(f"Error in generate_stretching_guide: {str(e)}", exc_info=True)
             # 예외 발생 시에도 기본 응답 제공
@@ -309,76 +237,33 @@ class HelpyProService:
         cls,
         session_id: str,
         prompt: str,
-        headers: dict
+        headers: dict,
+        slot: Optional[LimiterSlot] = None,
+        breaker_call: Optional[BreakerCall] = None
     ) -> str:
-        """단일 API 요청 처리"""
-        # 캐시 방지를 위한 타임스탬프 추가
-        cache_buster = str(int(time.time()))
-        
+        """단일 API 요청 처리 (slot/breaker_call이 주어지면 응답 상태/타임아웃을 동시성 제한기와 서킷 브레이커에 기록)"""
+        # 제공자 측 프롬프트 캐시가 적중하도록 고정 시스템 프롬프트 -> 운동 정보 -> 사용자 데이터 순으로 전송 (타임스탬프 없음)
         request_data = {
             "model": "helpy-pro",
-            "sess_id": f"{session_id}_{cache_buster}",  # 캐시 방지를 위한 세션 ID 수정
+            "sess_id": session_id,
             "temperature": 0.3,  # 온도를 낮게 유지하여 일관된 응답 생성
             "max_tokens": 1500,  # 토큰 수 유지
             "messages": [
                 {
                     "role": "system",
-                    "content": """당신은 스트레칭 전문가이자 물리치료사입니다. 
-JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를 활용해 분석과 가이드를 제공하세요.
-
-다음 원칙을 따라주세요:
-1. 제공된 메타데이터를 최대한 활용하여 상세하고 정확한 스트레칭 가이드를 작성하세요.
-2. 학술적 근거가 있는 경우 반드시 포함하고 출처를 명시하세요.
-3. 사용자의 상태, 직업, 생활 습관을 고려한 맞춤형 가이드를 제공하세요.
-4. 각 스트레칭 동작에 대해 단계별 지침, 호흡법, 반복 횟수를 명확히 설명하세요.
-5. 필요한 경우 Google 검색 기능을 사용하여 추가 정보를 찾으세요
-6. 참고 자료 섹션에는 실제 URL이 있는 경우에만 포함하세요. URL이 없는 경우 "[출처 링크 필요]"와 같은 텍스트를 사용하지 말고, 해당 참고 자료는 생략하세요.
-7. 모든 응답은 한국어로만 작성하세요. 영어 용어(예: 'effects', 'scientific basis' 등)를 사용하지 마세요.
-8. 논문 제목이나 출처 정보에서 영어 부분은 제거하거나 한국어로 간략하게 요약하세요.
-
-응답 형식:
-[분석]
-- 상태: (사용자의 현재 상태 분석)
-- 위험: (지속될 경우의 위험 요소)
-- 개선점: (개선을 위한 방향)
-
-[가이드]
-- 스트레칭: (구체적인 스트레칭 방법 3-5개)
-- 생활수칙: (일상생활에서의 개선 방법)
-- 주의사항: (스트레칭 시 주의할 점)
-
-[참고 자료]
-- (실제 URL이 있는 학술 자료만 포함, URL이 없는 경우 생략)"""
+                    "content": prompt_builder.STRETCHING_SYSTEM_PROMPT_WITH_SEARCH
                 },
                 {
                     "role": "user",
-                    "content": f"{prompt}\n\n(timestamp: {cache_buster})"  # 캐시 방지를 위한 타임스탬프 추가
-                }
-            ],
-            "tools": [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "search_google_for_query",
-                        "description": "Search Google for additional information about stretching exercises, medical conditions, or scientific evidence",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "query": {
-                                    "type": "string",
-                                    "description": "The search query"
-                                }
-                            },
-                            "required": ["query"]
-                        }
-                    }
+                    "content": prompt
                 }
             ],
+            "tools": prompt_builder.SEARCH_TOOLS,
             "response_format": {"type": "text"}  # 명시적으로 텍스트 응답 형식 지정
         }
 
         try:
-            logger.info(f"Starting API request for session: {session_id} with cache buster: {cache_buster}")
+            logger.info(f"Starting API request for session: {session_id}")
             start_time = time.time()
             
             # API 키가 비어있는지 확인
@@ -417,7 +302,7 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                 try:
                     # 명시적 타임아웃 설정 (45초)
                     response = await client.post(
-                        f"{cls.API_URL}/v1/chat/completions?cache_buster={cache_buster}", 
+                        f"{cls.API_URL}/v1/chat/completions",
                         json=request_data,
                         headers=api_headers,
                         timeout=45.0
@@ -425,6 +310,10 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                     
                     elapsed_time = time.time() - start_time
                     logger.info(f"API response received in {elapsed_time:.2f} seconds with status code: {response.status_code}")
+                    if slot:
+                        slot.record_status(response.status_code)
+                    if breaker_call:
+                        breaker_call.record_status(response.status_code)
                     
                     # 응답 헤더 로깅
                     logger.debug(f"Response headers: {dict(response.headers)}")
@@ -433,6 +322,7 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                         try:
                             response_data = response.json()
                             logger.debug(f"Response structure: {list(response_data.keys())}")
+                            LLMUsageMetrics.record("helpy_pro", response_data.get("usage"))
                             
                             if "choices" not in response_data or not response_data["choices"]:
                                 logger.error("No choices in response data")
@@ -466,10 +356,6 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                                 logger.warning(f"Response format validation failed. Response does not start with expected format.")
                                 logger.warning(f"Response starts with: {content[:50]}...")
                             
-                            # 타임스탬프 제거 (응답에 포함되었을 경우)
-                            if f"timestamp: {cache_buster}" in content:
-                                content = content.replace(f"timestamp: {cache_buster}", "").strip()
-                            
                             logger.debug(f"Response content length: {len(content)}")
                             return content
                         
@@ -493,16 +379,30 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                 
                 except httpx.ReadTimeout:
                     logger.error("API request read timeout")
+                    if slot:
+                        slot.record_overload()
+                    if breaker_call:
+                        breaker_call.record_failure()
                     return "API 응답 대기 시간이 초과되었습니다. 다시 시도해주세요."
                 except httpx.ConnectTimeout:
                     logger.error("API connection timeout")
+                    if slot:
+                        slot.record_overload()
+                    if breaker_call:
+                        breaker_call.record_failure()
                     return "API 연결 시간이 초과되었습니다. 다시 시도해주세요."
                 except httpx.RequestError as e:
                     logger.error(f"Request error: {str(e)}")
+                    if breaker_call and isinstance(e, httpx.TransportError):
+                        breaker_call.record_failure()
                     return f"API 요청 오류: {str(e)}. 다시 시도해주세요."
 
         except httpx.TimeoutException:
             logger.error("API request timed out")
+            if slot:
+                slot.record_overload()
+            if breaker_call:
+                breaker_call.record_failure()
             return "API 요청 시간이 초과되었습니다. 다시 시도해주세요."
         except Exception as e:
             logger.error(f"Error: {str(e)}")
@@ -511,6 +411,48 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
             logger.error(f"Traceback: {traceback.format_exc()}")
             return "오류가 발생했습니다. 다시 시도해주세요."
 
+    @classmethod
+    async def _save_streamed_response(
+        cls,
+        session_id: str,
+        stretching_id: str,
+        user_input: UserInput,
+        full_response: str,
+        temp_session_service = None,
+        user_service = None,
+        current_user = None
+    ):
+        """스트리밍 완료된 응답을 임시 세션 및 사용자 히스토리에 저장 (쓰기 지연 큐에 제출 - MongoDB 저장을 기다리지 않음)"""
+        # 임시 세션에 AI 응답 저장
+        if temp_session_service:
+            logger.info("Queueing stretching AI response update for temp session")
+            await temp_session_service.enqueue_stretching_ai_response(
+                session_id=session_id,
+                stretching_id=stretching_id,
+                ai_response=full_response
+            )
+        
+        # 로그인한 사용자의 경우 히스토리에도 저장
+        if current_user and user_service:
+            logger.info(f"Saving stretching session to user history: {current_user.id}")
+            # 완성된 스트레칭 세션 객체 생성
+            from app.schemas.session import StretchingSession
+            stretching_session = StretchingSession(
+                id=stretching_id,
+                created_at=datetime.utcnow(),
+                user_input=user_input,
+                ai_response=full_response
+            )
+            
+            # 사용자 히스토리에 저장 (UserService.add_stretching_session은 예외를 삼키므로 저장소를 직접 호출 -
+            # 실패 시 큐가 재시도하며, (user_id, id) 기준 upsert라 재시도해도 중복 저장되지 않음)
+            user_id = current_user.id
+            session_data = stretching_session.model_dump()
+            await PersistenceQueue.submit_call(
+                "user_stretching_history",
+                lambda: StretchingHistoryService.add_session(user_id, session_data)
+            )
+
     @classmethod
     async def generate_stretching_guide_stream(
         cls, 
@@ -533,8 +475,25 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
             default_response = cls._generate_default_response(user_input)
             default_first_line = default_response.split('\n')[0] if default_response else ""
             
-            # 캐시 방지를 위한 타임스탬프 추가
-            cache_buster = str(int(time.time()))
+            # 응답 캐시 조회 (적중 시 API 호출 없이 저장된 응답을 같은 청크 형식으로 재생)
+            cached_response = await ResponseCache.lookup("helpy_pro", user_input, relevant_exercises)
+            if cached_response is not None:
+                async for chunk in ResponseCache.replay(cached_response):
+                    yield chunk
+                await cls._save_streamed_response(
+                    session_id=session_id,
+                    stretching_id=stretching_id,
+                    user_input=user_input,
+                    full_response=cached_response,
+                    temp_session_service=temp_session_service,
+                    user_service=user_service,
+                    current_user=current_user
+                )
+                yield StreamingAIResponse(
+                    content="",
+                    done=True
+                )
+                return
             
             # 헤더 설정 - 일반 API 요청과 동일하게 설정
             api_headers = {
@@ -546,82 +505,39 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                 "Expires": "0"
             }
             
-            # 세마포어를 사용하여 동시 요청 제한
-            async with cls._semaphore:
-                logger.info(f"Acquired semaphore for session: {session_id}")
+            # 서킷이 열려 있거나 동시성 제한 대기 시간을 초과하면 기본 응답
+            async with cls._breaker.guard() as call, cls._limiter.acquire() as slot:
+                logger.info(f"Acquired concurrency slot for session: {session_id}")
                 
-                # API 요청 데이터 준비
+                # API 요청 데이터 준비 (고정 시스템 프롬프트 -> 운동 정보 -> 사용자 데이터 순, 타임스탬프 없음)
                 request_data = {
                     "model": "helpy-pro",
-                    "sess_id": f"{session_id}_{cache_buster}",
+                    "sess_id": session_id,
                     "temperature": 0.3,
                     "max_tokens": 1500,
                     "stream": True,  # 스트리밍 활성화
                     "messages": [
                         {
                             "role": "system",
-                            "content": """당신은 스트레칭 전문가이자 물리치료사입니다. 
-JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를 활용해 분석과 가이드를 제공하세요.
-
-다음 원칙을 따라주세요:
-1. 제공된 메타데이터를 최대한 활용하여 상세하고 정확한 스트레칭 가이드를 작성하세요.
-2. 학술적 근거가 있는 경우 반드시 포함하고 출처를 명시하세요.
-3. 사용자의 상태, 직업, 생활 습관을 고려한 맞춤형 가이드를 제공하세요.
-4. 각 스트레칭 동작에 대해 단계별 지침, 호흡법, 반복 횟수를 명확히 설명하세요.
-5. 필요한 경우 Google 검색 기능을 사용하여 추가 정보를 찾으세요.
-6. 참고 자료 섹션에는 실제 URL이 있는 경우에만 포함하세요. URL이 없는 경우 출처 링크 필요와 같은 텍스트를 사용하지 말고, 해당 참고 자료는 생략하세요.
-7. 모든 응답은 한국어로만 작성하세요. 영어 용어(예: 'effects', 'scientific basis' 등)를 사용하지 마세요.
-8. 논문 제목이나 출처 정보에서 영어 부분은 제거하거나 한국어로 간략하게 요약하세요.
-
-응답 형식:
-[분석]
-- 상태: (사용자의 현재 상태 분석)
-- 위험: (지속될 경우의 위험 요소)
-- 개선점: (개선을 위한 방향)
-
-[가이드]
-- 스트레칭: (구체적인 스트레칭 방법 3-5개)
-- 생활수칙: (일상생활에서의 개선 방법)
-- 주의사항: (스트레칭 시 주의할 점)
-
-[참고 자료]
-- (실제 URL이 있는 학술 자료만 포함, URL이 없는 경우 생략)"""
+                            "content": prompt_builder.STRETCHING_SYSTEM_PROMPT_WITH_SEARCH
                         },
                         {
                             "role": "user",
-                            "content": f"{prompt}\n\n(timestamp: {cache_buster})"
-                        }
-                    ],
-                    "tools": [
-                        {
-                            "type": "function",
-                            "function": {
-                                "name": "search_google_for_query",
-                                "description": "Search Google for additional information about stretching exercises, medical conditions, or scientific evidence",
-                                "parameters": {
-                                    "type": "object",
-                                    "properties": {
-                                        "query": {
-                                            "type": "string",
-                                            "description": "The search query"
-                                        }
-                                    },
-                                    "required": ["query"]
-                                }
-                            }
+                            "content": prompt
                         }
                     ],
+                    "tools": prompt_builder.SEARCH_TOOLS,
                     "response_format": {"type": "text"}
                 }
                 
                 # API 키가 비어있는지 확인
                 if not cls.API_KEY:
                     logger.error("API key is empty")
-                    yield StreamingAIResponse(
+                    yield FallbackAIResponse(
                         content=default_first_line,
                         done=False
                     )
-                    yield StreamingAIResponse(
+                    yield FallbackAIResponse(
                         content=default_response[len(default_first_line):],
                         done=True
                     )
@@ -635,7 +551,7 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                         
                         try:
                             # URL 형식을 일반 API 요청과 동일하게 설정
-                            stream_url = f"{cls.API_URL}/v1/chat/completions?cache_buster={cache_buster}"
+                            stream_url = f"{cls.API_URL}/v1/chat/completions"
                             logger.debug(f"Streaming API URL: {stream_url}")
                             
                             async with client.stream(
@@ -644,57 +560,38 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                                 json=request_data,
                                 headers=api_headers
                             ) as response:
-                                # 응답 상태 코드 확인
+                                # 응답 상태 코드 확인 (헤더 수신까지의 지연 시간 기록)
+                                slot.record_status(response.status_code)
+                                call.record_status(response.status_code)
                                 if response.status_code != 200:
                                     error_text = await response.aread()
                                     error_text = error_text.decode('utf-8')
                                     logger.error(f"API error: {response.status_code}, {error_text}")
-                                    yield StreamingAIResponse(
+                                    yield FallbackAIResponse(
                                         content=default_first_line,
                                         done=False
                                     )
-                                    yield StreamingAIResponse(
+                                    yield FallbackAIResponse(
                                         content=default_response[len(default_first_line):],
                                         done=True
                                     )
                                     return
                                 
-                                # 스트리밍 응답 처리
-                                full_response = ""
-                                async for line in response.aiter_lines():
-                                    if not line or line.strip() == "":
-                                        continue
-                                        
-                                    if line.startswith("data: "):
-                                        line = line[6:]  # "data: " 제거
-                                        
-                                    if line == "[DONE]":
-                                        logger.debug("스트리밍 완료 신호 [DONE] 수신")
-                                        break
-                                        
-                                    try:
-                                        # JSON 파싱
-                                        logger.debug(f"파싱 시도: {line[:100]}...")
-                                        data = json.loads(line)
-                                        
-                                        # 콘텐츠 추출
-                                        delta = data.get("choices", [{}])[0].get("delta", {})
-                                        content = delta.get("content", "")
-                                        
-                                        if content:
-                                            logger.debug(f"스트리밍 콘텐츠 추가 (길이: {len(content)}): {content[:50]}...")
-                                            full_response += content
-                                            yield StreamingAIResponse(
-                                                content=content,
-                                                done=False
-                                            )
-                                            logger.debug("StreamingAIResponse 객체 전송 완료")
-                                    except json.JSONDecodeError:
-                                        logger.warning(f"Failed to parse JSON: {line}")
-                                        continue
+                                # 스트리밍 응답 처리 (조각은 리스트에 모아 마지막에 한 번만 결합)
+                                response_parts = []
+                                usage = {}
+                                async for content in iter_delta_contents(response.aiter_lines(), usage):
+                                    response_parts.append(content)
+                                    yield StreamingAIResponse.model_construct(content=content, done=False)
+                                full_response = "".join(response_parts)
+                                LLMUsageMetrics.record("helpy_pro", usage)
                         except httpx.RequestError as e:
                             logger.error(f"HTTP request error: {str(e)}")
-                            yield StreamingAIResponse(
+                            if isinstance(e, httpx.TimeoutException):
+                                slot.record_overload()
+                            if isinstance(e, httpx.TransportError):
+                                call.record_failure()
+                            yield FallbackAIResponse(
                                 content=default_response,
                                 done=True
                             )
@@ -706,32 +603,19 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                             logger.debug(f"Full response length: {len(full_response)}")
                             logger.debug(f"Full response preview: {full_response[:200]}...")
                             
-                            # 임시 세션에 AI 응답 저장
-                            if temp_session_service:
-                                logger.info("Updating stretching AI response in temp session")
-                                await temp_session_service.update_stretching_ai_response(
-                                    session_id=session_id,
-                                    stretching_id=stretching_id,
-                                    ai_response=full_response
-                                )
+                            # 임시 세션 및 사용자 히스토리에 저장
+                            await cls._save_streamed_response(
+                                session_id=session_id,
+                                stretching_id=stretching_id,
+                                user_input=user_input,
+                                full_response=full_response,
+                                temp_session_service=temp_session_service,
+                                user_service=user_service,
+                                current_user=current_user
+                            )
                             
-                            # 로그인한 사용자의 경우 히스토리에도 저장
-                            if current_user and user_service:
-                                logger.info(f"Saving stretching session to user history: {current_user.id}")
-                                # 완성된 스트레칭 세션 객체 생성
-                                from app.schemas.session import StretchingSession
-                                stretching_session = StretchingSession(
-                                    id=stretching_id,
-                                    created_at=datetime.utcnow(),
-                                    user_input=user_input,
-                                    ai_response=full_response
-                                )
-                                
-                                # 사용자 히스토리에 저장
-                                await user_service.add_stretching_session(
-                                    user_id=current_user.id,
-                                    stretching_session=stretching_session.model_dump()
-                                )
+                            # 응답 캐시에 저장
+                            await ResponseCache.store("helpy_pro", user_input, relevant_exercises, full_response)
                             
                             # 완료 신호 전송
                             logger.debug("Sending final done signal")
@@ -742,21 +626,33 @@ JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를
                             logger.debug("Stream completed successfully")
                         else:
                             logger.warning(f"Empty response for session: {session_id}")
-                            yield StreamingAIResponse(
+                            yield FallbackAIResponse(
                                 content=default_response,
                                 done=True
                             )
                             
                 except Exception as e:
                     logger.error(f"API request error: {str(e)}")
-                    yield StreamingAIResponse(
+                    yield FallbackAIResponse(
                         content=default_response,
                         done=True
                     )
                 
+        except CircuitOpenError:
+            logger.warning(f"Circuit open, returning default response for session: {session_id}")
+            yield FallbackAIResponse(
+                content=default_response,
+                done=True
+            )
+        except ConcurrencyLimitExceeded as e:
+            logger.warning(f"Concurrency limit exceeded ({e.reason}), returning default response for session: {session_id}")
+            yield FallbackAIResponse(
+                content=default_response,
+                done=True
+            )
         except Exception as e:
             logger.error(f"Error in generate_stretching_guide_stream: {str(e)}")
-            yield StreamingAIResponse(
+            yield FallbackAIResponse(
                 content="오류가 발생했습니다. 다시 시도해주세요.",
                 done=True
             ) 
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+모델 추론 전용 실행기
+- 동기 추론 함수(SentenceTransformer.encode 등)를 이벤트 루프 밖의 제한된 스레드 풀에서 실행
+- 대기열 깊이 제한 및 대기/실행 시간 지표 제공
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """동시 실행 수와 대기열 깊이가 제한된 추론 실행기"""
+
+    def __init__(self, name: str, max_workers: int = 1, max_queue_size: int = 64):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max_queue_size
+        self._executor = None
+
+        # 지표
+        self.pending = 0  # 대기 중 + 실행 중
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_pending_seen = 0
+        self._total_wait_time = 0.0
+        self._total_run_time = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f"{self.name}-inference"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        추론 함수를 스레드 풀에서 실행하고 결과를 반환
+
+        Raises:
+            HTTPException: 대기열이 가득 찬 경우 (503)
+        """
+        if self.max_queue_size > 0 and self.pending >= self.max_queue_size:
+            self.rejected += 1
+            logger.warning(f"[{self.name}] 추론 대기열 초과: pending={self.pending}, max={self.max_queue_size}")
+            raise HTTPException(
+                status_code=503,
+                detail="서버가 너무 많은 요청을 처리중입니다. 잠시 후 다시 시도해주세요."
+            )
+
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        submitted_at = time.perf_counter()
+
+        def _call():
+            started_at = time.perf_counter()
+            self._total_wait_time += started_at - submitted_at
+            self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.running -= 1
+                self._total_run_time += time.perf_counter() - started_at
+
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), _call)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """실행기 지표 반환"""
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "pending": self.pending,
+            "running": self.running,
+            "queued": max(0, self.pending - self.running),
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": (self._total_wait_time / finished * 1000) if finished else 0.0,
+            "avg_run_ms": (self._total_run_time / finished * 1000) if finished else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """스레드 풀 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,58 @@
+"""
+LLM 토큰 사용량 지표 (제공자별)
+- 응답의 usage 페이로드에서 입력/출력 토큰과 제공자 측 프롬프트 캐시에 적중한 입력 토큰 수를 집계
+- 캐시 적중 토큰은 OpenAI 형식(prompt_tokens_details.cached_tokens)과 prompt_cache_hit_tokens 형식을 지원
+"""
+import logging
+from typing import Any, Dict, Optional
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageMetrics:
+    """제공자별 토큰 사용량 및 프롬프트 캐시 적중 지표"""
+
+    _providers: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _cached_tokens(usage: Dict[str, Any]) -> int:
+        details = usage.get("prompt_tokens_details") or {}
+        return int(details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0)
+
+    @classmethod
+    def record(cls, provider: str, usage: Optional[Dict[str, Any]]):
+        """usage 페이로드 기록 (없으면 usage 누락 요청 수만 증가)"""
+        metrics = cls._providers.setdefault(provider, {
+            "requests": 0,
+            "requests_without_usage": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "completion_tokens": 0,
+            "requests_with_cache_hit": 0,
+        })
+        metrics["requests"] += 1
+        if not usage:
+            metrics["requests_without_usage"] += 1
+            return
+
+        cached_tokens = cls._cached_tokens(usage)
+        metrics["prompt_tokens"] += int(usage.get("prompt_tokens") or 0)
+        metrics["cached_prompt_tokens"] += cached_tokens
+        metrics["completion_tokens"] += int(usage.get("completion_tokens") or 0)
+        if cached_tokens:
+            metrics["requests_with_cache_hit"] += 1
+        logger.debug(f"[{provider}] usage: prompt={usage.get('prompt_tokens')}, cached={cached_tokens}, completion={usage.get('completion_tokens')}")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """제공자별 지표 반환 (cached_prompt_ratio: 입력 토큰 중 캐시 적중 비율)"""
+        result = {}
+        for provider, metrics in cls._providers.items():
+            result[provider] = dict(
+                metrics,
+                cached_prompt_ratio=(
+                    metrics["cached_prompt_tokens"] / metrics["prompt_tokens"] if metrics["prompt_tokens"] else 0.0
+                )
+            )
+        return result
@@ -0,0 +1,128 @@
+"""
+동시 추론 요청을 묶어서 처리하는 마이크로 배처
+- 최대 대기 시간(ms) 동안 또는 최대 배치 크기에 도달할 때까지 요청을 모아 한 번의 배치 추론으로 처리
+- 배치 내 중복 입력은 한 번만 추론
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.services.inference_executor import InferenceExecutor
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """요청을 짧은 시간 동안 모아 배치 함수 한 번으로 처리하는 배처"""
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        executor: InferenceExecutor,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 실행 중인 배치 태스크 (이벤트 루프는 약한 참조만 유지하므로 끝날 때까지 참조를 보관)
+        self._tasks: Set[asyncio.Task] = set()
+
+        # 지표
+        self.batches = 0
+        self.items = 0
+        self.deduplicated = 0
+        self.max_batch_seen = 0
+        self._total_batch_time = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        """항목을 배치 대기열에 추가하고 해당 항목의 결과를 기다림"""
+        # 배치 크기 1이면 배칭 없이 바로 실행
+        if self.max_batch_size == 1:
+            results = await self.executor.run(self.batch_fn, [item])
+            self._record_batch(1, 0, 0.0)
+            return results[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """대기 중인 항목을 배치로 묶어 실행"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """배치 추론 실행 후 각 요청의 future에 결과 전달"""
+        # 취소된 요청 제외 및 중복 입력 제거
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        unique_items = []
+        positions: Dict[Any, int] = {}
+        for item, _ in batch:
+            if item not in positions:
+                positions[item] = len(unique_items)
+                unique_items.append(item)
+
+        started_at = time.perf_counter()
+        try:
+            results = await self.executor.run(self.batch_fn, unique_items)
+        except Exception as e:
+            logger.error(f"[{self.name}] 배치 추론 실패 (batch={len(unique_items)}): {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._record_batch(len(batch), len(batch) - len(unique_items), time.perf_counter() - started_at)
+        for item, future in batch:
+            if not future.done():
+                future.set_result(results[positions[item]])
+
+    def _record_batch(self, size: int, deduplicated: int, elapsed: float):
+        self.batches += 1
+        self.items += size
+        self.deduplicated += deduplicated
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self._total_batch_time += elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """배처 지표 반환"""
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "waiting": len(self._pending),
+            "running_batches": len(self._tasks),
+            "batches": self.batches,
+            "items": self.items,
+            "deduplicated": self.deduplicated,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "avg_batch_ms": (self._total_batch_time / self.batches * 1000) if self.batches else 0.0,
+        }
@@ -0,0 +1,263 @@
+"""
+MongoDB 쓰기 지연(write-behind) 큐
+- 스트리밍 완료 후의 저장 작업(임시 세션 AI 응답, ai_requests 기록, 사용자 히스토리)을 백그라운드 워커가 처리하여 응답 완료가 MongoDB를 기다리지 않음
+- 같은 컬렉션의 insert는 insert_many, update는 bulk_write(제출 순서대로 적용)로 묶어서 왕복 횟수를 줄임
+- 실패한 배치는 지수 백오프로 재시도 (insert 문서는 제출 시 _id를 미리 부여하므로 재시도해도 중복 저장되지 않음)
+- 큐가 가득 차면 제출 측이 빈 자리를 기다림(백프레셔), 대기 시간 초과 시 직접 저장
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.database import MongoManager
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 중복 키 오류 코드 (재시도 시 이미 저장된 문서)
+DUPLICATE_KEY_ERROR = 11000
+
+
+class _Job:
+    """큐에 들어가는 저장 작업 하나"""
+
+    INSERT = "insert"
+    UPDATE = "update"
+    CALL = "call"
+
+    __slots__ = ("kind", "target", "payload", "enqueued_at")
+
+    def __init__(self, kind: str, target: str, payload: Any):
+        self.kind = kind
+        self.target = target  # insert/update: 컬렉션 이름, call: 작업 이름
+        self.payload = payload
+        self.enqueued_at = time.monotonic()
+
+
+class PersistenceQueue:
+    """제한된 크기의 비동기 쓰기 지연 큐 (워커 1개)"""
+
+    _queue: Optional[asyncio.Queue] = None
+    _worker: Optional[asyncio.Task] = None
+    _pending: Deque[_Job] = deque()  # 처리 대기/진행 중인 작업 (제출 순서)
+
+    # 지표
+    _stats: Dict[str, float] = {
+        "submitted": 0,
+        "processed": 0,
+        "failed": 0,
+        "retries": 0,
+        "batches": 0,
+        "batched_jobs": 0,
+        "inline_writes": 0,
+        "backpressure_waits": 0,
+        "backpressure_wait_seconds": 0.0,
+        "lag_seconds_total": 0.0,
+        "lag_seconds_max": 0.0,
+        "lag_samples": 0,
+    }
+
+    @classmethod
+    def start(cls):
+        """워커 시작 (애플리케이션 시작 시 호출)"""
+        if cls._worker is not None and not cls._worker.done():
+            return
+        cls._queue = asyncio.Queue(maxsize=max(1, settings.PERSISTENCE_QUEUE_MAX_SIZE))
+        cls._pending.clear()
+        cls._worker = asyncio.get_running_loop().create_task(cls._run())
+        logger.info(f"Persistence queue started (max_size={settings.PERSISTENCE_QUEUE_MAX_SIZE}, batch_size={settings.PERSISTENCE_BATCH_SIZE})")
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._worker is not None and not cls._worker.done()
+
+    @classmethod
+    async def stop(cls, timeout: Optional[float] = None):
+        """남은 작업을 timeout 안에서 저장한 뒤 워커 종료 (MongoDB 연결 종료 전에 호출)"""
+        if cls._worker is None:
+            return
+        timeout = settings.PERSISTENCE_SHUTDOWN_TIMEOUT_SECONDS if timeout is None else timeout
+        try:
+            await asyncio.wait_for(cls._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Persistence queue shutdown timeout - {cls._queue.qsize()} job(s) not saved")
+        cls._worker.cancel()
+        try:
+            await cls._worker
+        except asyncio.CancelledError:
+            pass
+        cls._worker = None
+
+    @classmethod
+    async def submit_insert(cls, collection_name: str, document: Dict[str, Any]):
+        """문서 저장 작업 제출 (_id가 없으면 미리 부여)"""
+        document.setdefault("_id", ObjectId())
+        await cls._submit(_Job(_Job.INSERT, collection_name, document))
+
+    @classmethod
+    async def submit_update(cls, collection_name: str, filter: Dict[str, Any], update: Dict[str, Any]):
+        """update_one 작업 제출 (재시도되므로 $set 등 멱등한 갱신만 사용)"""
+        await cls._submit(_Job(_Job.UPDATE, collection_name, (filter, update)))
+
+    @classmethod
+    async def submit_call(cls, name: str, func: Callable[[], Awaitable[Any]]):
+        """묶을 수 없는 저장 작업 제출 (func는 호출할 때마다 새 코루틴 반환)"""
+        await cls._submit(_Job(_Job.CALL, name, func))
+
+    @classmethod
+    async def _submit(cls, job: _Job):
+        cls._stats["submitted"] += 1
+        if not cls.is_running():
+            # 워커가 없으면(스크립트 등) 바로 저장
+            cls._stats["inline_writes"] += 1
+            await cls._write_inline(job)
+            return
+
+        # 워커가 먼저 꺼내 갈 수 있으므로 큐에 넣기 전에 대기 목록에 추가
+        cls._pending.append(job)
+        try:
+            cls._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            cls._stats["backpressure_waits"] += 1
+            started_at = time.monotonic()
+            try:
+                await asyncio.wait_for(cls._queue.put(job), timeout=settings.PERSISTENCE_QUEUE_PUT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Persistence queue full - writing {job.kind} job for {job.target} inline")
+                cls._discard_pending(job)
+                cls._stats["inline_writes"] += 1
+                await cls._write_inline(job)
+                return
+            except BaseException:
+                # 대기 중 취소되면(클라이언트 연결 종료 등) 작업이 큐에 들어가지 않으므로 대기 목록에서도 제거
+                cls._discard_pending(job)
+                raise
+            finally:
+                cls._stats["backpressure_wait_seconds"] += time.monotonic() - started_at
+
+    @classmethod
+    def _discard_pending(cls, job: _Job):
+        try:
+            cls._pending.remove(job)
+        except ValueError:
+            pass
+
+    @classmethod
+    async def _write_inline(cls, job: _Job):
+        try:
+            await cls._execute(job.kind, job.target, [job])
+            cls._stats["processed"] += 1
+        except Exception as e:
+            cls._stats["failed"] += 1
+            logger.error(f"Failed to write {job.kind} job for {job.target}: {str(e)}")
+
+    @classmethod
+    async def _run(cls):
+        """작업을 모아서 저장하는 워커 루프"""
+        while True:
+            batch = [await cls._queue.get()]
+            deadline = time.monotonic() + settings.PERSISTENCE_BATCH_MAX_WAIT_MS / 1000.0
+            while len(batch) < settings.PERSISTENCE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(cls._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await cls._process_batch(batch)
+            except Exception as e:
+                logger.error(f"Persistence worker error: {str(e)}")
+            finally:
+                for job in batch:
+                    cls._discard_pending(job)
+                    cls._queue.task_done()
+
+    @classmethod
+    async def _process_batch(cls, batch: List[_Job]):
+        """
+        같은 종류/대상끼리 묶어서 저장
+
+        같은 컬렉션의 update는 제출 순서대로 적용됨 (ordered bulk_write). insert는 서로 독립된 문서라 순서를 보장하지 않으며,
+        서로 다른 컬렉션/작업 사이의 순서도 보장하지 않음
+        """
+        groups: Dict[tuple, List[_Job]] = {}
+        for job in batch:
+            key = (job.kind, job.target) if job.kind != _Job.CALL else (job.kind, id(job))
+            groups.setdefault(key, []).append(job)
+
+        cls._stats["batches"] += 1
+        cls._stats["batched_jobs"] += len(batch)
+        for (kind, _), jobs in groups.items():
+            if await cls._execute_with_retry(kind, jobs[0].target, jobs):
+                now = time.monotonic()
+                for job in jobs:
+                    lag = now - job.enqueued_at
+                    cls._stats["lag_seconds_total"] += lag
+                    cls._stats["lag_seconds_max"] = max(cls._stats["lag_seconds_max"], lag)
+                cls._stats["lag_samples"] += len(jobs)
+                cls._stats["processed"] += len(jobs)
+            else:
+                cls._stats["failed"] += len(jobs)
+
+    @classmethod
+    async def _execute_with_retry(cls, kind: str, target: str, jobs: List[_Job]) -> bool:
+        for attempt in range(settings.PERSISTENCE_MAX_RETRIES + 1):
+            try:
+                await cls._execute(kind, target, jobs)
+                return True
+            except Exception as e:
+                if attempt >= settings.PERSISTENCE_MAX_RETRIES:
+                    logger.error(f"Failed to write {len(jobs)} {kind} job(s) for {target} after {attempt + 1} attempts: {str(e)}")
+                    return False
+                cls._stats["retries"] += 1
+                delay = settings.PERSISTENCE_RETRY_BASE_DELAY_MS / 1000.0 * (2 ** attempt)
+                logger.warning(f"Retrying {kind} job(s) for {target} in {delay:.2f}s: {str(e)}")
+                await asyncio.sleep(delay)
+        return False
+
+    @staticmethod
+    async def _execute(kind: str, target: str, jobs: List[_Job]):
+        if kind == _Job.CALL:
+            for job in jobs:
+                await job.payload()
+            return
+
+        collection = MongoManager.get_collection(target)
+        if kind == _Job.INSERT:
+            try:
+                await collection.insert_many([job.payload for job in jobs], ordered=False)
+            except BulkWriteError as e:
+                # 이전 시도에서 이미 저장된 문서(중복 키)는 성공으로 간주
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                    raise
+        else:
+            # 같은 문서에 대한 갱신이 한 배치에 여러 개 있을 수 있으므로 제출 순서대로 적용
+            await collection.bulk_write(
+                [UpdateOne(filter, update) for filter, update in (job.payload for job in jobs)],
+                ordered=True
+            )
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """큐 지표 반환 (depth: 대기 작업 수, oldest_pending_seconds: 가장 오래 기다린 작업의 경과 시간)"""
+        stats = dict(cls._stats)
+        stats.update(
+            running=cls.is_running(),
+            depth=cls._queue.qsize() if cls._queue is not None else 0,
+            max_size=cls._queue.maxsize if cls._queue is not None else settings.PERSISTENCE_QUEUE_MAX_SIZE,
+            oldest_pending_seconds=(time.monotonic() - cls._pending[0].enqueued_at) if cls._pending else 0.0,
+            lag_seconds_avg=stats["lag_seconds_total"] / stats["lag_samples"] if stats["lag_samples"] else 0.0,
+            avg_batch_size=stats["batched_jobs"] / stats["batches"] if stats["batches"] else 0.0,
+        )
+        return stats
@@ -0,0 +1,335 @@
+"""
+LLM 프롬프트 생성 모듈
+- 시스템 프롬프트, 지시사항, 검색 도구 정의 등 정적 부분은 모듈 로드 시 한 번만 생성(직렬화)
+- 제공자 측 프롬프트 캐시(접두사 캐시)가 적중하도록 고정 부분 -> 운동 정보 -> 사용자별 가변 데이터 순으로 배치
+  (요청마다 달라지는 타임스탬프, 유사도 점수 등은 넣지 않음)
+- 운동별 프롬프트 조각은 운동 ID 기준으로 캐시하여 요청마다 중첩 dict 생성과 json.dumps를 반복하지 않음
+- 관련 운동은 토큰 예산(PROMPT_EXERCISE_TOKEN_BUDGET) 안에서 검색 순위대로 포함
+  (전체 조각이 넘치면 요약 조각으로 대체하고, 그래도 넘치면 제외 - 최상위 운동은 항상 포함)
+"""
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.user_input import UserInput
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+def _dumps(obj: Any) -> str:
+    """공백 없는 JSON 직렬화 (한글은 그대로 유지하여 토큰 수 절약)"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 입력 토큰 수 추정
+
+    UTF-8 3바이트당 약 1토큰으로 계산합니다 (한글은 글자당 약 1토큰, 영문/숫자는 실제보다 약간 많게 추정).
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+# ---------------------------------------------------------------------------
+# 정적 프롬프트 (모듈 로드 시 한 번만 생성)
+# ---------------------------------------------------------------------------
+
+# 스트레칭 가이드 지시사항 (미리 직렬화하여 시스템 프롬프트 끝에 포함)
+_STRETCHING_INSTRUCTIONS_JSON = _dumps({
+    "format": {
+        "analysis": ["상태", "위험", "개선점"],
+        "guide": ["스트레칭", "생활수칙", "주의사항"],
+        "references": "참고 자료 및 출처"
+    },
+    "requirements": [
+        "제공된 메타데이터를 최대한 활용하여 상세한 스트레칭 가이드를 작성하세요.",
+        "학술적 근거가 있는 경우 포함하고 출처를 명시하세요.",
+        "필요한 경우 Google 검색 기능을 사용하여 추가 정보를 찾으세요.",
+        "사용자의 상태, 직업, 생활 습관을 고려한 맞춤형 가이드를 제공하세요.",
+        "각 스트레칭 동작에 대해 단계별 지침, 호흡법, 반복 횟수를 명확히 설명하세요.",
+        "참고 자료 섹션에는 실제 URL이 있는 경우에만 포함하세요. URL이 없는 경우 출처 링크 필요와 같은 텍스트를 사용하지 말고, 해당 참고 자료는 생략하세요."
+    ]
+})
+
+_STRETCHING_SYSTEM_PROMPT_TEMPLATE = """당신은 스트레칭 전문가이자 물리치료사입니다.
+JSON 형식으로 제공된 사용자 데이터와 관련 스트레칭 정보를 활용해 분석과 가이드를 제공하세요.
+
+다음 원칙을 따라주세요:
+1. 제공된 메타데이터를 최대한 활용하여 상세하고 정확한 스트레칭 가이드를 작성하세요.
+2. 학술적 근거가 있는 경우 반드시 포함하고 출처를 명시하세요.
+3. 사용자의 상태, 직업, 생활 습관을 고려한 맞춤형 가이드를 제공하세요.
+4. 각 스트레칭 동작에 대해 단계별 지침, 호흡법, 반복 횟수를 명확히 설명하세요.
+5. $SEARCH_RULE
+6. 참고 자료 섹션에는 실제 URL이 있는 경우에만 포함하세요. URL이 없는 경우 출처 링크 필요와 같은 텍스트를 사용하지 말고, 해당 참고 자료는 생략하세요.
+7. 모든 응답은 한국어로만 작성하세요. 영어 용어(예: 'effects', 'scientific basis' 등)를 사용하지 마세요.
+8. 논문 제목이나 출처 정보에서 영어 부분은 제거하거나 한국어로 간략하게 요약하세요.
+
+응답 형식:
+[분석]
+- 상태: (사용자의 현재 상태 분석)
+- 위험: (지속될 경우의 위험 요소)
+- 개선점: (개선을 위한 방향)
+
+[가이드]
+- 스트레칭: (구체적인 스트레칭 방법 3-5개)
+- 생활수칙: (일상생활에서의 개선 방법)
+- 주의사항: (스트레칭 시 주의할 점)
+
+[참고 자료]
+- (실제 URL이 있는 학술 자료만 포함, URL이 없는 경우 생략)
+
+지시사항:
+$INSTRUCTIONS"""
+
+# Helpy Pro용 (Google 검색 도구 사용)
+STRETCHING_SYSTEM_PROMPT_WITH_SEARCH = _STRETCHING_SYSTEM_PROMPT_TEMPLATE.replace(
+    "$SEARCH_RULE", "필요한 경우 Google 검색 기능을 사용하여 추가 정보를 찾으세요."
+).replace("$INSTRUCTIONS", _STRETCHING_INSTRUCTIONS_JSON)
+# OpenAI용 (검색 도구 없음)
+STRETCHING_SYSTEM_PROMPT = _STRETCHING_SYSTEM_PROMPT_TEMPLATE.replace(
+    "$SEARCH_RULE", "필요한 경우 추가 정보를 찾아 포함하세요."
+).replace("$INSTRUCTIONS", _STRETCHING_INSTRUCTIONS_JSON)
+
+# Helpy Pro 검색 도구 정의
+SEARCH_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_google_for_query",
+            "description": "Search Google for additional information about stretching exercises, medical conditions, or scientific evidence",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The search query"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    }
+]
+
+_CONVERSATION_PROMPT_HEADER = """당신은 꾸부기라는 이름의 스트레칭 전문가입니다. 친절하고 명확하게 스트레칭 정보를 제공합니다.
+
+아래 정보를 바탕으로 사용자의 후속 질문에 답변해주세요.
+항상 안전을 최우선으로 고려하고, 사용자에게 적합한 스트레칭 방법을 설명하세요.
+이전 응답에서 언급한 내용을 기반으로 하되, 필요하다면 새로운 정보나 더 자세한 설명을 제공하세요.
+꾸부기의 말투와 스타일을 유지하며, 친근하고 전문적인 어조로 답변하세요.
+모든 응답은 한국어로만 작성하세요. 영어 용어(예: 'effects', 'scientific basis' 등)를 사용하지 마세요.
+논문 제목이나 출처 정보에서 영어 부분은 제거하거나 한국어로 간략하게 요약하세요.
+"""
+
+# ---------------------------------------------------------------------------
+# 운동별 프롬프트 조각 (운동 ID 기준 캐시)
+# ---------------------------------------------------------------------------
+
+# (종류, 운동 키, 근육, 요약 여부) -> (조각 문자열, 추정 토큰 수)
+_fragment_cache = TTLCache(
+    max_size=settings.PROMPT_FRAGMENT_CACHE_SIZE,
+    ttl_seconds=settings.PROMPT_FRAGMENT_CACHE_TTL_SECONDS
+)
+
+
+def exercise_key(item: Dict[str, Any]) -> str:
+    """검색 결과 항목의 운동 식별자 (ID가 없으면 근육:제목)"""
+    exercise = item.get("exercise", {})
+    return exercise.get("id") or f"{item.get('muscle', '')}:{exercise.get('title', '')}"
+
+
+def _cached_fragment(kind: str, item: Dict[str, Any], compact: bool, build: Callable) -> Tuple[str, int]:
+    key = (kind, exercise_key(item), item.get("muscle", ""), compact)
+    cached = _fragment_cache.get(key)
+    if cached is None:
+        text = build(item.get("exercise", {}), item.get("muscle", ""), compact)
+        cached = (text, estimate_tokens(text))
+        _fragment_cache.set(key, cached)
+    return cached
+
+
+def _build_stretching_fragment(exercise: Dict[str, Any], muscle: str, compact: bool) -> str:
+    """
+    스트레칭 가이드용 운동 조각 (JSON 객체)
+
+    요약 조각은 효과, 학술적 근거, 호흡 패턴, 감각 설명을 제외합니다.
+    """
+    evidence = exercise.get("evidence") or {}
+    exercise_info = {
+        "title": exercise.get("title", "정보 없음"),
+        "muscle": muscle,
+        "source_url": evidence.get("url") or "",
+        "steps": []
+    }
+
+    enhanced = exercise.get("enhanced_metadata", {})
+    stretching_details = enhanced.get("스트레칭_상세화", {})
+    if stretching_details:
+        steps = stretching_details.get("동작_단계", [])
+        if steps:
+            exercise_info["steps"] = steps
+        if not compact:
+            breathing = stretching_details.get("호흡_패턴", [])
+            if breathing:
+                exercise_info["breathing"] = breathing
+            feeling = stretching_details.get("느껴야_할_감각", "")
+            if feeling:
+                exercise_info["feeling"] = feeling
+        repetition = stretching_details.get("반복_횟수_및_시간", "")
+        if repetition:
+            exercise_info["repetition"] = repetition
+
+    if not compact:
+        effects = enhanced.get("효과_및_이점", {})
+        if effects:
+            exercise_info["effects"] = effects
+    safety = enhanced.get("안전_및_주의사항", {})
+    if safety:
+        exercise_info["safety"] = safety
+    if not compact:
+        scientific_basis = enhanced.get("학술적_근거", {})
+        if scientific_basis:
+            exercise_info["scientific_basis"] = scientific_basis
+
+    return _dumps(exercise_info)
+
+
+def _build_conversation_fragment(exercise: Dict[str, Any], muscle: str, compact: bool) -> str:
+    """대화 응답용 운동 조각 (텍스트, 값이 없는 항목은 생략)"""
+    enhanced = exercise.get("enhanced_metadata", {})
+    stretching_details = enhanced.get("스트레칭_상세화", {})
+
+    def _text(value: Any) -> str:
+        if not value:
+            return ""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, list):
+            return " ".join(str(v) for v in value)
+        return _dumps(value)
+
+    lines = [
+        ("이름", exercise.get("name") or exercise.get("title", "")),
+        ("설명", "" if compact else _text(exercise.get("description"))),
+        ("방법", _text(exercise.get("method") or stretching_details.get("동작_단계"))),
+        ("효과", "" if compact else _text(exercise.get("effect") or enhanced.get("효과_및_이점"))),
+        ("주의사항", _text(exercise.get("caution") or enhanced.get("안전_및_주의사항"))),
+    ]
+    return "".join(f"{label}: {value}\n" for label, value in lines if value)
+
+
+def _select_fragments(
+    relevant_exercises: Optional[List[Dict[str, Any]]],
+    kind: str,
+    build: Callable,
+    token_budget: int,
+    overhead_tokens: int = 0
+) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    토큰 예산 안에서 포함할 운동 조각 선택 (검색 순위 순)
+
+    Returns:
+        [(검색 결과 항목, 조각 문자열), ...]
+    """
+    selected = []
+    used = 0
+    trimmed = 0
+    for item in relevant_exercises or []:
+        text, tokens = _cached_fragment(kind, item, False, build)
+        if token_budget > 0 and used + tokens + overhead_tokens > token_budget:
+            # 전체 조각이 예산을 넘으면 요약 조각 시도 (최상위 운동은 요약 조각으로라도 항상 포함)
+            text, tokens = _cached_fragment(kind, item, True, build)
+            if selected and used + tokens + overhead_tokens > token_budget:
+                trimmed += 1
+                continue
+        selected.append((item, text))
+        used += tokens + overhead_tokens
+
+    if trimmed:
+        logger.debug(f"프롬프트 토큰 예산({token_budget}) 초과로 운동 {trimmed}개 제외")
+    return selected
+
+
+def build_stretching_prompt(
+    user_input: UserInput,
+    relevant_exercises: Optional[List[Dict[str, Any]]] = None,
+    token_budget: Optional[int] = None
+) -> str:
+    """
+    스트레칭 가이드 생성용 사용자 프롬프트 (JSON 문자열)
+
+    같은 운동 조합이면 접두사가 같도록 운동 정보를 먼저, 사용자 데이터를 마지막에 둡니다.
+    검색 순위는 운동 순서로 전달되므로 요청마다 달라지는 유사도 점수는 넣지 않습니다.
+    """
+    user_data = {
+        "pain_description": user_input.pain_description,
+        "body_parts": user_input.selected_body_parts,
+        "occupation": user_input.occupation,
+        "age": getattr(user_input, "age", ""),
+        "gender": getattr(user_input.gender, "value", user_input.gender)
+    }
+
+    lifestyle = getattr(user_input, "lifestyle", None)
+    if lifestyle:
+        if hasattr(lifestyle, "model_dump"):
+            user_data["lifestyle"] = lifestyle.model_dump()
+        elif hasattr(lifestyle, "__dict__"):
+            user_data["lifestyle"] = lifestyle.__dict__
+        else:
+            user_data["lifestyle"] = lifestyle
+
+    budget = settings.PROMPT_EXERCISE_TOKEN_BUDGET if token_budget is None else token_budget
+    exercises = ",".join(
+        text for _, text in _select_fragments(relevant_exercises, "stretching", _build_stretching_fragment, budget, overhead_tokens=1)
+    )
+
+    return f'{{"exercises":[{exercises}],"user":{_dumps(user_data)}}}'
+
+
+def build_conversation_prompt(
+    conversation_context: Dict[str, Any],
+    relevant_exercises: Optional[List[Dict[str, Any]]] = None,
+    token_budget: Optional[int] = None
+) -> str:
+    """
+    대화 컨텍스트 기반 후속 질문 응답용 시스템 프롬프트
+
+    고정 지시사항 -> 운동 정보 -> 사용자 정보 -> 이전 대화 순으로 배치합니다 (후속 질문은 user 메시지로 전달).
+    """
+    user_info = conversation_context.get("user_info", {})
+    gender = user_info.get("gender", "알 수 없음")
+
+    budget = settings.PROMPT_EXERCISE_TOKEN_BUDGET if token_budget is None else token_budget
+    exercises_text = "".join(
+        f"\n[스트레칭 {i}]\n{text}"
+        for i, (_, text) in enumerate(
+            _select_fragments(relevant_exercises, "conversation", _build_conversation_fragment, budget, overhead_tokens=4),
+            1
+        )
+    )
+
+    return f"""{_CONVERSATION_PROMPT_HEADER}
+관련 스트레칭 정보:{exercises_text}
+
+사용자 정보:
+- 나이: {user_info.get("age", "알 수 없음")}
+- 성별: {getattr(gender, "value", gender)}
+- 생활 습관: {user_info.get("lifestyle", "알 수 없음")}
+- 직업: {user_info.get("occupation", "알 수 없음")}
+- 통증 부위: {user_info.get("selected_body_parts", "알 수 없음")}
+
+이전 대화 내용:
+[사용자 질문]
+{conversation_context.get("initial_question", "")}
+
+[꾸부기 응답]
+{conversation_context.get("initial_response", "")}
+"""
+
+
+def fragment_cache_stats() -> Dict[str, Any]:
+    """운동 조각 캐시 지표 반환"""
+    return _fragment_cache.stats()
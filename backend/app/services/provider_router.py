@@ -0,0 +1,329 @@
+"""
+스트레칭 가이드 LLM 제공자 라우터 (Helpy Pro / OpenAI)
+- 제공자별 첫 토큰 지연 시간(EWMA)과 최근 실패율, 동시성 제한기 대기열로 우선 제공자 선택 (서킷이 열린 제공자는 마지막 순위)
+- 우선 제공자의 첫 토큰이 LLM_HEDGE_DELAY_MS 안에 오지 않으면 다른 제공자에 헤지 요청을 보내고 먼저 토큰을 보낸 쪽을 사용
+- 제공자가 기본 응답(FallbackAIResponse)으로 실패를 알리면 다음 제공자로 즉시 전환
+- 진 요청은 취소하므로 저장(임시 세션 / 히스토리 / 응답 캐시)은 이긴 제공자에서만 수행됨
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from app.core.config import settings
+from app.schemas.ai_response import FallbackAIResponse, StreamingAIResponse
+from app.schemas.user_input import UserInput
+from app.services.helpy_pro_service import HelpyProService
+from app.services.openai_streaming_service import OpenAIStreamingService
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+_END = object()  # 제공자 스트림 종료 표시
+
+
+class ProviderHealth:
+    """제공자별 상태 지표 (첫 토큰 지연 시간 EWMA, 시간에 따라 감쇠하는 실패율)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ttft_ewma: Optional[float] = None
+        self._failure_rate = 0.0
+        self._failure_updated_at = time.monotonic()
+
+        # 지표
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+
+    def failure_rate(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._failure_updated_at
+        return self._failure_rate * math.exp(-elapsed / ProviderRouter.FAILURE_DECAY_SECONDS)
+
+    def _update_failure_rate(self, failed: bool):
+        now = time.monotonic()
+        rate = self.failure_rate(now) * (1 - ProviderRouter.EWMA_ALPHA)
+        self._failure_rate = rate + ProviderRouter.EWMA_ALPHA if failed else rate
+        self._failure_updated_at = now
+
+    def _update_ttft(self, seconds: float):
+        if self.ttft_ewma is None:
+            self.ttft_ewma = seconds
+        else:
+            self.ttft_ewma += (seconds - self.ttft_ewma) * ProviderRouter.EWMA_ALPHA
+
+    def record_success(self, ttft: float, hedged: bool):
+        self.successes += 1
+        if hedged:
+            self.hedge_wins += 1
+        self._update_ttft(ttft)
+        self._update_failure_rate(False)
+
+    def record_failure(self):
+        self.failures += 1
+        self._update_failure_rate(True)
+
+    def record_cancelled(self, elapsed: float):
+        """헤지 경쟁에서 져서 취소됨 - 첫 토큰 지연 시간이 최소 elapsed 이상이었으므로 표본으로 반영"""
+        self.cancelled += 1
+        self._update_ttft(elapsed)
+
+
+class _Attempt:
+    """진행 중인 제공자 요청 하나 (별도 태스크에서 스트림을 읽어 크기 1의 큐로 전달)"""
+
+    def __init__(self, provider: str, stream: AsyncGenerator, hedged: bool):
+        self.provider = provider
+        self.hedged = hedged
+        self.started_at = time.monotonic()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._get_task: Optional[asyncio.Future] = None
+        self._task = asyncio.create_task(self._pump(stream))
+
+    async def _pump(self, stream: AsyncGenerator):
+        # 큐 크기가 1이므로 선택되지 않은 요청은 첫 청크 이후 더 진행(저장 등)하지 않음
+        try:
+            async for chunk in stream:
+                await self._queue.put(chunk)
+            await self._queue.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put(e)
+        finally:
+            # 취소 시 제공자 스트림을 닫아 동시성 슬롯과 HTTP 스트림을 바로 반환
+            await stream.aclose()
+
+    def next_item(self) -> asyncio.Future:
+        """다음 항목 대기 (시간 초과로 기다림을 멈춰도 같은 get 태스크를 유지하여 항목 유실 방지)"""
+        if self._get_task is None:
+            self._get_task = asyncio.ensure_future(self._queue.get())
+        return self._get_task
+
+    def take(self) -> Any:
+        item = self._get_task.result()
+        self._get_task = None
+        return item
+
+    async def get(self) -> Any:
+        await self.next_item()
+        return self.take()
+
+    def cancel(self):
+        if self._get_task is not None:
+            self._get_task.cancel()
+        self._task.cancel()
+
+
+class ProviderRouter:
+    """상태와 지연 시간 기반 제공자 선택 + 첫 토큰 헤지 요청"""
+
+    PROVIDERS = {
+        "helpy_pro": HelpyProService,
+        "openai": OpenAIStreamingService,
+    }
+    DEFAULT_PROVIDER = "helpy_pro"
+
+    EWMA_ALPHA = 0.2
+    FAILURE_DECAY_SECONDS = 60.0  # 실패율이 1/e로 줄어드는 시간 (장애 제공자도 시간이 지나면 다시 시도)
+    FAILURE_PENALTY_SECONDS = 10.0  # 실패율 1.0에 해당하는 점수 가산치 (초)
+
+    _health: Dict[str, ProviderHealth] = {name: ProviderHealth(name) for name in PROVIDERS}
+
+    # 지표
+    routed = 0
+    hedges = 0
+    failovers = 0
+    all_failed = 0
+
+    @classmethod
+    def _is_configured(cls, provider: str) -> bool:
+        return bool(cls.PROVIDERS[provider].API_KEY)
+
+    @classmethod
+    def _score(cls, provider: str, now: float) -> float:
+        """예상 첫 토큰 지연 시간(초) - 낮을수록 우선"""
+        if cls.PROVIDERS[provider].get_breaker_stats()["state"] == "open":
+            return float("inf")
+        health = cls._health[provider]
+        ttft = health.ttft_ewma or 0.0
+        limiter = cls.PROVIDERS[provider].get_limiter_stats()
+        # 동시성 제한기 대기열이 있으면 그만큼 늦게 시작됨
+        backlog = limiter["waiting"] / max(1, limiter["limit"])
+        return ttft * (1 + backlog) + health.failure_rate(now) * cls.FAILURE_PENALTY_SECONDS
+
+    @classmethod
+    def rank_providers(cls) -> List[str]:
+        """API 키가 설정된 제공자를 점수 순으로 정렬 (동점이면 등록 순서)"""
+        now = time.monotonic()
+        providers = [name for name in cls.PROVIDERS if cls._is_configured(name)]
+        return sorted(providers, key=lambda name: cls._score(name, now))
+
+    @staticmethod
+    def _is_failure(item: Any) -> bool:
+        return item is _END or isinstance(item, (Exception, FallbackAIResponse))
+
+    @classmethod
+    async def generate_stretching_guide_stream(
+        cls,
+        session_id: str,
+        stretching_id: str,
+        user_input: UserInput,
+        relevant_exercises: List[Dict[str, Any]] = None,
+        temp_session_service = None,
+        user_service = None,
+        current_user = None
+    ) -> AsyncGenerator[StreamingAIResponse, None]:
+        """제공자 라우팅을 거친 스트레칭 가이드 생성 (스트리밍 방식)"""
+        request_kwargs = dict(
+            session_id=session_id,
+            stretching_id=stretching_id,
+            user_input=user_input,
+            relevant_exercises=relevant_exercises,
+            temp_session_service=temp_session_service,
+            user_service=user_service,
+            current_user=current_user
+        )
+        # 설정된 제공자가 없으면 기본 제공자가 기본 응답을 보냄
+        remaining = cls.rank_providers() or [cls.DEFAULT_PROVIDER]
+        cls.routed += 1
+        logger.info(f"Routing stretching guide for session {session_id}: {remaining}")
+
+        loop = asyncio.get_running_loop()
+        hedge_delay = settings.LLM_HEDGE_DELAY_MS / 1000.0
+        active: List[_Attempt] = []
+        failed: List[_Attempt] = []
+        failed_items: Dict[_Attempt, Any] = {}
+
+        def launch(hedged: bool) -> _Attempt:
+            provider = remaining.pop(0)
+            health = cls._health[provider]
+            health.requests += 1
+            if hedged:
+                health.hedged_requests += 1
+            attempt = _Attempt(
+                provider,
+                cls.PROVIDERS[provider].generate_stretching_guide_stream(**request_kwargs),
+                hedged
+            )
+            active.append(attempt)
+            return attempt
+
+        launch(hedged=False)
+        hedge_at = loop.time() + hedge_delay if hedge_delay > 0 else None
+        winner: Optional[_Attempt] = None
+        first_item = None
+
+        try:
+            while winner is None:
+                if not active:
+                    if not remaining:
+                        break
+                    # 진행 중인 요청이 모두 실패하면 다음 제공자로 즉시 전환
+                    cls.failovers += 1
+                    logger.warning(f"Failing over to {remaining[0]} for session: {session_id}")
+                    launch(hedged=False)
+                    continue
+
+                timeout = None
+                if remaining and hedge_at is not None:
+                    timeout = max(0.0, hedge_at - loop.time())
+                waits = {attempt.next_item(): attempt for attempt in active}
+                done, _ = await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # 첫 토큰 마감 시간 초과 - 다른 제공자에 헤지 요청
+                    cls.hedges += 1
+                    hedge_at = None
+                    logger.info(f"First token deadline ({settings.LLM_HEDGE_DELAY_MS}ms) missed by {active[0].provider}, hedging to {remaining[0]}")
+                    launch(hedged=True)
+                    continue
+
+                for attempt in list(active):
+                    if attempt.next_item() not in done:
+                        continue
+                    item = attempt.take()
+                    if cls._is_failure(item):
+                        if isinstance(item, Exception):
+                            logger.error(f"Provider {attempt.provider} stream error: {str(item)}")
+                        active.remove(attempt)
+                        failed.append(attempt)
+                        failed_items[attempt] = item
+                        cls._health[attempt.provider].record_failure()
+                        continue
+                    winner, first_item = attempt, item
+                    break
+
+            if winner is None:
+                # 모든 제공자 실패 - 처음 실패한 제공자의 기본 응답을 그대로 전달
+                cls.all_failed += 1
+                logger.error(f"All providers failed for session: {session_id}")
+                for attempt in failed:
+                    item = failed_items[attempt]
+                    if isinstance(item, FallbackAIResponse):
+                        while item is not _END:
+                            if isinstance(item, Exception):
+                                raise item
+                            yield item
+                            item = await attempt.get()
+                        return
+                yield FallbackAIResponse(
+                    content=HelpyProService._generate_default_response(user_input),
+                    done=True
+                )
+                return
+
+            # 이긴 요청만 남기고 나머지 취소
+            now = time.monotonic()
+            cls._health[winner.provider].record_success(now - winner.started_at, winner.hedged)
+            for attempt in active:
+                if attempt is not winner:
+                    cls._health[attempt.provider].record_cancelled(now - attempt.started_at)
+                    attempt.cancel()
+            logger.info(
+                f"Provider {winner.provider} selected for session {session_id} "
+                f"(first token {(now - winner.started_at) * 1000:.0f}ms{', hedged' if winner.hedged else ''})"
+            )
+
+            item = first_item
+            while item is not _END:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                item = await winner.get()
+        finally:
+            for attempt in active + failed:
+                attempt.cancel()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """라우터 및 제공자별 지표 반환"""
+        now = time.monotonic()
+        providers = {}
+        for name, health in cls._health.items():
+            providers[name] = {
+                "configured": cls._is_configured(name),
+                "breaker_state": cls.PROVIDERS[name].get_breaker_stats()["state"],
+                "score": cls._score(name, now),
+                "ttft_ewma_ms": health.ttft_ewma * 1000 if health.ttft_ewma is not None else None,
+                "failure_rate": health.failure_rate(now),
+                "requests": health.requests,
+                "successes": health.successes,
+                "failures": health.failures,
+                "hedged_requests": health.hedged_requests,
+                "hedge_wins": health.hedge_wins,
+                "cancelled": health.cancelled,
+            }
+        return {
+            "hedge_delay_ms": settings.LLM_HEDGE_DELAY_MS,
+            "routed": cls.routed,
+            "hedges": cls.hedges,
+            "failovers": cls.failovers,
+            "all_failed": cls.all_failed,
+            "providers": providers,
+        }
@@ -0,0 +1,180 @@
+"""
+스트레칭 가이드 응답 캐시 (선택 사용: RESPONSE_CACHE_ENABLED)
+- 정확 일치 계층: 정규화된 사용자 입력(나이대, 성별, 직업, 통증 부위, 통증 설명) + 검색된 상위 k개 운동 ID
+- 유사 질의 계층: 통증 설명 외 조건과 운동 ID가 같고 쿼리 임베딩 코사인 유사도가 임계값 이상이면 재사용
+- 캐시 적중 시 저장된 응답을 기존 StreamingAIResponse 청크 형식으로 재생
+"""
+import logging
+import unicodedata
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.ai_response import StreamingAIResponse
+from app.schemas.user_input import UserInput
+from app.services.embedding_service import EmbeddingService
+from app.services.prompt_builder import exercise_key
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """제공자별 스트레칭 가이드 응답 캐시"""
+
+    REPLAY_CHUNK_CHARS = 64  # 캐시 응답 재생 시 청크 크기 (문자 수)
+    MAX_NEAR_ENTRIES_PER_CONTEXT = 32  # 같은 조건에서 유사도 비교할 최대 질의 수
+
+    # 정확 일치 키 -> 응답 텍스트
+    _responses = TTLCache(
+        max_size=settings.RESPONSE_CACHE_SIZE,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+    )
+    # 조건 키(통증 설명 제외) -> [(쿼리 임베딩, 정확 일치 키), ...]
+    _near_index = TTLCache(
+        max_size=settings.RESPONSE_CACHE_SIZE,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+    )
+
+    # 지표
+    exact_hits = 0
+    near_hits = 0
+    misses = 0
+    stores = 0
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return settings.RESPONSE_CACHE_ENABLED and settings.RESPONSE_CACHE_SIZE > 0
+
+    @staticmethod
+    def _normalize_text(text: Any) -> str:
+        """유니코드 NFC + 공백 정리 + 소문자"""
+        return " ".join(unicodedata.normalize("NFC", str(text or "")).split()).lower()
+
+    @staticmethod
+    def _exercise_ids(relevant_exercises: Optional[List[Dict[str, Any]]]) -> Tuple[str, ...]:
+        """검색 결과의 운동 ID 목록 (ID가 없으면 근육:제목)"""
+        return tuple(exercise_key(item) for item in relevant_exercises or [])
+
+    @classmethod
+    def _context_key(cls, provider: str, user_input: UserInput, relevant_exercises) -> Tuple:
+        """통증 설명을 제외한 조건 키"""
+        gender = getattr(user_input.gender, "value", user_input.gender)
+        body_parts = sorted({
+            cls._normalize_text(part) for part in user_input.selected_body_parts.split(",") if part.strip()
+        })
+        return (
+            provider,
+            user_input.age // 10 * 10,  # 나이대
+            cls._normalize_text(gender),
+            cls._normalize_text(user_input.occupation),
+            tuple(body_parts),
+            cls._exercise_ids(relevant_exercises),
+        )
+
+    @classmethod
+    def _exact_key(cls, context_key: Tuple, user_input: UserInput) -> Tuple:
+        return context_key + (cls._normalize_text(user_input.pain_description),)
+
+    @classmethod
+    async def _get_query_embedding(cls, user_input: UserInput) -> Optional[np.ndarray]:
+        """통증 설명의 쿼리 임베딩 (검색 시 캐시된 값을 재사용, 실패 시 None)"""
+        try:
+            return await EmbeddingService.encode_query(user_input.pain_description)
+        except Exception as e:
+            logger.warning(f"응답 캐시용 쿼리 임베딩 실패: {str(e)}")
+            return None
+
+    @classmethod
+    async def lookup(
+        cls,
+        provider: str,
+        user_input: UserInput,
+        relevant_exercises: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[str]:
+        """캐시된 응답 조회 (정확 일치 우선, 없으면 유사 질의)"""
+        if not cls.is_enabled():
+            return None
+
+        context_key = cls._context_key(provider, user_input, relevant_exercises)
+        response = cls._responses.get(cls._exact_key(context_key, user_input))
+        if response is not None:
+            cls.exact_hits += 1
+            logger.info(f"[{provider}] 응답 캐시 적중 (정확 일치)")
+            return response
+
+        entries = cls._near_index.get(context_key)
+        if entries and settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD < 1.0:
+            query_embedding = await cls._get_query_embedding(user_input)
+            if query_embedding is not None:
+                similarities = np.stack([vector for vector, _ in entries]) @ query_embedding
+                for idx in np.argsort(-similarities):
+                    if similarities[idx] < settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD:
+                        break
+                    response = cls._responses.get(entries[idx][1])
+                    if response is not None:
+                        cls.near_hits += 1
+                        logger.info(f"[{provider}] 응답 캐시 적중 (유사 질의, 유사도: {similarities[idx]:.3f})")
+                        return response
+
+        cls.misses += 1
+        return None
+
+    @classmethod
+    async def store(
+        cls,
+        provider: str,
+        user_input: UserInput,
+        relevant_exercises: Optional[List[Dict[str, Any]]],
+        response: str
+    ):
+        """정상 생성된 응답 저장 (기본 응답이나 오류 응답은 저장하지 않아야 함)"""
+        if not cls.is_enabled() or not response:
+            return
+
+        context_key = cls._context_key(provider, user_input, relevant_exercises)
+        exact_key = cls._exact_key(context_key, user_input)
+        cls._responses.set(exact_key, response)
+        cls.stores += 1
+
+        query_embedding = await cls._get_query_embedding(user_input)
+        if query_embedding is None:
+            return
+        entries = [entry for entry in (cls._near_index.get(context_key) or []) if entry[1] != exact_key]
+        entries.append((query_embedding, exact_key))
+        cls._near_index.set(context_key, entries[-cls.MAX_NEAR_ENTRIES_PER_CONTEXT:])
+
+    @classmethod
+    async def replay(cls, response: str) -> AsyncGenerator[StreamingAIResponse, None]:
+        """캐시된 응답을 스트리밍 청크로 재생 (완료 신호는 호출 측에서 전송)"""
+        for start in range(0, len(response), cls.REPLAY_CHUNK_CHARS):
+            yield StreamingAIResponse.model_construct(
+                content=response[start:start + cls.REPLAY_CHUNK_CHARS],
+                done=False
+            )
+
+    @classmethod
+    def clear(cls):
+        """모든 캐시 항목 제거"""
+        cls._responses.clear()
+        cls._near_index.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """응답 캐시 지표 반환"""
+        lookups = cls.exact_hits + cls.near_hits + cls.misses
+        return {
+            "enabled": cls.is_enabled(),
+            "size": len(cls._responses),
+            "max_size": cls._responses.max_size,
+            "ttl_seconds": cls._responses.ttl_seconds,
+            "similarity_threshold": settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+            "exact_hits": cls.exact_hits,
+            "near_hits": cls.near_hits,
+            "misses": cls.misses,
+            "stores": cls.stores,
+            "evictions": cls._responses.evictions,
+            "hit_rate": (cls.exact_hits + cls.near_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,241 @@
+"""
+회원 스트레칭 히스토리 저장소 (stretching_history 컬렉션)
+- 세션 하나당 문서 하나, (user_id, created_at, _id) 인덱스로 페이지 조회 - users 문서 크기와 무관
+- 커서 페이지네이션: 마지막 항목의 (created_at, _id) 이후를 조회하므로 skip 없이 긴 히스토리를 순회
+- 기존 users.stretching_history 배열은 처음 조회할 때 옮기고(온라인 마이그레이션) 배열을 제거
+  (배열 길이는 $size 집계로, 내용은 $slice 프로젝션으로 나눠 읽어 큰 배열도 한 번에 디코딩하지 않음)
+"""
+import base64
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import MongoManager
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class StretchingHistoryService:
+    """회원 스트레칭 히스토리 관리를 위한 서비스 클래스"""
+
+    collection_name = "stretching_history"
+    legacy_field = "stretching_history"
+
+    # 마이그레이션이 끝난(또는 옮길 배열이 없는) 사용자 - 조회 때마다 users 문서를 확인하지 않도록 기억
+    _migrated_users = TTLCache(max_size=100000, ttl_seconds=24 * 3600)
+
+    @classmethod
+    async def initialize_indexes(cls):
+        """히스토리 컬렉션에 필요한 인덱스 생성"""
+        collection = MongoManager.get_collection(cls.collection_name)
+        # 사용자별 시간순 조회 / 커서 페이지네이션
+        await collection.create_index(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+        )
+        # 같은 스트레칭 세션 중복 저장 방지 (재시도/마이그레이션 재실행 시 덮어씀)
+        await collection.create_index([("user_id", ASCENDING), ("id", ASCENDING)], unique=True)
+
+    @staticmethod
+    def _to_document(user_id: str, stretching_session: Dict[str, Any]) -> Dict[str, Any]:
+        document = {key: value for key, value in stretching_session.items() if key != "_id"}
+        document["user_id"] = user_id
+        if not document.get("id"):
+            document["id"] = str(ObjectId())
+        if not document.get("created_at"):
+            document["created_at"] = datetime.utcnow()
+        return document
+
+    @staticmethod
+    def _legacy_session_id(user_id: str, stretching_session: Dict[str, Any]) -> str:
+        """id 없는 기존 배열 항목의 결정적 ID (사용자 + 항목 내용 해시 - 마이그레이션을 다시 실행해도 같은 ID)"""
+        payload = json.dumps(stretching_session, sort_keys=True, default=str, ensure_ascii=False)
+        return "legacy-" + hashlib.sha1(f"{user_id}:{payload}".encode()).hexdigest()[:24]
+
+    @classmethod
+    def _upsert_args(cls, user_id: str, stretching_session: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """세션 ID 기준 upsert의 (filter, update)"""
+        document = cls._to_document(user_id, stretching_session)
+        return {"user_id": user_id, "id": document.get("id")}, {"$set": document}
+
+    @classmethod
+    async def add_session(cls, user_id: str, stretching_session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        스트레칭 세션 저장 (같은 세션 ID면 덮어씀) - 왕복 1회
+
+        Returns:
+            저장된 세션의 식별 정보 (id, created_at)
+        """
+        collection = MongoManager.get_collection(cls.collection_name)
+        filter, update = cls._upsert_args(user_id, stretching_session)
+        return await collection.find_one_and_update(
+            filter,
+            update,
+            projection={"_id": 0, "id": 1, "created_at": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    async def add_sessions(cls, user_id: str, stretching_sessions: List[Dict[str, Any]]) -> int:
+        """여러 스트레칭 세션 일괄 저장 (bulk_write 왕복 1회, 저장/갱신된 세션 수 반환)"""
+        if not stretching_sessions:
+            return 0
+        collection = MongoManager.get_collection(cls.collection_name)
+        result = await collection.bulk_write(
+            [UpdateOne(*cls._upsert_args(user_id, session), upsert=True) for session in stretching_sessions],
+            ordered=False
+        )
+        return result.upserted_count + result.matched_count
+
+    @classmethod
+    async def migrate_legacy_history(cls, user_id: str) -> int:
+        """
+        users 문서의 stretching_history 배열을 히스토리 컬렉션으로 옮기고 배열 제거 (옮긴 세션 수 반환)
+
+        세션 ID 기준 upsert이므로 여러 번 실행해도 안전하며, 옮기는 동안 배열이 바뀌면 제거하지 않음 (다음 실행 때 다시 옮김)
+        id가 없는 항목은 내용으로 만든 결정적 ID를 사용하므로 다시 옮겨도 중복 저장되지 않음
+        """
+        try:
+            object_id = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            return 0
+
+        users = MongoManager.get_collection("users")
+        size = await cls._legacy_size(users, object_id)
+        if size is None:
+            cls._migrated_users.set(user_id, True)
+            return 0
+
+        # 배열 전체를 한 번에 읽지 않고 $slice로 나눠서 복사 (큰 배열도 BSON 디코딩/전송량이 청크 크기로 제한됨)
+        moved = 0
+        chunk_size = max(1, settings.STRETCHING_HISTORY_MIGRATION_CHUNK)
+        for offset in range(0, size, chunk_size):
+            user = await users.find_one(
+                {"_id": object_id},
+                {"_id": 1, cls.legacy_field: {"$slice": [offset, chunk_size]}}
+            )
+            sessions = [
+                session if session.get("id") else {**session, "id": cls._legacy_session_id(user_id, session)}
+                for session in (user or {}).get(cls.legacy_field) or []
+            ]
+            moved += await cls.add_sessions(user_id, sessions)
+
+        result = await users.update_one(
+            {"_id": object_id, cls.legacy_field: {"$size": size}},
+            {"$unset": {cls.legacy_field: ""}}
+        )
+        if result.modified_count:
+            cls._migrated_users.set(user_id, True)
+            logger.info(f"Migrated {moved} stretching history entries for user: {user_id}")
+        else:
+            logger.warning(f"stretching_history changed during migration for user: {user_id}, will retry")
+        return moved
+
+    @classmethod
+    async def _legacy_size(cls, users, object_id: ObjectId) -> Optional[int]:
+        """users 문서의 stretching_history 배열 길이 ($size 집계 - 배열은 전송하지 않음, 배열이 없으면 None)"""
+        documents = await users.aggregate([
+            {"$match": {"_id": object_id, cls.legacy_field: {"$exists": True}}},
+            {"$project": {"size": {"$size": {"$ifNull": [f"${cls.legacy_field}", []]}}}},
+        ]).to_list(length=1)
+        return documents[0]["size"] if documents else None
+
+    @classmethod
+    async def _ensure_migrated(cls, user_id: str):
+        if cls._migrated_users.get(user_id) is None:
+            await cls.migrate_legacy_history(user_id)
+
+    @staticmethod
+    def encode_cursor(document: Dict[str, Any]) -> str:
+        """페이지의 마지막 항목으로 다음 페이지 커서 생성"""
+        payload = {"t": document["created_at"].isoformat(), "id": str(document["_id"])}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """
+        커서 해석
+
+        Raises:
+            HTTPException: 잘못된 커서인 경우 (400)
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    def _to_response(document: Dict[str, Any]) -> Dict[str, Any]:
+        document.pop("_id", None)
+        document.pop("user_id", None)
+        return document
+
+    @classmethod
+    async def get_history(cls, user_id: str, limit: int = 10, skip: int = 0) -> List[Dict[str, Any]]:
+        """스트레칭 히스토리 조회 (저장 순서, skip/limit)"""
+        await cls._ensure_migrated(user_id)
+        collection = MongoManager.get_collection(cls.collection_name)
+        cursor = collection.find({"user_id": user_id}).sort(
+            [("created_at", ASCENDING), ("_id", ASCENDING)]
+        ).skip(skip).limit(limit)
+        return [cls._to_response(document) for document in await cursor.to_list(length=limit)]
+
+    @classmethod
+    async def get_history_page(
+        cls,
+        user_id: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        ascending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        스트레칭 히스토리 커서 페이지 조회 (기본 최신순, ascending이면 저장 순서 - get_history와 같은 순서)
+
+        Returns:
+            (세션 목록, 다음 페이지 커서 - 마지막 페이지면 None)
+        """
+        await cls._ensure_migrated(user_id)
+        query: Dict[str, Any] = {"user_id": user_id}
+        after = "$gt" if ascending else "$lt"
+        if cursor:
+            created_at, last_id = cls.decode_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {after: created_at}},
+                {"created_at": created_at, "_id": {after: last_id}},
+            ]
+
+        direction = ASCENDING if ascending else DESCENDING
+        collection = MongoManager.get_collection(cls.collection_name)
+        documents = await collection.find(query).sort(
+            [("created_at", direction), ("_id", direction)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = cls.encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+        return [cls._to_response(document) for document in documents[:limit]], next_cursor
+
+    @classmethod
+    async def get_session(cls, user_id: str, stretching_id: str) -> Optional[Dict[str, Any]]:
+        """특정 스트레칭 세션 조회"""
+        await cls._ensure_migrated(user_id)
+        collection = MongoManager.get_collection(cls.collection_name)
+        document = await collection.find_one({"user_id": user_id, "id": stretching_id})
+        return cls._to_response(document) if document else None
+
+    @classmethod
+    async def delete_by_user(cls, user_id: str) -> int:
+        """사용자의 히스토리 전체 삭제 (회원 탈퇴 시)"""
+        collection = MongoManager.get_collection(cls.collection_name)
+        result = await collection.delete_many({"user_id": user_id})
+        cls._migrated_users.pop(user_id)
+        return result.deleted_count
@@ -8,6 +8,7 @@ from app.models.temp_session import TempSession
 from app.schemas.user_input import UserInput
 from app.schemas.session import StretchingSession
 from app.core.config import settings
+from app.services.persistence_queue import PersistenceQueue
 
 class TempSessionService:
     """임시 세션 관리를 위한 서비스 클래스"""
@@ -146,6 +147,21 @@ class TempSessionService:
         result = await collection.delete_one({"session_id": session_id})
         return result.deleted_count > 0
         
+    @staticmethod
+    def _ai_request_document(
+        session_id: str,
+        ai_response: str,
+        user_input: UserInput
+    ) -> dict:
+        """ai_requests 컬렉션에 저장할 문서 생성"""
+        return {
+            "user_id": user_input.user_id if hasattr(user_input, 'user_id') and user_input.user_id else "anonymous",
+            "session_id": session_id,
+            "user_input": user_input.model_dump() if hasattr(user_input, 'model_dump') else user_input,
+            "ai_response": ai_response,
+            "created_at": datetime.now()
+        }
+    
     @classmethod
     async def update_session_data(
         cls,
@@ -168,19 +184,46 @@ class TempSessionService:
             logger = logging.getLogger(__name__)
             
             ai_requests_collection = MongoManager.get_collection("ai_requests")
-            await ai_requests_collection.insert_one({
-                "user_id": user_input.user_id if hasattr(user_input, 'user_id') and user_input.user_id else "anonymous",
-                "session_id": session_id,
-                "user_input": user_input.model_dump() if hasattr(user_input, 'model_dump') else user_input,
-                "ai_response": ai_response,
-                "created_at": datetime.now()
-            })
+            await ai_requests_collection.insert_one(cls._ai_request_document(session_id, ai_response, user_input))
             logger.info(f"AI request saved to ai_requests collection for session: {session_id}")
         except Exception as e:
             logger.error(f"Failed to save AI request to ai_requests collection: {str(e)}")
         
         return updated_session
     
+    @classmethod
+    async def enqueue_stretching_ai_response(
+        cls,
+        session_id: str,
+        stretching_id: str,
+        ai_response: str
+    ):
+        """스트레칭 세션의 AI 응답 업데이트를 쓰기 지연 큐에 제출 (저장 완료를 기다리지 않음)"""
+        await PersistenceQueue.submit_update(
+            cls.collection_name,
+            {
+                "session_id": session_id,
+                "stretching_sessions.id": stretching_id
+            },
+            {
+                "$set": {
+                    "stretching_sessions.$.ai_response": ai_response
+                }
+            }
+        )
+    
+    @classmethod
+    async def enqueue_session_data(
+        cls,
+        session_id: str,
+        stretching_id: str,
+        ai_response: str,
+        user_input: UserInput
+    ):
+        """update_session_data와 같은 저장을 쓰기 지연 큐에 제출 (ai_requests는 insert_many로 묶여 저장)"""
+        await cls.enqueue_stretching_ai_response(session_id, stretching_id, ai_response)
+        await PersistenceQueue.submit_insert("ai_requests", cls._ai_request_document(session_id, ai_response, user_input))
+    
     @classmethod
     async def add_conversation_history(
         cls,
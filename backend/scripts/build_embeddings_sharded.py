@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+대용량 운동 데이터용 멀티 프로세스 임베딩 생성 스크립트
+- 근육 단위로 운동을 샤드로 나누어 워커 프로세스에서 병렬 인코딩
+- 벡터는 디스크에 미리 할당한 행렬(.npy 메모리 매핑)에 바로 기록하여 전체 벡터를 메모리에 모으지 않음
+- create_embeddings.py와 같은 해시 매니페스트를 사용하여 변경되지 않은 운동은 재사용 (전체 재생성: --full)
+- 처리량(texts/sec)과 최대 메모리 사용량(RSS)을 출력
+- 실행 방법: python backend/scripts/build_embeddings_sharded.py [--workers N] [--batch-size N] [--full] [--json]
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+import numpy as np
+
+# backend 디렉토리를 Python 경로에 추가
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services import embedding_store
+from create_embeddings import (
+    ENCODE_BATCH_SIZE, MANIFEST_SUFFIX, MODEL_NAME,
+    build_exercise_text, hash_text, load_manifest, write_json_atomic
+)
+
+COPY_CHUNK_ROWS = 4096  # 재사용 벡터 복사 단위 (메모리 사용량 제한)
+
+# 워커 프로세스별 모델 (초기화 시 한 번만 로드)
+_worker_model = None
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """최대 RSS(MB) - Linux의 ru_maxrss는 KB 단위"""
+    return resource.getrusage(who).ru_maxrss / 1024
+
+def get_embedding_dimension() -> int:
+    """모델 설정에서 임베딩 차원 조회 (모델 가중치를 메인 프로세스에 올리지 않음)"""
+    from transformers import AutoConfig
+    return AutoConfig.from_pretrained(MODEL_NAME).hidden_size
+
+def _init_worker(num_threads: int):
+    """워커 프로세스 초기화 - 스레드 수 제한 후 모델 로드"""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # 워커끼리 CPU 코어를 나눠 쓰도록 intra-op 스레드 수 제한
+    torch.set_num_threads(num_threads)
+    _worker_model = SentenceTransformer(MODEL_NAME)
+
+def _encode_shard(shard_index: int, matrix_path: str, rows: list, texts: list, batch_size: int) -> dict:
+    """샤드의 텍스트를 배치 인코딩하여 공유 행렬의 지정된 행에 기록"""
+    matrix = np.load(matrix_path, mmap_mode="r+")
+    started_at = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        batch_vectors = embedding_store.normalize_rows(
+            _worker_model.encode(texts[start:start + batch_size], batch_size=batch_size)
+        )
+        matrix[rows[start:start + batch_size]] = batch_vectors
+    matrix.flush()
+    del matrix
+
+    return {
+        "shard": shard_index,
+        "count": len(texts),
+        "seconds": time.perf_counter() - started_at,
+        "pid": os.getpid(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def collect_exercises(data: dict) -> list:
+    """근육별 (근육 이름, [(운동 ID, 텍스트), ...]) 목록 수집 (중복 ID와 빈 텍스트 제외)"""
+    all_muscles = data["metadata"].get("front_muscles", []) + data["metadata"].get("back_muscles", [])
+    seen_ids = set()
+    muscles = []
+    for muscle_name in sorted(set(all_muscles)):
+        muscle_data = data.get("muscles", {}).get(muscle_name)
+        if muscle_data is None:
+            print(f"경고: '{muscle_name}' 근육에 대한 데이터가 없습니다.")
+            continue
+
+        exercises = []
+        for i, exercise in enumerate(muscle_data.get("exercises", [])):
+            exercise_id = exercise.get("id", f"{muscle_name}_{i}")
+            combined_text = build_exercise_text(exercise)
+            if not combined_text.strip() or exercise_id in seen_ids:
+                continue
+            seen_ids.add(exercise_id)
+            exercises.append((exercise_id, combined_text))
+        muscles.append((muscle_name, exercises))
+    return muscles
+
+def plan_shards(muscle_jobs: list, num_shards: int) -> list:
+    """인코딩할 텍스트 수 기준으로 근육을 샤드에 고르게 배분 (큰 근육부터 가장 가벼운 샤드에 할당)"""
+    shards = [{"muscles": [], "rows": [], "texts": []} for _ in range(num_shards)]
+    for muscle_name, rows, texts in sorted(muscle_jobs, key=lambda job: len(job[1]), reverse=True):
+        shard = min(shards, key=lambda s: len(s["texts"]))
+        shard["muscles"].append(muscle_name)
+        shard["rows"].extend(rows)
+        shard["texts"].extend(texts)
+    return [shard for shard in shards if shard["texts"]]
+
+def load_previous_store(binary_base: str, json_path: str):
+    """이전 임베딩을 (ID -> 행 번호, 행렬)로 로드 (바이너리는 메모리 매핑으로 열어 필요한 행만 읽음)"""
+    if embedding_store.binary_exists(binary_base):
+        ids, matrix = embedding_store.load_binary(binary_base, mmap=True)
+    elif os.path.exists(json_path):
+        ids, matrix = embedding_store.load_json(json_path)
+    else:
+        return {}, None
+    return {exercise_id: row for row, exercise_id in enumerate(ids)}, matrix
+
+def build_embeddings(num_workers: int, batch_size: int, full_rebuild: bool, write_json: bool) -> int:
+    """샤드 단위 멀티 프로세스 임베딩 생성 및 저장"""
+    start_time = time.time()
+    data_path = os.path.join(backend_dir, "data", "data.json")
+    json_path = os.path.join(backend_dir, "data", "embeddings_bge.json")
+    binary_base = os.path.join(backend_dir, "data", "embeddings_bge")
+    manifest_path = binary_base + MANIFEST_SUFFIX
+
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"데이터 파일을 찾을 수 없습니다: {data_path}")
+
+    # 1. 데이터 로드 및 운동 텍스트 수집
+    print("데이터 로드 중...")
+    with open(data_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    muscles = collect_exercises(data)
+    del data
+
+    ordered_ids = [exercise_id for _, exercises in muscles for exercise_id, _ in exercises]
+    exercise_count = len(ordered_ids)
+    if not exercise_count:
+        print("임베딩할 운동이 없습니다.")
+        return 0
+
+    # 2. 기존 임베딩 및 해시 로드 (증분 생성용)
+    dim = get_embedding_dimension()
+    previous_rows, previous_matrix = ({}, None) if full_rebuild else load_previous_store(binary_base, json_path)
+    previous_hashes = {} if full_rebuild else load_manifest(manifest_path)
+    if previous_matrix is not None and previous_matrix.shape[1] != dim:
+        print(f"임베딩 차원이 변경되어 기존 임베딩을 무시합니다: {previous_matrix.shape[1]} -> {dim}")
+        previous_rows, previous_matrix = {}, None
+
+    # 3. 행 번호 배정 및 재사용/인코딩 대상 분리
+    hashes = {}
+    reuse_pairs = []  # (새 행, 기존 행)
+    muscle_jobs = []  # (근육 이름, [새 행], [텍스트])
+    row = 0
+    for muscle_name, exercises in muscles:
+        rows, texts = [], []
+        for exercise_id, combined_text in exercises:
+            content_hash = hash_text(combined_text)
+            hashes[exercise_id] = content_hash
+            if previous_hashes.get(exercise_id) == content_hash and exercise_id in previous_rows:
+                reuse_pairs.append((row, previous_rows[exercise_id]))
+            else:
+                rows.append(row)
+                texts.append(combined_text)
+            row += 1
+        if texts:
+            muscle_jobs.append((muscle_name, rows, texts))
+    del muscles
+
+    encode_count = exercise_count - len(reuse_pairs)
+    removed_count = len(set(previous_rows) - set(hashes))
+    print(f"총 {exercise_count}개 운동 중 신규/변경 {encode_count}개, 재사용 {len(reuse_pairs)}개, 삭제 {removed_count}개")
+
+    # 4. 디스크에 행렬 미리 할당 후 재사용 벡터 복사
+    matrix = embedding_store.create_binary_writer(binary_base, exercise_count, dim)
+    for start in range(0, len(reuse_pairs), COPY_CHUNK_ROWS):
+        chunk = np.array(reuse_pairs[start:start + COPY_CHUNK_ROWS])
+        matrix[chunk[:, 0]] = previous_matrix[chunk[:, 1]]
+    matrix.flush()
+    del matrix, previous_matrix
+
+    # 5. 근육 단위 샤드를 워커 프로세스에서 인코딩
+    encode_seconds = 0.0
+    if muscle_jobs:
+        shards = plan_shards(muscle_jobs, max(1, num_workers))
+        del muscle_jobs
+        num_workers = len(shards)
+        num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+        matrix_path = embedding_store.pending_matrix_path(binary_base)
+        print(f"워커 {num_workers}개 (워커당 스레드 {num_threads}개)로 {encode_count}개 텍스트 인코딩 중...")
+        for i, shard in enumerate(shards):
+            print(f"- 샤드 {i}: 근육 {len(shard['muscles'])}개, 텍스트 {len(shard['texts'])}개")
+
+        encode_start = time.perf_counter()
+        done_count = 0
+        # CUDA/토치 스레드 상태가 fork로 복제되지 않도록 spawn 사용
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(num_threads,)
+        ) as pool:
+            futures = [
+                pool.submit(_encode_shard, i, matrix_path, shard["rows"], shard["texts"], batch_size)
+                for i, shard in enumerate(shards)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                done_count += result["count"]
+                print(
+                    f"샤드 {result['shard']} 완료 (pid={result['pid']}): {result['count']}개, "
+                    f"{result['count'] / result['seconds']:.1f} texts/sec, 최대 RSS {result['peak_rss_mb']:.0f}MB "
+                    f"[{done_count}/{encode_count}]"
+                )
+        encode_seconds = time.perf_counter() - encode_start
+
+    # 6. 행렬 확정 및 매니페스트 저장 (모두 원자적 교체)
+    matrix_path = embedding_store.commit_binary(binary_base, ordered_ids)
+    print(f"바이너리 임베딩 저장 완료: {matrix_path} ({exercise_count}, {dim})")
+    if write_json:
+        embedding_store.export_json(binary_base, json_path)
+        print(f"JSON 임베딩 저장 완료: {json_path}")
+    write_json_atomic(manifest_path, {"model": MODEL_NAME, "hashes": hashes})
+
+    # 7. 처리량 및 메모리 사용량 출력
+    total_seconds = time.time() - start_time
+    print(f"임베딩 생성 완료! 소요 시간: {total_seconds:.2f}초")
+    if encode_count:
+        print(f"인코딩 처리량: {encode_count / encode_seconds:.1f} texts/sec (인코딩 {encode_seconds:.2f}초)")
+    print(f"최대 메모리 사용량(RSS) - 메인: {peak_rss_mb():.0f}MB, 워커 최대: {peak_rss_mb(resource.RUSAGE_CHILDREN):.0f}MB")
+
+    return exercise_count
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="멀티 프로세스 샤드 임베딩 생성")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2), help="워커 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE, help="워커별 인코딩 배치 크기")
+    parser.add_argument("--full", action="store_true", help="기존 임베딩을 무시하고 전체 재생성")
+    parser.add_argument("--json", action="store_true", help="호환용 embeddings_bge.json도 함께 저장")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    build_embeddings(args.workers, args.batch_size, args.full, args.json)
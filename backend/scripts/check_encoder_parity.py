@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+인코더 백엔드 정합성 검사 스크립트
+- 선택한 백엔드(torch-int8, onnx 등)로 운동 텍스트를 다시 인코딩하여 기존 임베딩 파일과 비교
+- 코사인 유사도와 테스트 쿼리의 상위 k개 검색 결과 일치율, 쿼리 인코딩 지연 시간을 출력
+- 실행 방법: python backend/scripts/check_encoder_parity.py [backend] [샘플 수]
+  (예: python backend/scripts/check_encoder_parity.py onnx 200)
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+
+# backend 디렉토리를 Python 경로에 추가
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.services import embedding_store
+from app.services.encoder_backend import load_encoder
+from app.services.embedding_service import EmbeddingService
+from create_embeddings import build_exercise_text
+
+# 테스트 쿼리 세트
+TEST_QUERIES = [
+    "목이 뻐근하고 어깨가 무겁습니다",
+    "컴퓨터 작업 후 허리가 아파요",
+    "운동 후 종아리 근육통이 심해요",
+    "무릎이 시리고 통증이 있어요",
+    "손목이 자주 저리고 아픕니다"
+]
+
+# 통과 기준
+MIN_COSINE = 0.98
+MEAN_COSINE = 0.99
+TOP_K = 3
+
+def check_parity(backend: str, sample_size: int = 0) -> bool:
+    """선택한 백엔드와 기존 임베딩의 정합성 검사"""
+    data_path = os.path.join(backend_dir, "data", "data.json")
+    binary_base = os.path.join(backend_dir, "data", "embeddings_bge")
+    json_path = os.path.join(backend_dir, "data", "embeddings_bge.json")
+
+    # 1. 데이터 및 기존 임베딩 로드
+    with open(data_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if embedding_store.binary_exists(binary_base):
+        ids, stored = embedding_store.load_binary(binary_base)
+    else:
+        ids, stored = embedding_store.load_json(json_path)
+    row_by_id = {exercise_id: row for row, exercise_id in enumerate(ids)}
+
+    # 2. 비교 대상 운동 텍스트 수집
+    sample_ids, texts = [], []
+    for muscle_name, muscle_data in data.get("muscles", {}).items():
+        for i, exercise in enumerate(muscle_data.get("exercises", [])):
+            exercise_id = exercise.get("id", f"{muscle_name}_{i}")
+            text = build_exercise_text(exercise)
+            if exercise_id in row_by_id and text.strip():
+                sample_ids.append(exercise_id)
+                texts.append(text)
+    if sample_size > 0:
+        sample_ids, texts = sample_ids[:sample_size], texts[:sample_size]
+
+    print(f"백엔드: {backend}, 비교 대상: {len(texts)}개 운동")
+    if not texts:
+        print("비교할 운동이 없습니다.")
+        return False
+
+    # 3. 선택한 백엔드로 다시 인코딩
+    model = load_encoder(EmbeddingService.MODEL_NAME, backend=backend, onnx_file=settings.EMBEDDING_ONNX_FILE or None)
+    start_time = time.time()
+    candidate = embedding_store.normalize_rows(model.encode(texts, batch_size=32))
+    print(f"문서 인코딩 시간: {time.time() - start_time:.2f}초")
+
+    reference = np.asarray(stored[[row_by_id[i] for i in sample_ids]], dtype=np.float32)
+
+    # 4. 문서 임베딩 코사인 유사도
+    cosines = np.sum(candidate * reference, axis=1)
+    worst = int(np.argmin(cosines))
+    print(f"코사인 유사도 - 평균: {cosines.mean():.4f}, 최소: {cosines.min():.4f} ({sample_ids[worst]})")
+
+    # 5. 테스트 쿼리 상위 k개 일치율 및 쿼리 지연 시간
+    overlaps, latencies = [], []
+    for query in TEST_QUERIES:
+        start_time = time.perf_counter()
+        query_embedding = embedding_store.normalize_rows(model.encode([query]))[0]
+        latencies.append(time.perf_counter() - start_time)
+
+        reference_top = set(np.argsort(-(reference @ query_embedding))[:TOP_K])
+        candidate_top = set(np.argsort(-(candidate @ query_embedding))[:TOP_K])
+        overlaps.append(len(reference_top & candidate_top) / TOP_K)
+
+    print(f"상위 {TOP_K}개 검색 결과 일치율: {np.mean(overlaps):.2%}")
+    print(f"쿼리 인코딩 지연 시간 - 평균: {np.mean(latencies) * 1000:.1f}ms, 최대: {np.max(latencies) * 1000:.1f}ms")
+
+    passed = cosines.min() >= MIN_COSINE and cosines.mean() >= MEAN_COSINE
+    print("✅ 정합성 검사 통과" if passed else f"❌ 정합성 검사 실패 (기준: 최소 {MIN_COSINE}, 평균 {MEAN_COSINE})")
+    return passed
+
+if __name__ == "__main__":
+    backend = sys.argv[1] if len(sys.argv) > 1 else settings.EMBEDDING_BACKEND
+    sample_size = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    success = check_parity(backend, sample_size)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+임베딩 JSON 파일과 바이너리(.ids.json + 세대별 .npy) 저장소 간 변환 스크립트
+- 실행 방법:
+  python backend/scripts/convert_embeddings.py import   # embeddings_bge.json -> embeddings_bge.ids.json + .npy
+  python backend/scripts/convert_embeddings.py export   # embeddings_bge.ids.json + .npy -> embeddings_bge.json
+"""
+import os
+import sys
+import time
+
+# backend 디렉토리를 Python 경로에 추가
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services.embedding_store import import_json, export_json
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in ("import", "export"):
+        print("사용법: python convert_embeddings.py [import|export]")
+        return 1
+    
+    json_path = os.path.join(backend_dir, "data", "embeddings_bge.json")
+    binary_base = os.path.join(backend_dir, "data", "embeddings_bge")
+    
+    start_time = time.time()
+    if sys.argv[1] == "import":
+        count = import_json(json_path, binary_base)
+        print(f"{json_path} -> {binary_base}.ids.json 변환 완료 ({count}개)")
+    else:
+        export_json(binary_base, json_path)
+        print(f"{binary_base}.ids.json -> {json_path} 변환 완료")
+    print(f"소요 시간: {time.time() - start_time:.2f}초")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
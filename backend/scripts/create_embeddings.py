@@ -2,14 +2,93 @@
 """
 스트레칭 데이터의 임베딩을 생성하고 파일로 저장하는 스크립트
 BGE 모델을 이용한 버전
+- 운동별 텍스트 해시를 비교하여 신규/변경된 운동만 배치로 인코딩 (전체 재생성: --full)
 """
+import hashlib
 import json
 import os
+import sys
 import time
 from tqdm import tqdm
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+# backend 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embedding_store import binary_exists, load_binary, load_json, normalize_rows, save_binary
+
+MODEL_NAME = "BAAI/bge-large-zh-v1.5"
+ENCODE_BATCH_SIZE = 64
+MANIFEST_SUFFIX = ".manifest.json"  # 운동 ID별 텍스트 해시 (증분 생성용)
+
+def hash_text(text: str) -> str:
+    """임베딩 대상 텍스트의 콘텐츠 해시"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def write_json_atomic(path: str, obj):
+    """임시 파일에 쓴 뒤 원자적으로 교체"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_manifest(manifest_path: str) -> dict:
+    """이전 실행의 운동 ID별 텍스트 해시 로드 (모델이 다르면 무시)"""
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("model") != MODEL_NAME:
+        print(f"모델이 변경되어 기존 해시를 무시합니다: {manifest.get('model')} -> {MODEL_NAME}")
+        return {}
+    return manifest.get("hashes", {})
+
+def load_previous_embeddings(binary_base: str, json_path: str) -> dict:
+    """이전 실행의 임베딩 로드 (바이너리 우선, 없으면 JSON)"""
+    if binary_exists(binary_base):
+        ids, matrix = load_binary(binary_base, mmap=False)
+    elif os.path.exists(json_path):
+        ids, matrix = load_json(json_path)
+    else:
+        return {}
+    return {exercise_id: matrix[row] for row, exercise_id in enumerate(ids)}
+
+def build_exercise_text(exercise: dict) -> str:
+    """운동 데이터에서 임베딩에 사용할 텍스트를 추출하여 결합"""
+    texts = []
+    
+    # 영어 텍스트 추출
+    title = exercise.get("title", "")
+    abstract = exercise.get("abstract", "")
+    
+    # 한국어 텍스트 추출
+    enhanced = exercise.get("enhanced_metadata", {})
+    stretching_details = enhanced.get("스트레칭_상세화", {})
+    
+    steps = stretching_details.get("동작_단계", [])
+    steps_text = " ".join(steps) if steps else ""
+    
+    breathing = stretching_details.get("호흡_패턴", [])
+    breathing_text = " ".join(breathing) if breathing else ""
+    
+    feeling = stretching_details.get("느껴야_할_감각", "")
+    
+    # 텍스트 결합
+    if title:
+        texts.append(title)
+    if abstract:
+        texts.append(abstract)
+    if steps_text:
+        texts.append(steps_text)
+    if breathing_text:
+        texts.append(breathing_text)
+    if feeling:
+        texts.append(feeling)
+    
+    # 최종 텍스트 생성
+    return " ".join(texts)
+
 def create_embeddings():
     """스트레칭 데이터의 임베딩 생성 및 저장"""
     start_time = time.time()
@@ -42,16 +121,20 @@ def create_embeddings():
     with open(data_path, "r", encoding="utf-8") as f:
         data = json.load(f)
     
-    # 3. 모델 로드 - BGE 모델로 변경
-    print("BGE 모델 로드 중...")
-    # 다국어(영어+중국어) 지원 모델을 선택했지만, 한국어에 더 적합한 다른 모델로 대체 가능
-    model = SentenceTransformer('BAAI/bge-large-zh-v1.5')
-    print("모델 로드 완료!")
+    # 3. 기존 임베딩 및 콘텐츠 해시 로드 (증분 생성용)
+    binary_base = os.path.splitext(output_path)[0]
+    manifest_path = binary_base + MANIFEST_SUFFIX
+    full_rebuild = "--full" in sys.argv
+    previous_vectors = {} if full_rebuild else load_previous_embeddings(binary_base, output_path)
+    previous_hashes = {} if full_rebuild else load_manifest(manifest_path)
+    print(f"기존 임베딩 {len(previous_vectors)}개 로드됨{' (전체 재생성 모드)' if full_rebuild else ''}")
     
-    # 4. 임베딩 생성
-    print("임베딩 생성 중...")
-    embeddings = {}
-    exercise_count = 0
+    # 4. 변경된 운동만 골라 임베딩 대상 수집
+    print("임베딩 대상 수집 중...")
+    ordered_ids = []
+    hashes = {}
+    to_encode_ids = []
+    to_encode_texts = []
     
     # 메타데이터에서 모든 근육 목록 가져오기
     all_muscles = data['metadata'].get('front_muscles', []) + data['metadata'].get('back_muscles', [])
@@ -60,63 +143,61 @@ def create_embeddings():
     print(f"실제 데이터에 있는 근육 수: {len(data.get('muscles', {}))}")
     
     # 각 근육별 운동 데이터 처리
-    for muscle_name in tqdm(all_muscles, desc="근육 처리"):
+    for muscle_name in all_muscles:
         if muscle_name in data.get("muscles", {}):
             muscle_data = data["muscles"][muscle_name]
-            exercise_count_for_muscle = len(muscle_data.get("exercises", []))
-            print(f"근육 처리 중: {muscle_name}, 운동 수: {exercise_count_for_muscle}")
             
             for i, exercise in enumerate(muscle_data.get("exercises", [])):
                 # 고유 ID 생성
                 exercise_id = exercise.get("id", f"{muscle_name}_{i}")
                 
                 # 텍스트 추출 및 결합
-                texts = []
-                
-                # 영어 텍스트 추출
-                title = exercise.get("title", "")
-                abstract = exercise.get("abstract", "")
-                
-                # 한국어 텍스트 추출
-                enhanced = exercise.get("enhanced_metadata", {})
-                stretching_details = enhanced.get("스트레칭_상세화", {})
-                
-                steps = stretching_details.get("동작_단계", [])
-                steps_text = " ".join(steps) if steps else ""
-                
-                breathing = stretching_details.get("호흡_패턴", [])
-                breathing_text = " ".join(breathing) if breathing else ""
+                combined_text = build_exercise_text(exercise)
+                if not combined_text.strip() or exercise_id in hashes:
+                    continue
                 
-                feeling = stretching_details.get("느껴야_할_감각", "")
-                
-                # 텍스트 결합
-                if title:
-                    texts.append(title)
-                if abstract:
-                    texts.append(abstract)
-                if steps_text:
-                    texts.append(steps_text)
-                if breathing_text:
-                    texts.append(breathing_text)
-                if feeling:
-                    texts.append(feeling)
-                
-                # 최종 텍스트 생성
-                combined_text = " ".join(texts)
-                
-                if combined_text.strip():
-                    # 임베딩 생성
-                    embedding = model.encode(combined_text)
-                    embeddings[exercise_id] = embedding.tolist()
-                    exercise_count += 1
-                    print(f"임베딩 생성 완료: {exercise_id} - {title[:50]}...")
+                # 텍스트 해시가 같으면 기존 임베딩 재사용
+                content_hash = hash_text(combined_text)
+                ordered_ids.append(exercise_id)
+                hashes[exercise_id] = content_hash
+                if previous_hashes.get(exercise_id) != content_hash or exercise_id not in previous_vectors:
+                    to_encode_ids.append(exercise_id)
+                    to_encode_texts.append(combined_text)
         else:
             print(f"경고: '{muscle_name}' 근육에 대한 데이터가 없습니다.")
     
-    # 5. 임베딩 저장
+    exercise_count = len(ordered_ids)
+    removed_count = len(set(previous_vectors) - set(hashes))
+    print(f"총 {exercise_count}개 운동 중 신규/변경 {len(to_encode_ids)}개, 재사용 {exercise_count - len(to_encode_ids)}개, 삭제 {removed_count}개")
+    
+    # 5. 신규/변경 운동만 배치 인코딩
+    to_encode_set = set(to_encode_ids)
+    vectors = {exercise_id: previous_vectors[exercise_id] for exercise_id in ordered_ids if exercise_id not in to_encode_set}
+    if to_encode_ids:
+        # 모델 로드 - BGE 모델 (인코딩할 항목이 있을 때만)
+        print("BGE 모델 로드 중...")
+        # 다국어(영어+중국어) 지원 모델을 선택했지만, 한국어에 더 적합한 다른 모델로 대체 가능
+        model = SentenceTransformer(MODEL_NAME)
+        print("모델 로드 완료!")
+        
+        print("임베딩 생성 중...")
+        for start in tqdm(range(0, len(to_encode_texts), ENCODE_BATCH_SIZE), desc="배치 인코딩"):
+            batch_texts = to_encode_texts[start:start + ENCODE_BATCH_SIZE]
+            batch_vectors = normalize_rows(model.encode(batch_texts, batch_size=ENCODE_BATCH_SIZE))
+            for exercise_id, vector in zip(to_encode_ids[start:start + ENCODE_BATCH_SIZE], batch_vectors):
+                vectors[exercise_id] = vector
+    
+    # 6. 임베딩 저장 (서비스용 바이너리 저장소 + 호환용 JSON + 해시 매니페스트, 모두 원자적 교체)
     print(f"임베딩 저장 중... (총 {exercise_count}개 운동)")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(embeddings, f)
+    if exercise_count:
+        matrix = np.stack([vectors[exercise_id] for exercise_id in ordered_ids]).astype(np.float32)
+    else:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+    matrix_path = save_binary(binary_base, ordered_ids, matrix)
+    print(f"바이너리 임베딩 저장 완료: {matrix_path}")
+    
+    write_json_atomic(output_path, {exercise_id: matrix[row].tolist() for row, exercise_id in enumerate(ordered_ids)})
+    write_json_atomic(manifest_path, {"model": MODEL_NAME, "hashes": hashes})
     
     end_time = time.time()
     print(f"임베딩 생성 완료! 소요 시간: {end_time - start_time:.2f}초")
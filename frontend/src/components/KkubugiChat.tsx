@@ -90,14 +90,16 @@ export const KkubugiChat: React.FC = () => {
 
       const decoder = new TextDecoder();
       let responseText = '';
+      let buffer = '';
 
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
 
-        // 청크 디코딩
-        const chunk = decoder.decode(value, { stream: true });
-        const lines = chunk.split('\n\n');
+        // 청크 디코딩 (프레임이 여러 번의 read에 걸쳐 올 수 있으므로 마지막 미완성 프레임은 버퍼에 남김)
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n\n');
+        buffer = lines.pop() ?? '';
 
         for (const line of lines) {
           if (line.startsWith('data: ')) {
@@ -107,8 +109,10 @@ export const KkubugiChat: React.FC = () => {
             if (data === '[DONE]') continue;
 
             try {
-              // 백엔드에서는 직접 텍스트 데이터를 보냄 (JSON이 아님)
-              responseText += data;
+              // 백엔드는 {"content": "..."} JSON 프레임을 보냄
+              const parsed = JSON.parse(data);
+              if (typeof parsed.content !== 'string') continue;
+              responseText += parsed.content;
               
               // 누적된 응답으로 꾸부기 메시지 업데이트
               setMessages(prev => 